@@ -1,9 +1,41 @@
-from flask import Flask, render_template, request, send_file
-from src.sensor.pipeline.prediction import PredictionPipeline
-import os
+import io
+import time
+import logging
+from flask import Flask, Response, render_template, request, send_file, jsonify, stream_with_context
+from src.sensor.pipeline.prediction import PredictionPipeline, PredictionWorkspace, parse_features
+from src.sensor.pipeline.model_registry import ModelRegistry
+from src.sensor.pipeline.batching import MicroBatcher
+from src.sensor.utils.metrics import LatencyHistogram
+from sensor.config.configuration import Configuration
+from sensor.entity.config_entity import ServingConfig
 
 app = Flask(__name__)
 
+# Load the model once per process and keep it warm across requests
+serving_config = ServingConfig.from_dict(Configuration().get_serving_config())
+model_registry = ModelRegistry(serving_config)
+try:
+    model_registry.load()
+except FileNotFoundError as e:
+    logging.warning(f"{e}. The model will be loaded on the first request.")
+
+# Group small concurrent /predict requests into shared forward passes
+batcher = None
+if serving_config.batching_enabled:
+    batcher = MicroBatcher(model_registry.predict,
+                           max_wait_ms=serving_config.batch_max_wait_ms,
+                           max_batch_size=serving_config.batch_max_size)
+
+# Requests that had to (re)load the model are "cold", all others "warm"
+request_latency = {
+    endpoint: {'cold': LatencyHistogram(), 'warm': LatencyHistogram()}
+    for endpoint in ('/', '/predict')
+}
+
+def observe_latency(endpoint, start, loads_before):
+    kind = 'cold' if model_registry.load_count != loads_before else 'warm'
+    request_latency[endpoint][kind].observe(time.perf_counter() - start)
+
 # Helper function to convert Google Drive view link to direct download link
 def convert_drive_url_to_direct_download(source_url):
     if 'drive.google.com' in source_url and 'view' in source_url:
@@ -23,15 +55,90 @@ def home():
         # Convert the URL if it's a Google Drive view link
         data_url = convert_drive_url_to_direct_download(data_url)
 
-        # Run the prediction pipeline using the converted URL
-        pipeline = PredictionPipeline(data_url)
+        # Run the prediction pipeline using the converted URL and the warm model
+        pipeline = PredictionPipeline(data_url, model_registry=model_registry)
+        loads_before = model_registry.load_count
+        start = time.perf_counter()
+
+        if request.form.get("stream"):
+            return stream_predictions(pipeline, start, loads_before)
+
         try:
-            output_csv = pipeline.run_pipeline()
-            return send_file(output_csv, as_attachment=True)
+            # Each request works in its own scratch directory, removed once the
+            # output has been read back into memory
+            with PredictionWorkspace(serving_config.scratch_dir) as workspace:
+                output_csv = pipeline.run_pipeline(workspace)
+                with open(output_csv, 'rb') as f:
+                    output = io.BytesIO(f.read())
+            return send_file(output, mimetype="text/csv", as_attachment=True, download_name="predicted_output.csv")
         except Exception as e:
             return f"Error: {str(e)}"
+        finally:
+            observe_latency('/', start, loads_before)
 
     return render_template("index.html")
 
+def stream_predictions(pipeline, start, loads_before):
+    """
+    Stream the predictions CSV back chunk by chunk instead of sending a finished file.
+    """
+    workspace = PredictionWorkspace(serving_config.scratch_dir)
+    try:
+        chunks = pipeline.stream_pipeline(workspace, serving_config.stream_chunk_rows)
+    except Exception as e:
+        observe_latency('/', start, loads_before)
+        return f"Error: {str(e)}"
+
+    def close():
+        # Runs when the server closes the response, even if no chunk was ever
+        # sent; an unstarted generator's finally block would never run
+        chunks.close()
+        workspace.cleanup()
+        observe_latency('/', start, loads_before)
+
+    response = Response(stream_with_context(chunks), mimetype="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=predicted_output.csv"})
+    response.call_on_close(close)
+    return response
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    """
+    In-memory prediction on feature rows sent in the request body as JSON,
+    raw little-endian float32 bytes or svmlight text.
+    """
+    loads_before = model_registry.load_count
+    start = time.perf_counter()
+    try:
+        num_features = len(model_registry.get_transform().feature_columns)
+        try:
+            features = parse_features(request.get_data(), request.mimetype, num_features)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        pipeline = PredictionPipeline(model_registry=model_registry, batcher=batcher)
+        labels, probabilities, concentration = pipeline.predict_features(features)
+        response = {'labels': labels.tolist(), 'probabilities': probabilities.tolist()}
+        if concentration is not None:
+            response['concentration'] = concentration.tolist()
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        observe_latency('/predict', start, loads_before)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        'request_latency_seconds': {
+            endpoint: {kind: hist.snapshot() for kind, hist in hists.items()}
+            for endpoint, hists in request_latency.items()
+        },
+        'model': {'runtime': serving_config.runtime, 'path': model_registry.model_path,
+                  'load_count': model_registry.load_count},
+        'batching': batcher.snapshot() if batcher is not None else None,
+    })
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Requests are isolated in their own workspaces, so they can be served concurrently
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,84 @@
+"""
+Benchmark the startup cost of the pipeline CLI, the pipeline stage modules
+and the web app.
+
+Each target runs in a fresh interpreter, so nothing is already imported:
+
+  * main:     import main.py, i.e. the cost of `python main.py --stages ...`
+              before the first stage starts.
+  * stage_NN: import one stage module, as main.py does right before running it.
+  * app:      import app.py and answer a first GET /metrics.
+
+For every target the median wall time over --repeats runs is reported,
+together with the heavy frameworks that ended up in sys.modules.
+
+Usage:
+    python benchmarks/bench_import_time.py --repeats 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Frameworks whose presence in sys.modules shows a lazy import was defeated
+HEAVY_MODULES = ('tensorflow', 'mlflow', 'sklearn', 'scipy', 'pandas')
+
+TARGETS = {
+    'main': 'import main',
+    'stage_01_data_ingestion': 'import src.sensor.pipeline.stage_01_data_ingestion',
+    'stage_02_preprocessing': 'import src.sensor.pipeline.stage_02_preprocessing',
+    'stage_03_prepare_base_model': 'import src.sensor.pipeline.stage_03_prepare_base_model',
+    'stage_05_evaluate_model': 'import src.sensor.pipeline.stage_05_evaluate_model',
+    'stage_08_export_model': 'import src.sensor.pipeline.stage_08_export_model',
+    'stage_09_quantize_model': 'import src.sensor.pipeline.stage_09_quantize_model',
+    'app': 'import app; app.app.test_client().get("/metrics")',
+}
+
+
+def run_worker(target: str):
+    start = time.perf_counter()
+    exec(TARGETS[target], {})
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'loaded': [name for name in HEAVY_MODULES if name in sys.modules]}))
+
+
+def spawn(target: str) -> dict:
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.join(ROOT, 'src'), ROOT, env.get('PYTHONPATH')]))
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', target],
+        check=True, capture_output=True, text=True, cwd=ROOT, env=env
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_seconds'] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--targets', default=','.join(TARGETS), help='Comma-separated targets to measure.')
+    parser.add_argument('--worker', choices=list(TARGETS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker)
+        return
+
+    print(f"{'target':<28} {'import (s)':>10} {'process (s)':>11}  heavy modules loaded")
+    for target in args.targets.split(','):
+        results = [spawn(target) for _ in range(args.repeats)]
+        seconds = statistics.median(result['seconds'] for result in results)
+        process_seconds = statistics.median(result['process_seconds'] for result in results)
+        loaded = ', '.join(results[-1]['loaded']) or '-'
+        print(f"{target:<28} {seconds:>10.2f} {process_seconds:>11.2f}  {loaded}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Benchmark the whole pipeline on synthetic gas sensor data, offline and on CPU.
+
+A zip of svmlight batch files in the layout of the UCI dataset
+(Dataset/batchN.dat, "label;concentration 1:v ... 128:v") is generated at
+the requested scale and served from a local HTTP server, then every stage
+runs on it in a scratch directory:
+
+  * ingestion:   download through DownloadManager, and again from its cache.
+  * preprocess:  Preprocessing.load_data, preprocess_data,
+                 save_preprocessed_data and save_transform.
+  * train:       TrainModel.train, with the first epoch (which includes
+                 tracing) and the median of the remaining epochs.
+  * evaluate:    EvaluateModel.evaluate, logging to a local MLflow file store.
+  * predict:     PredictionPipeline.predict_features latency for one row and
+                 for a batch, through the Keras and the NumPy runtime.
+
+Results are written as JSON. With --baseline, every timing is compared
+with the same metric of an earlier result, and the run exits with status 1
+if any of them is slower by more than --max-regression.
+
+Usage:
+    python benchmarks/bench_pipeline.py --batches 10 --rows-per-batch 1391 --output before.json
+    python benchmarks/bench_pipeline.py --output after.json --baseline before.json --max-regression 0.2
+    python benchmarks/bench_pipeline.py --current after.json --baseline before.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import functools
+import threading
+import subprocess
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+# Bumped when the layout of the result file changes
+RESULT_SCHEMA = 1
+
+# Parameters that must match for two results to be comparable
+COMPARABLE_PARAMETERS = ('batches', 'rows_per_batch', 'epochs', 'predict_batch_rows', 'seed')
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_directory(directory: str):
+    """Serve a directory over HTTP on a free local port and yield its base URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def write_dataset(path: str, batches: int, rows_per_batch: int, seed: int) -> int:
+    """
+    Write a zip of synthetic batch files laid out like the UCI dataset.
+
+    :return: Total number of rows.
+    """
+    from benchmarks.synthetic import make_svmlight_bytes
+
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for batch in range(1, batches + 1):
+            archive.writestr(f"Dataset/batch{batch}.dat", make_svmlight_bytes(rows_per_batch, seed=seed + batch))
+    return batches * rows_per_batch
+
+
+def record(metrics: dict, name: str, seconds: float, rows: int = None):
+    metrics[name] = {
+        'seconds': seconds,
+        'rows': rows,
+        'rows_per_second': rows / seconds if rows and seconds > 0 else None,
+    }
+    throughput = f"  ({metrics[name]['rows_per_second']:,.0f} rows/s)" if metrics[name]['rows_per_second'] else ''
+    print(f"  {name:<40} {seconds:>10.4f} s{throughput}", flush=True)
+
+
+def timed(metrics: dict, name: str, func, *args, rows=None):
+    """Run func once, record its wall time and return its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    record(metrics, name, time.perf_counter() - start, rows(result) if callable(rows) else rows)
+    return result
+
+
+def record_latency(metrics: dict, name: str, func, features, repeats: int):
+    """Record the median and 95th percentile latency of func(features) after one warm-up call."""
+    import numpy as np
+
+    func(features)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(features)
+        timings.append(time.perf_counter() - start)
+    record(metrics, f"{name}.p50", float(np.percentile(timings, 50)), len(features))
+    record(metrics, f"{name}.p95", float(np.percentile(timings, 95)), len(features))
+
+
+def bench_ingestion(metrics: dict, config, zip_path: str):
+    import dataclasses
+    from sensor.components.data_ingestion import DataIngestion
+
+    with serve_directory(os.path.dirname(zip_path)) as url:
+        ingestion_config = dataclasses.replace(config.data_ingestion_config,
+                                               source_URL=f"{url}/{os.path.basename(zip_path)}", sha256=None)
+        ingestion = DataIngestion(ingestion_config)
+        timed(metrics, 'ingestion.download', ingestion.initiate_data_ingestion)
+
+        # A known checksum is served from the download cache without a request
+        cached = DataIngestion(dataclasses.replace(ingestion_config, sha256=ingestion.sha256))
+        timed(metrics, 'ingestion.cached', cached.initiate_data_ingestion)
+    return ingestion_config.raw_data_path
+
+
+def bench_preprocessing(metrics: dict, config, raw_data_path: str):
+    from sensor.components.preprocessing import Preprocessing
+
+    preprocessing = Preprocessing(config.data_preprocessing_config)
+    raw = timed(metrics, 'preprocess.load_data', preprocessing.load_data, raw_data_path, rows=len)
+    data = timed(metrics, 'preprocess.preprocess_data', preprocessing.preprocess_data, raw, rows=len)
+    timed(metrics, 'preprocess.save_preprocessed_data', preprocessing.save_preprocessed_data, data, rows=len(data))
+    timed(metrics, 'preprocess.save_transform', preprocessing.save_transform)
+    # preprocess_data works on a copy, so the raw frame can still feed the prediction benchmark
+    return raw, data
+
+
+def bench_training(metrics: dict, config, data, epochs: int, seed: int):
+    import numpy as np
+    import pandas as pd
+    import tensorflow as tf
+    from sensor.components.train_model import TrainModel
+
+    tf.keras.utils.set_random_seed(seed)
+    os.makedirs(os.path.join('artifacts', 'training'), exist_ok=True)
+    # Early stopping is off so every run trains the same number of epochs
+    training_config = dict(config.get_training_params(), epochs=epochs, early_stopping_patience=epochs)
+    trainer = TrainModel(model_config=config.model_config, training_config=training_config, data=data)
+    timed(metrics, 'train.total', trainer.train, rows=len(data))
+
+    epoch_times = pd.read_csv(os.path.join('artifacts', 'training', 'training_history.csv'))['epoch_time'].to_numpy()
+    # Rows seen per epoch: TrainModel's 80% training split minus the validation hold-out
+    train_rows = int((len(data) - math.ceil(0.2 * len(data))) * (1 - training_config.get('validation_split', 0.2)))
+    record(metrics, 'train.first_epoch', float(epoch_times[0]), train_rows)
+    if len(epoch_times) > 1:
+        record(metrics, 'train.epoch_median', float(np.median(epoch_times[1:])), train_rows)
+
+
+def bench_evaluation(metrics: dict, config, data):
+    from sensor.components.evaluate_model import EvaluateModel
+
+    model_path = os.path.join('artifacts', 'training', 'gas_classification_model_final.keras')
+    evaluator = EvaluateModel(model_config=config.model_config, data=data, model_path=model_path)
+    timed(metrics, 'evaluate.total', evaluator.evaluate, rows=len(data))
+
+
+def bench_prediction(metrics: dict, config, raw, batch_rows: int, repeats: int):
+    import numpy as np
+    import tensorflow as tf
+    from sensor.components.export_model import ExportModel
+    from sensor.entity.config_entity import ServingConfig
+    from sensor.pipeline.model_registry import ModelRegistry
+    from sensor.pipeline.prediction import PredictionPipeline
+
+    serving_config = ServingConfig.from_dict(config.get_serving_config())
+    exporter = ExportModel(dict(config.get_export_model_config(), output_path=serving_config.numpy_model_path))
+    exporter.export(tf.keras.models.load_model(serving_config.model_path))
+
+    features = raw[[col for col in raw.columns if 'feature' in col]].to_numpy(dtype=np.float32)
+    batch = np.resize(features, (batch_rows, features.shape[1]))
+    for runtime in ('keras', 'numpy'):
+        registry = ModelRegistry(ServingConfig(**dict(vars(serving_config), runtime=runtime)))
+        registry.load()
+        pipeline = PredictionPipeline(model_registry=registry)
+        record_latency(metrics, f"predict.{runtime}.single_row", pipeline.predict_features, features[:1], repeats)
+        record_latency(metrics, f"predict.{runtime}.batch", pipeline.predict_features, batch, max(repeats // 10, 5))
+
+
+def environment() -> dict:
+    import numpy as np
+
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    try:
+        import tensorflow as tf
+        tensorflow_version = tf.__version__
+    except ImportError:
+        tensorflow_version = None
+    return {
+        'git_commit': git('rev-parse', 'HEAD'),
+        'git_dirty': bool(status) if status is not None else None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'tensorflow': tensorflow_version,
+    }
+
+
+def run(args) -> dict:
+    """Run every benchmark in a scratch copy of the configuration and return the result document."""
+    import logging
+    import warnings
+
+    workdir = tempfile.mkdtemp(prefix='sensor-bench-')
+    cwd = os.getcwd()
+    try:
+        shutil.copytree(os.path.join(ROOT, 'config'), os.path.join(workdir, 'config'))
+        shutil.copy(os.path.join(ROOT, 'param.yaml'), workdir)
+        os.chdir(workdir)  # Every artifact path in the configuration is relative
+        os.makedirs('served', exist_ok=True)
+
+        os.environ['CUDA_VISIBLE_DEVICES'] = ''
+        os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+        os.environ['MLFLOW_TRACKING_URI'] = 'file:' + os.path.join(workdir, 'mlruns')
+        os.environ.setdefault('MLFLOW_ALLOW_FILE_STORE', 'true')
+        # The benchmark times components directly; stage records would only add file writes
+        os.environ['SENSOR_CONFIG__INSTRUMENTATION__ENABLED'] = 'false'
+
+        # Import the heavy frameworks up front, so the timings measure the work and not the
+        # first import that the lazy imports would charge to one step (see bench_import_time.py)
+        import mlflow, sklearn.metrics, sklearn.preprocessing, tensorflow  # noqa: F401
+        from sensor.config.configuration import Configuration
+        logging.disable(logging.WARNING)
+        warnings.filterwarnings('ignore')
+
+        config = Configuration()
+        zip_path = os.path.join(workdir, 'served', 'gas_sensor_synthetic.zip')
+        start = time.perf_counter()
+        total_rows = write_dataset(zip_path, args.batches, args.rows_per_batch, args.seed)
+        print(f"Generated {total_rows:,} rows in {args.batches} batches ({time.perf_counter() - start:.1f} s)")
+
+        metrics = {}
+        raw_data_path = bench_ingestion(metrics, config, zip_path)
+        raw, data = bench_preprocessing(metrics, config, raw_data_path)
+        bench_training(metrics, config, data, args.epochs, args.seed)
+        bench_evaluation(metrics, config, data)
+        bench_prediction(metrics, config, raw, args.predict_batch_rows, args.predict_repeats)
+
+        return {
+            'schema': RESULT_SCHEMA,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'parameters': {name: getattr(args, name) for name in COMPARABLE_PARAMETERS + ('predict_repeats',)},
+            'environment': environment(),
+            'metrics': metrics,
+        }
+    finally:
+        os.chdir(cwd)
+        if args.keep_workdir:
+            print(f"Kept scratch directory {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(current: dict, baseline: dict, max_regression: float, min_seconds: float) -> list:
+    """
+    Compare the timings of two results.
+
+    :param current: Result under test.
+    :param baseline: Earlier result.
+    :param max_regression: Allowed relative slowdown, e.g. 0.2 for 20%.
+    :param min_seconds: Slowdowns smaller than this many seconds are treated as noise.
+    :return: Names of the metrics that regressed.
+    """
+    mismatched = {name: (baseline['parameters'].get(name), current['parameters'].get(name))
+                  for name in COMPARABLE_PARAMETERS
+                  if baseline['parameters'].get(name) != current['parameters'].get(name)}
+    if mismatched:
+        raise ValueError(f"Results were produced with different parameters (baseline, current): {mismatched}")
+
+    regressions = []
+    print(f"\n{'metric':<40} {'baseline (s)':>12} {'current (s)':>12} {'change':>8}")
+    for name, value in current['metrics'].items():
+        if name not in baseline['metrics']:
+            print(f"{name:<40} {'-':>12} {value['seconds']:>12.4f} {'new':>8}")
+            continue
+        before, after = baseline['metrics'][name]['seconds'], value['seconds']
+        change = after / before - 1 if before > 0 else 0.0
+        regressed = change > max_regression and after - before > min_seconds
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<40} {before:>12.4f} {after:>12.4f} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', type=int, default=10, help='Number of batch files, like the 10 UCI batches.')
+    parser.add_argument('--rows-per-batch', type=int, default=1391, help='Rows per batch file (UCI: 13,910 in total).')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--predict-batch-rows', type=int, default=1024, help='Rows per batched prediction call.')
+    parser.add_argument('--predict-repeats', type=int, default=200, help='Timed single-row prediction calls.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the result JSON here.')
+    parser.add_argument('--current', help='Compare this result JSON instead of running the benchmark.')
+    parser.add_argument('--baseline', help='Result JSON of an earlier run to compare against.')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='Allowed slowdown per metric (0.2 = 20%%).')
+    parser.add_argument('--min-seconds', type=float, default=0.001, help='Ignore slowdowns below this many seconds.')
+    parser.add_argument('--keep-workdir', action='store_true', help='Keep the scratch directory with all artifacts.')
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current) as f:
+            result = json.load(f)
+    else:
+        result = run(args)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(result, f, indent=2)
+            print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        try:
+            regressions = compare(result, baseline, args.max_regression, args.min_seconds)
+        except ValueError as e:
+            parser.error(str(e))
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) slower than the baseline by more than {args.max_regression:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo metric regressed by more than {args.max_regression:.0%}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark peak RSS and time of the float32 data path and of mixed-precision
+training.
+
+Each measurement runs in a fresh subprocess so peak RSS is not shared:
+
+  * load:  read the preprocessed CSV artifact as pandas' default float64
+           versus float32 (load_artifact), and build the training matrix.
+  * train: fit the model with the float32 and the mixed_bfloat16 policy.
+
+Usage:
+    python benchmarks/bench_precision.py --scale 10 --epochs 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def prepare(scale: float, directory: str) -> str:
+    """Write a preprocessed synthetic dataset as a CSV artifact and return its path."""
+    import logging
+    import warnings
+    from benchmarks.synthetic import make_raw_frame
+    from sensor.components.preprocessing import Preprocessing
+    from sensor.entity.config_entity import DataPreprocessingConfig
+    from sensor.utils.artifact_io import save_artifact
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+    config = DataPreprocessingConfig(preprocessed_dir=directory, preprocessed_file='data', num_features=128,
+                                     feature_range=(0, 1))
+    path = os.path.join(directory, 'data.csv')
+    save_artifact(Preprocessing(config).preprocess_data(make_raw_frame(scale)), path, 'csv')
+    return path
+
+
+def measure_load(path: str, dtype: str) -> dict:
+    import numpy as np
+    import pandas as pd
+    from sensor.utils.artifact_io import load_artifact
+
+    start = time.perf_counter()
+    if dtype == 'float64':
+        data = pd.read_csv(path)
+    else:
+        data = load_artifact(path, 'csv', memory_map=False)
+    X = data[[col for col in data.columns if 'feature' in col]].to_numpy(dtype=np.float32)
+    return {'seconds': time.perf_counter() - start, 'rows': len(X), 'frame_mb': data.memory_usage().sum() / 2 ** 20}
+
+
+def measure_train(path: str, policy: str, epochs: int) -> dict:
+    import logging
+    import numpy as np
+    import tensorflow as tf
+    from sensor.entity.config_entity import ModelConfig
+    from sensor.components.prepare_base_model import PrepareBaseModel, bf16_supported
+    from sensor.components.train_model import EpochTimer, LABEL_OFFSET, make_dataset
+    from sensor.utils.artifact_io import load_artifact
+
+    logging.disable(logging.WARNING)
+    if policy == 'mixed_bfloat16' and not bf16_supported():
+        return {'skipped': 'no native bfloat16 support on this CPU'}
+
+    data = load_artifact(path, 'csv', memory_map=False)
+    X = data[[col for col in data.columns if 'feature' in col]].to_numpy(dtype=np.float32)
+    y = data['target'].to_numpy(dtype=np.int32) - LABEL_OFFSET
+
+    tf.keras.utils.set_random_seed(42)
+    config = ModelConfig.from_dict({'mixed_precision': policy == 'mixed_bfloat16'})
+    model = PrepareBaseModel(config).build_gas_classification_model(X.shape[1:])
+    history = model.fit(make_dataset(X, y, 32, shuffle=True), epochs=epochs, callbacks=[EpochTimer()], verbose=0)
+    epoch_times = history.history['epoch_time']
+    return {
+        # The first epoch includes tracing
+        'epoch_seconds': float(np.min(epoch_times[1:] if len(epoch_times) > 1 else epoch_times)),
+        'final_accuracy': float(history.history['accuracy'][-1]),
+    }
+
+
+def run_worker(args):
+    if args.worker == 'load':
+        result = measure_load(args.path, args.mode)
+    else:
+        result = measure_train(args.path, args.mode, args.epochs)
+    result['peak_rss_mb'] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def spawn(kind: str, mode: str, path: str, epochs: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', kind, '--mode', mode, '--path', path, '--epochs', str(epochs)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=10, help='Dataset size as a multiple of the UCI dataset.')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--worker', choices=['load', 'train'], help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = prepare(args.scale, directory)
+        print(f"{'measurement':<24} {'peak RSS (MB)':>14} {'time (s)':>9}")
+        for dtype in ('float64', 'float32'):
+            result = spawn('load', dtype, path, args.epochs)
+            print(f"{'load CSV ' + dtype:<24} {result['peak_rss_mb']:>14.0f} {result['seconds']:>9.2f}"
+                  f"  (DataFrame {result['frame_mb']:.0f} MB)")
+        for policy in ('float32', 'mixed_bfloat16'):
+            result = spawn('train', policy, path, args.epochs)
+            if 'skipped' in result:
+                print(f"{'train ' + policy:<24} skipped: {result['skipped']}")
+                continue
+            print(f"{'train ' + policy:<24} {result['peak_rss_mb']:>14.0f} {result['epoch_seconds']:>9.2f}"
+                  f"  (best epoch, accuracy {result['final_accuracy']:.3f})")
+
+
+if __name__ == '__main__':
+    main()
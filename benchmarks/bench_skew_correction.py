@@ -0,0 +1,84 @@
+"""
+Benchmark the batched skewness correction in Preprocessing.preprocess_data
+against the previous per-column implementation.
+
+Usage:
+    python benchmarks/bench_skew_correction.py --scales 1 10 100
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler, PowerTransformer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor.components.preprocessing import Preprocessing
+from sensor.entity.config_entity import DataPreprocessingConfig
+from benchmarks.synthetic import make_raw_frame
+
+
+def legacy_preprocess(data: pd.DataFrame, feature_range=(0, 1)) -> pd.DataFrame:
+    """Per-column skewness correction and scaling as implemented before batching."""
+    feature_columns = [col for col in data.columns if 'feature' in col]
+    data_copy = data.copy()
+    skewness = data_copy[feature_columns].skew()
+    high_skewed = skewness[abs(skewness) > 1]
+
+    df_copy = data_copy.copy()
+    pt = PowerTransformer(method='yeo-johnson')
+    for feature in high_skewed.index:
+        try:
+            if high_skewed[feature] > 1:
+                df_copy[feature] = np.log1p(df_copy[feature])
+            df_copy[[feature]] = pt.fit_transform(df_copy[[feature]])
+        except Exception as e:
+            logging.warning(f"Skipping transformation for {feature}: {e}")
+
+    scaler = MinMaxScaler(feature_range=feature_range)
+    scaled_df = pd.DataFrame(scaler.fit_transform(df_copy[feature_columns]), columns=feature_columns)
+    scaled_df['target'] = df_copy['target'].values
+    return scaled_df
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help='Dataset sizes as multiples of the UCI dataset (13,910 rows).')
+    parser.add_argument('--skip-legacy-above', type=float, default=None,
+                        help='Skip the legacy implementation for scales above this value.')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+
+    config = DataPreprocessingConfig(preprocessed_dir='', preprocessed_file='', num_features=128, feature_range=(0, 1))
+
+    print(f"{'scale':>6} {'rows':>10} {'legacy (s)':>11} {'batched (s)':>12} {'speedup':>8} {'max |diff|':>11}")
+    for scale in args.scales:
+        data = make_raw_frame(scale)
+        batched_time, batched = time_call(Preprocessing(config).preprocess_data, data)
+
+        if args.skip_legacy_above is not None and scale > args.skip_legacy_above:
+            print(f"{scale:>6g} {len(data):>10} {'-':>11} {batched_time:>12.2f} {'-':>8} {'-':>11}")
+            continue
+
+        legacy_time, legacy = time_call(legacy_preprocess, data)
+        diff = np.nanmax(np.abs(legacy.to_numpy(dtype=np.float64) - batched.to_numpy(dtype=np.float64)))
+        print(f"{scale:>6g} {len(data):>10} {legacy_time:>11.2f} {batched_time:>12.2f} "
+              f"{legacy_time / batched_time:>7.1f}x {diff:>11.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark the dense svmlight parser used by Preprocessing against the
+previous path, sklearn's load_svmlight_file followed by toarray().
+
+Usage:
+    python benchmarks/bench_svmlight_parser.py --rows 13910 139100
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from sklearn.datasets import load_svmlight_file
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sensor.utils.svmlight import parse_dense_svmlight
+from benchmarks.synthetic import NUM_FEATURES, make_svmlight_bytes
+
+
+def sklearn_parse(raw: bytes, num_features: int):
+    """Parsing as implemented before the dense parser: sparse load, then densify."""
+    data, target = load_svmlight_file(io.BytesIO(raw), n_features=num_features, dtype=np.float32)
+    return data.toarray(), target
+
+
+def best_time(func, *args, repeat: int = 3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[13910, 139100],
+                        help='Row counts to benchmark (the UCI dataset has 13,910 rows).')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the best is reported.')
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'MB':>7} {'sklearn (s)':>12} {'dense (s)':>10} {'speedup':>8} {'label;conc (s)':>15} {'identical':>10}")
+    for n_rows in args.rows:
+        plain = make_svmlight_bytes(n_rows, concentration=False)
+        with_concentration = make_svmlight_bytes(n_rows, concentration=True)
+
+        sklearn_time, (expected, expected_target) = best_time(sklearn_parse, plain, NUM_FEATURES, repeat=args.repeat)
+        dense_time, (features, target, _) = best_time(parse_dense_svmlight, plain, NUM_FEATURES, repeat=args.repeat)
+        concentration_time, _ = best_time(parse_dense_svmlight, with_concentration, NUM_FEATURES, repeat=args.repeat)
+
+        identical = np.array_equal(expected, features) and np.array_equal(expected_target, target)
+        print(f"{n_rows:>8} {len(plain) / 1e6:>7.1f} {sklearn_time:>12.2f} {dense_time:>10.2f} "
+              f"{sklearn_time / dense_time:>7.1f}x {concentration_time:>15.2f} {str(identical):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# Size of the UCI gas sensor array drift dataset
+UCI_ROWS = 13910
+NUM_FEATURES = 128
+NUM_CLASSES = 6
+
+
+def make_raw_frame(scale: float = 1.0, num_features: int = NUM_FEATURES, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a raw feature DataFrame shaped like the output of Preprocessing.load_data.
+
+    Features are heavy-tailed with a share of negative columns so that the
+    skewness correction has real work to do.
+
+    :param scale: Multiple of the UCI dataset size.
+    :param num_features: Number of feature columns.
+    :param seed: Random seed.
+    :return: DataFrame with feature_1..feature_N (float32) and target columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = int(UCI_ROWS * scale)
+
+    features = rng.lognormal(mean=2.0, sigma=1.5, size=(n_rows, num_features)).astype(np.float32)
+    features[:, ::4] *= -1  # EMA decay features are negative in the real data
+    data = pd.DataFrame(features, columns=[f'feature_{i+1}' for i in range(num_features)], copy=False)
+    data['target'] = rng.integers(1, NUM_CLASSES + 1, size=n_rows)
+    return data
+
+
+def make_svmlight_bytes(n_rows: int, num_features: int = NUM_FEATURES, concentration: bool = True, seed: int = 42) -> bytes:
+    """
+    Build svmlight text in the layout of the gas sensor batch files.
+
+    Every row lists all features in order, like "label;concentration 1:v 2:v ...".
+
+    :param n_rows: Number of rows.
+    :param num_features: Number of features per row.
+    :param concentration: Write a ";concentration" suffix after each label.
+    :param seed: Random seed.
+    :return: File contents.
+    """
+    data = make_raw_frame(n_rows / UCI_ROWS, num_features, seed)
+    rng = np.random.default_rng(seed)
+    concentrations = rng.uniform(1.0, 1000.0, size=len(data))
+    features = data.filter(like='feature').to_numpy()
+
+    lines = []
+    for label, conc, row in zip(data['target'], concentrations, features):
+        head = f"{label};{conc:.6f}" if concentration else f"{label}"
+        lines.append(head + ' ' + ' '.join(f"{i}:{value:.6f}" for i, value in enumerate(row, start=1)) + '\n')
+    return ''.join(lines).encode()
@@ -1,10 +1,12 @@
+import os
+import argparse
 import logging
-from src.sensor.pipeline.stage_01_data_ingestion import DataIngestionPipeline
-from src.sensor.pipeline.stage_02_preprocessing import PreprocessingPipeline
-from src.sensor.pipeline.stage_03_prepare_base_model import PrepareBaseModelPipeline
-from src.sensor.pipeline.stage_04_train_model import TrainModelPipeline
-from src.sensor.pipeline.stage_05_evaluate_model import EvaluateModelPipeline
+from sensor.config.configuration import Configuration
+from sensor.constants import STAGE_CACHE_FILE
+from sensor.utils.stage_cache import Stage, StageCache, run_stages
 
+# Each stage module is imported inside its run_* function, so selecting light
+# stages with --stages never loads TensorFlow or MLflow
 
 DATA_INGESTION_STAGE_NAME = "Data Ingestion Stage"
 
@@ -13,6 +15,7 @@ def run_data_ingestion():
     Runs the data ingestion stage of the pipeline.
     """
     try:
+        from src.sensor.pipeline.stage_01_data_ingestion import DataIngestionPipeline
         logging.info(f"Starting {DATA_INGESTION_STAGE_NAME}.")
         data_ingestion_pipeline = DataIngestionPipeline()  # Create an instance of the pipeline
         data_ingestion_pipeline.main()  # Call the main method to run it
@@ -28,6 +31,7 @@ def run_data_preprocessing():
     Runs the data preprocessing stage of the pipeline.
     """
     try:
+        from src.sensor.pipeline.stage_02_preprocessing import PreprocessingPipeline
         logging.info(f"Starting {PREPROCESSING_STAGE_NAME}.")
         preprocessing_pipeline = PreprocessingPipeline()
         preprocessing_pipeline.main()
@@ -43,6 +47,7 @@ def run_base_model_preparation():
     Runs the base model preparation stage of the pipeline.
     """
     try:
+        from src.sensor.pipeline.stage_03_prepare_base_model import PrepareBaseModelPipeline
         logging.info(f"Starting {BASE_MODEL_PREPARATION_STAGE_NAME}.")
         prepare_base_model_pipeline = PrepareBaseModelPipeline()  # Create an instance of the pipeline
         prepare_base_model_pipeline.main()  # Call the main method to run it
@@ -58,6 +63,7 @@ def run_model_training():
     Runs the model training stage of the pipeline.
     """
     try:
+        from src.sensor.pipeline.stage_04_train_model import TrainModelPipeline
         logging.info(f"Starting {TRAIN_MODEL_STAGE_NAME}.")
         train_model_pipeline = TrainModelPipeline()  # Create an instance of the training pipeline
         train_model_pipeline.main()  # Call the main method to run it
@@ -73,6 +79,7 @@ def run_model_evaluation():
     Runs the model evaluation stage of the pipeline.
     """
     try:
+        from src.sensor.pipeline.stage_05_evaluate_model import EvaluateModelPipeline
         logging.info(f"Starting {EVALUATE_MODEL_STAGE_NAME}.")
         evaluate_model_pipeline = EvaluateModelPipeline()  # Create an instance of the evaluation pipeline
         evaluate_model_pipeline.main()  # Call the main method to run it
@@ -81,16 +88,157 @@ def run_model_evaluation():
         logging.error(f"Error occurred during {EVALUATE_MODEL_STAGE_NAME}: {e}")
         raise e
 
-def main():
+EXPORT_MODEL_STAGE_NAME = "Model Export Stage"
+
+def run_model_export():
+    """
+    Runs the model export stage of the pipeline.
+    """
+    try:
+        from src.sensor.pipeline.stage_08_export_model import ExportModelPipeline
+        logging.info(f"Starting {EXPORT_MODEL_STAGE_NAME}.")
+        export_model_pipeline = ExportModelPipeline()  # Create an instance of the export pipeline
+        export_model_pipeline.main()  # Call the main method to run it
+        logging.info(f"{EXPORT_MODEL_STAGE_NAME} completed successfully.")
+    except Exception as e:
+        logging.error(f"Error occurred during {EXPORT_MODEL_STAGE_NAME}: {e}")
+        raise e
+
+QUANTIZE_MODEL_STAGE_NAME = "Model Quantization Stage"
+
+def run_model_quantization():
+    """
+    Runs the int8 model quantization stage of the pipeline.
+    """
+    try:
+        from src.sensor.pipeline.stage_09_quantize_model import QuantizeModelPipeline
+        logging.info(f"Starting {QUANTIZE_MODEL_STAGE_NAME}.")
+        quantize_model_pipeline = QuantizeModelPipeline()  # Create an instance of the quantization pipeline
+        quantize_model_pipeline.main()  # Call the main method to run it
+        logging.info(f"{QUANTIZE_MODEL_STAGE_NAME} completed successfully.")
+    except Exception as e:
+        logging.error(f"Error occurred during {QUANTIZE_MODEL_STAGE_NAME}: {e}")
+        raise e
+
+# Short stage names accepted by --stages
+STAGE_KEYS = {
+    'ingest': DATA_INGESTION_STAGE_NAME,
+    'preprocess': PREPROCESSING_STAGE_NAME,
+    'prepare': BASE_MODEL_PREPARATION_STAGE_NAME,
+    'train': TRAIN_MODEL_STAGE_NAME,
+    'evaluate': EVALUATE_MODEL_STAGE_NAME,
+    'export': EXPORT_MODEL_STAGE_NAME,
+    'quantize': QUANTIZE_MODEL_STAGE_NAME,
+}
+
+def get_stages(config: Configuration):
+    """
+    Stage definitions with the inputs and outputs used for caching, mirroring dvc.yaml.
+
+    :param config: Loaded configuration.
+    :return: Ordered list of stages.
+    """
+    raw_data = config.data_ingestion_config.raw_data_path
+    preprocessed_data = config.get_training_data_path()
+    transform = config.get_transform_path()
+    base_model = os.path.join(config.get_model_config()['save_dir'], 'gas_classification_model.keras')
+    final_model = os.path.join("artifacts/training", "gas_classification_model_final.keras")
+    history = os.path.join("artifacts/training", "training_history.csv")
+    exported_model = config.get_export_model_config().get('output_path', 'artifacts/training/gas_classification_model_final.npz')
+    quantize_config = config.get_quantize_model_config()
+    pipeline_dir = os.path.join("src", "sensor", "pipeline")
+    components_dir = os.path.join("src", "sensor", "components")
+    utils_dir = os.path.join("src", "sensor", "utils")
+
+    stages = [
+        Stage(DATA_INGESTION_STAGE_NAME, run_data_ingestion,
+              sources=[os.path.join(pipeline_dir, "stage_01_data_ingestion.py"), os.path.join(components_dir, "data_ingestion.py")],
+              config_sections=[('config', 'data_ingestion')],
+              outs=[raw_data]),
+        Stage(PREPROCESSING_STAGE_NAME, run_data_preprocessing,
+              sources=[os.path.join(pipeline_dir, "stage_02_preprocessing.py"), os.path.join(components_dir, "preprocessing.py"),
+                       os.path.join(components_dir, "transform.py"), os.path.join(utils_dir, "svmlight.py"),
+                       os.path.join(utils_dir, "artifact_io.py")],
+              config_sections=[('config', 'data_preprocessing')],
+              deps=[raw_data],
+              outs=[preprocessed_data, transform]),
+        Stage(BASE_MODEL_PREPARATION_STAGE_NAME, run_base_model_preparation,
+              sources=[os.path.join(pipeline_dir, "stage_03_prepare_base_model.py"), os.path.join(components_dir, "prepare_base_model.py")],
+              config_sections=[('config', 'prepare_base_model')],
+              outs=[base_model]),
+        Stage(TRAIN_MODEL_STAGE_NAME, run_model_training,
+              sources=[os.path.join(pipeline_dir, "stage_04_train_model.py"), os.path.join(components_dir, "train_model.py"),
+                       os.path.join(utils_dir, "artifact_io.py")],
+              config_sections=[('config', 'prepare_base_model'), ('params', 'model_training')],
+              deps=[preprocessed_data, base_model],
+              outs=[final_model, history]),
+        Stage(EVALUATE_MODEL_STAGE_NAME, run_model_evaluation,
+              sources=[os.path.join(pipeline_dir, "stage_05_evaluate_model.py"), os.path.join(components_dir, "evaluate_model.py"),
+                       os.path.join(utils_dir, "artifact_io.py")],
+              config_sections=[('config', 'prepare_base_model')],
+              deps=[preprocessed_data, final_model]),
+        Stage(EXPORT_MODEL_STAGE_NAME, run_model_export,
+              sources=[os.path.join(pipeline_dir, "stage_08_export_model.py"), os.path.join(components_dir, "export_model.py"),
+                       os.path.join(utils_dir, "numpy_model.py"), os.path.join(utils_dir, "artifact_io.py")],
+              config_sections=[('config', 'export_model')],
+              deps=[preprocessed_data, final_model],
+              outs=[exported_model]),
+    ]
+    if quantize_config.get('enabled', False):
+        stages.append(
+            Stage(QUANTIZE_MODEL_STAGE_NAME, run_model_quantization,
+                  sources=[os.path.join(pipeline_dir, "stage_09_quantize_model.py"), os.path.join(components_dir, "quantize_model.py"),
+                           os.path.join(utils_dir, "numpy_model.py"), os.path.join(utils_dir, "artifact_io.py")],
+                  config_sections=[('config', 'quantize_model')],
+                  deps=[preprocessed_data, exported_model],
+                  outs=[quantize_config.get('output_path', 'artifacts/training/gas_classification_model_int8.npz')]))
+    return stages
+
+def select_stages(stages: list, keys: list) -> list:
+    """
+    Keep only the requested stages, in pipeline order.
+
+    :param stages: Ordered stage definitions from get_stages.
+    :param keys: Short stage names (keys of STAGE_KEYS).
+    :return: The selected stages.
+    """
+    unknown = [key for key in keys if key not in STAGE_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown stages {unknown}. Expected some of: {', '.join(STAGE_KEYS)}")
+    names = {STAGE_KEYS[key] for key in keys}
+    selected = [stage for stage in stages if stage.name in names]
+    missing = names - {stage.name for stage in selected}
+    if missing:
+        raise ValueError(f"Stages {sorted(missing)} are disabled in the configuration.")
+    return selected
+
+def parse_stage_keys(value: str) -> list:
+    """
+    argparse type for --stages: a comma-separated list of STAGE_KEYS.
+    """
+    keys = [key.strip() for key in value.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in STAGE_KEYS]
+    if not keys or unknown:
+        raise argparse.ArgumentTypeError(f"expected a comma-separated list of: {', '.join(STAGE_KEYS)}")
+    return keys
+
+def main(force: bool = False, stages: list = None):
     """
     Main function to run all stages of the pipeline.
+
+    Stages whose config sections, source files and inputs are unchanged since
+    their last successful run, and whose outputs are still intact, are skipped.
+
+    :param force: Run every stage even if it is up to date.
+    :param stages: Short names of the stages to run (see STAGE_KEYS); all stages if None.
     """
     try:
-        run_data_ingestion()
-        run_data_preprocessing()
-        run_base_model_preparation()  # Run the base model preparation stage
-        run_model_training()  # Run the model training stage
-        run_model_evaluation()  # Run the model evaluation stage
+        config = Configuration()
+        cache = StageCache(STAGE_CACHE_FILE, config.config, config.params)
+        selected = get_stages(config)
+        if stages:
+            selected = select_stages(selected, stages)
+        run_stages(selected, cache, force=force)
 
     except Exception as e:
         logging.error(f"Pipeline failed with error: {e}")
@@ -98,4 +246,9 @@ def main():
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the gas sensor pipeline.")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if it is up to date")
+    parser.add_argument("--stages", type=parse_stage_keys, default=None,
+                        help=f"Comma-separated stages to run, from: {', '.join(STAGE_KEYS)} (default: all)")
+    args = parser.parse_args()
+    main(force=args.force, stages=args.stages)
@@ -1,23 +1,52 @@
-import os
-import gdown
 import zipfile
 import logging
 from sensor.utils.common import create_directories
+from sensor.utils.download_manager import DownloadManager, sha256_file
 from sensor.entity.config_entity import DataIngestionConfig
+from sensor.utils.instrumentation import instrumented
 
 class DataIngestion:
     def __init__(self, data_ingestion_config: DataIngestionConfig):
         self.data_ingestion_config = data_ingestion_config
+        self.sha256 = None  # Checksum of the downloaded archive, set by download_data
 
+    @instrumented()
     def download_data(self):
         """
         Downloads the data from the source URL and saves it locally.
+
+        The archive goes through a checksum-keyed cache, so unchanged data is
+        not downloaded again; large files are fetched in parallel ranges and
+        interrupted downloads resume.
+        """
+        config = self.data_ingestion_config
+        create_directories([config.root_dir])
+        logging.info(f"Downloading dataset from {config.source_URL}")
+        manager = DownloadManager(
+            cache_dir=config.cache_dir,
+            num_workers=config.download_workers,
+            chunk_size=config.download_chunk_size,
+            max_retries=config.download_retries,
+            max_age=config.cache_max_age,
+            max_cache_bytes=config.cache_max_bytes,
+        )
+        self.sha256 = manager.download(config.source_URL, config.local_data_file, expected_sha256=config.sha256)
+        logging.info(f"Dataset downloaded and saved at {config.local_data_file}")
+
+    @instrumented()
+    def verify_data(self):
+        """
+        Checks the local archive against the configured SHA-256, if any.
         """
-        create_directories([self.data_ingestion_config.root_dir])
-        logging.info(f"Downloading dataset from {self.data_ingestion_config.source_URL}")
-        gdown.download(self.data_ingestion_config.source_URL, self.data_ingestion_config.local_data_file, quiet=False)
-        logging.info(f"Dataset downloaded and saved at {self.data_ingestion_config.local_data_file}")
+        expected = self.data_ingestion_config.sha256
+        if not expected:
+            return
+        actual = sha256_file(self.data_ingestion_config.local_data_file)
+        if actual != expected.lower():
+            raise ValueError(f"Checksum mismatch for {self.data_ingestion_config.local_data_file}: expected {expected}, got {actual}")
+        logging.info("Dataset checksum verified.")
 
+    @instrumented()
     def extract_data(self):
         """
         Extracts the downloaded zip file to the specified directory.
@@ -29,7 +58,11 @@ class DataIngestion:
 
     def initiate_data_ingestion(self):
         """
-        Initiates the complete data ingestion process: downloading and extraction.
+        Initiates the complete data ingestion process: downloading, verification and,
+        if configured, extraction. Without extraction, preprocessing reads the
+        batch files straight from the zip.
         """
         self.download_data()
-        self.extract_data()
+        self.verify_data()
+        if self.data_ingestion_config.extract:
+            self.extract_data()
@@ -1,11 +1,13 @@
 import os
 import logging
+import numpy as np
 import pandas as pd
-import mlflow
 from sensor.config.configuration import Configuration
 from sensor.entity.config_entity import ModelConfig
-from tensorflow.keras.models import load_model
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.model_outputs import LABEL_OFFSET, split_outputs
+from sensor.components.preprocessing import CONCENTRATION_COLUMN
+from sensor.utils.instrumentation import instrument_step, instrumented
 
 
 class EvaluateModel:
@@ -22,6 +24,7 @@ class EvaluateModel:
         self.model_path = model_path  # Path to the saved model
         self.model = None
 
+    @instrumented()
     def load_model(self):
         """
         Loads the trained model from the specified path.
@@ -30,6 +33,7 @@ class EvaluateModel:
             if not os.path.exists(self.model_path):
                 raise FileNotFoundError(f"Model file not found at {self.model_path}")
 
+            from tensorflow.keras.models import load_model
             self.model = load_model(self.model_path)
             logging.info("Model loaded successfully for evaluation.")
 
@@ -37,25 +41,54 @@ class EvaluateModel:
             logging.error(f"Error loading model: {e}")
             raise
 
+    def features(self) -> np.ndarray:
+        """
+        Feature matrix of the evaluation data.
+
+        :return: float32 array of shape (n_rows, num_features).
+        """
+        return self.data[[col for col in self.data.columns if 'feature' in col]].to_numpy(dtype=np.float32)
+
+    def labels(self) -> np.ndarray:
+        """
+        True class indices of the evaluation data, in the model's 0-based output order.
+
+        :return: int32 array of shape (n_rows,).
+        """
+        return self.data['target'].to_numpy(dtype=np.int32) - LABEL_OFFSET
+
+    def accuracy(self, outputs) -> float:
+        """
+        Classification accuracy of model outputs on the evaluation data.
+
+        :param outputs: Model outputs for features(): class probabilities, or a dict for a two-output model.
+        :return: Accuracy.
+        """
+        from sklearn.metrics import accuracy_score
+        probabilities, _ = split_outputs(outputs)
+        return accuracy_score(self.labels(), probabilities.argmax(axis=1))
+
     def evaluate(self):
         """
         Evaluates the model using the preprocessed data and logs metrics to MLflow.
         """
+        # MLflow, TensorFlow and scikit-learn are only needed once an evaluation runs
+        import mlflow
+        from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
         try:
             # Load the model
             self.load_model()
 
             # Separate features and target from the test data
-            X_test = self.data.drop('target', axis=1)
-            y_test = self.data['target']
-            y_encoded_test = pd.get_dummies(y_test)
+            X_test = self.data[[col for col in self.data.columns if 'feature' in col]]
 
             # Make predictions
-            y_pred = self.model.predict(X_test)
+            with instrument_step('predict', rows=len(X_test)):
+                y_pred, concentration_pred = split_outputs(self.model.predict(X_test))
 
-            # Get the predicted classes (assuming one-hot encoded target)
+            # Compare class indices; a one-hot encoding of the target would shift them when a class is absent
             y_pred_classes = y_pred.argmax(axis=1)
-            y_test_classes = y_encoded_test.values.argmax(axis=1)
+            y_test_classes = self.labels()
 
             # Calculate evaluation metrics
             accuracy = accuracy_score(y_test_classes, y_pred_classes)
@@ -67,6 +100,10 @@ class EvaluateModel:
 
             mlflow.log_param("model_name", os.path.basename(self.model_path))
             mlflow.log_metric("accuracy", accuracy)
+            if concentration_pred is not None and CONCENTRATION_COLUMN in self.data.columns:
+                error = concentration_pred - self.data[CONCENTRATION_COLUMN].to_numpy(dtype=np.float64)
+                mlflow.log_metric("concentration_mae", float(np.mean(np.abs(error))))
+                mlflow.log_metric("concentration_rmse", float(np.sqrt(np.mean(error ** 2))))
 
             # Log confusion matrix and classification report to MLflow as artifacts
             mlflow.log_text(str(conf_matrix), "confusion_matrix.txt")
@@ -100,8 +137,8 @@ def evaluate_model():
         model_config = ModelConfig.from_dict(model_config_dict)
 
         # Load preprocessed data for evaluation
-        preprocessed_data_path = os.path.join("artifacts/preprocessed", "preprocessed_data.csv")
-        data = pd.read_csv(preprocessed_data_path)
+        preprocessed_data_path = config.get_training_data_path()
+        data = load_artifact(preprocessed_data_path, config.get_artifact_format())
 
         # Define the path to the saved model (adjust if necessary)
         model_path = os.path.join("artifacts/training", "gas_classification_model_final.keras")
@@ -0,0 +1,133 @@
+import logging
+import numpy as np
+import tensorflow as tf
+from sensor.config.configuration import Configuration
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.numpy_model import ACTIVATIONS, NumpyModel
+from sensor.utils.instrumentation import instrumented
+
+
+def _history_layer(tensor_config) -> str:
+    """
+    Name of the layer that produced a serialized tensor (['layer', node, index] or a __keras_tensor__ dict).
+    """
+    if isinstance(tensor_config, dict):
+        tensor_config = tensor_config['config']['keras_history']
+    return tensor_config[0]
+
+
+class ExportModel:
+    def __init__(self, export_config: dict):
+        """
+        Export the trained Keras model to NumPy weight arrays plus a JSON
+        layer graph, which sensor.utils.numpy_model.NumpyModel runs without
+        TensorFlow.
+
+        :param export_config: Dictionary with model_path, output_path, tolerance,
+            mixed_precision_tolerance and verify_rows.
+        """
+        self.config = export_config
+        self.model_path = export_config.get('model_path', 'artifacts/training/gas_classification_model_final.keras')
+        self.output_path = export_config.get('output_path', 'artifacts/training/gas_classification_model_final.npz')
+
+    @instrumented()
+    def export(self, model: tf.keras.Model) -> str:
+        """
+        Write the model's layer graph and weights to a single .npz file.
+
+        Supports the layers used by PrepareBaseModel: Dense (relu, softmax or
+        linear), Dropout and Rescaling.
+
+        :param model: Trained Keras functional model.
+        :return: Path to the exported file.
+        """
+        try:
+            config = model.get_config()
+            input_layers = config['input_layers']
+            inputs = input_layers[0][0] if isinstance(input_layers[0], list) else input_layers[0]
+            output_layers = config['output_layers']
+            if isinstance(output_layers, dict):
+                outputs = {name: _history_layer(tensor) for name, tensor in output_layers.items()}
+            else:
+                outputs = {model.output_names[0]: _history_layer(output_layers)}
+
+            layers, weights = [], {}
+            for layer_config in config['layers']:
+                kind, name = layer_config['class_name'], layer_config['name']
+                if kind == 'InputLayer':
+                    continue
+                if len(layer_config['inbound_nodes']) != 1 or len(layer_config['inbound_nodes'][0]['args']) != 1:
+                    raise ValueError(f"Layer {name} is not a single-input layer and cannot be exported.")
+
+                spec = {'name': name, 'type': kind, 'input': _history_layer(layer_config['inbound_nodes'][0]['args'][0])}
+                layer = model.get_layer(name)
+                if kind == 'Dense':
+                    activation = layer.activation.__name__
+                    if activation not in ACTIVATIONS:
+                        raise ValueError(f"Activation '{activation}' of layer {name} is not supported by the NumPy runtime.")
+                    kernel, bias = layer.get_weights()
+                    spec.update(activation=activation, kernel=f"{name}/kernel", bias=f"{name}/bias")
+                    weights[spec['kernel']] = kernel.astype(np.float32)
+                    weights[spec['bias']] = bias.astype(np.float32)
+                elif kind == 'Rescaling':
+                    spec.update(scale=float(layer.scale), offset=float(layer.offset))
+                layers.append(spec)
+
+            NumpyModel(layers, inputs, outputs, model.input_shape, weights).save(self.output_path)
+            logging.info(f"Exported {len(layers)} layers to {self.output_path}")
+            return self.output_path
+        except Exception as e:
+            logging.error(f"Error exporting the model: {e}")
+            raise
+
+    @instrumented()
+    def verify(self, model: tf.keras.Model, features: np.ndarray) -> float:
+        """
+        Check that the exported model reproduces the Keras predictions.
+
+        Differences are measured relative to each output's largest magnitude,
+        so the rescaled concentration head is held to the same standard as
+        the class probabilities. The runtime always computes in float32, so
+        a mixed-precision model is checked against the looser
+        mixed_precision_tolerance.
+
+        :param model: Keras model that was exported.
+        :param features: float32 feature rows to compare on.
+        :return: Largest relative difference over all outputs.
+        """
+        mixed = any(layer.compute_dtype != 'float32' for layer in model.layers)
+        tolerance = self.config.get('mixed_precision_tolerance', 2e-2) if mixed else self.config.get('tolerance', 1e-4)
+        expected = model(features, training=False)
+        actual = NumpyModel.load(self.output_path).predict(features)
+        if not isinstance(expected, dict):
+            expected, actual = {'output': expected}, {'output': actual}
+
+        max_diff = 0.0
+        for name, values in expected.items():
+            values = np.asarray(values, dtype=np.float32)
+            diff = float(np.max(np.abs(values - actual[name])) / max(1.0, float(np.max(np.abs(values)))))
+            max_diff = max(max_diff, diff)
+            if diff > tolerance:
+                raise ValueError(f"Exported output '{name}' differs from Keras by {diff:.2e}, beyond tolerance {tolerance}.")
+        logging.info(f"Exported model matches Keras on {len(features)} rows (max relative diff {max_diff:.2e}).")
+        return max_diff
+
+
+def export_model():
+    """
+    Export the trained model for TensorFlow-free serving and verify it on preprocessed rows.
+    """
+    try:
+        config = Configuration()
+        export_config = config.get_export_model_config()
+        exporter = ExportModel(export_config)
+
+        model = tf.keras.models.load_model(exporter.model_path)
+        exporter.export(model)
+
+        data = load_artifact(config.get_training_data_path(), config.get_artifact_format())
+        rows = data[[col for col in data.columns if 'feature' in col]].to_numpy(dtype=np.float32)
+        exporter.verify(model, rows[:export_config.get('verify_rows', 1024)])
+    except Exception as e:
+        logging.error(f"An error occurred in the export_model function: {e}")
+        raise
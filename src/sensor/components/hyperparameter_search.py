@@ -0,0 +1,377 @@
+import os
+import time
+import logging
+import dataclasses
+import multiprocessing
+import yaml
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sensor.config.configuration import Configuration
+from sensor.entity.config_entity import ModelConfig
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.common import update_yaml_section, worker_thread_environment
+from sensor.utils.instrumentation import instrumented
+
+# Searchable keys that belong to prepare_base_model; every other key is a model_training parameter
+MODEL_KEYS = {field.name for field in dataclasses.fields(ModelConfig)}
+
+# Per-process state set by _init_worker, so each trial only ships its parameters
+_worker_state = {}
+
+
+def sample_params(search_space: dict, rng: np.random.Generator) -> dict:
+    """
+    Draw one set of hyperparameters from the search space.
+
+    A list is a choice between its items, a dict with low/high is a uniform
+    range (log-uniform with log: true, integers with int: true) and any
+    other value is fixed.
+
+    :param search_space: Parameter name -> list, range dict or fixed value.
+    :param rng: Random generator.
+    :return: Parameter name -> sampled value.
+    """
+    params = {}
+    for name, space in search_space.items():
+        if isinstance(space, list):
+            value = space[rng.integers(len(space))]
+        elif isinstance(space, dict):
+            low, high = float(space['low']), float(space['high'])
+            if space.get('log', False):
+                value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+            else:
+                value = float(rng.uniform(low, high))
+            if space.get('int', False):
+                value = int(round(value))
+        else:
+            value = space
+        params[name] = value
+    return params
+
+
+def _to_yaml_value(value):
+    # Table cells come back as NumPy scalars, which yaml.safe_dump cannot write
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_yaml_value(item) for item in value]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class TrialPruner:
+    """
+    Decides to stop a trial whose validation metric is below a percentile
+    of the other trials' values at the same epoch.
+
+    Every trial publishes its epoch history to a dict shared by the worker
+    processes, so a trial is compared with trials running next to it as
+    well as finished ones. _run_trial calls on_epoch_end from a Keras
+    LambdaCallback, which keeps this module free of TensorFlow imports.
+    """
+    def __init__(self, trial: int, histories, monitor: str, warmup_epochs: int = 3,
+                 min_trials: int = 3, percentile: float = 50):
+        self.trial = trial
+        self.histories = histories
+        self.monitor = monitor
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+        self.percentile = percentile
+        self.history = []
+        self.pruned = False
+
+    def on_epoch_end(self, epoch, logs=None) -> bool:
+        """
+        Record the epoch's metric and decide whether to prune.
+
+        :return: True when the trial should stop.
+        """
+        value = (logs or {}).get(self.monitor)
+        if value is None:
+            return False
+        self.history.append(float(value))
+        self.histories[self.trial] = self.history  # Reassign: the shared dict does not see in-place changes
+        if epoch + 1 < self.warmup_epochs:
+            return False
+
+        peers = [history[epoch] for trial, history in dict(self.histories).items()
+                 if trial != self.trial and len(history) > epoch]
+        if len(peers) >= self.min_trials and value < np.percentile(peers, self.percentile):
+            logging.info(f"Pruning trial {self.trial} at epoch {epoch + 1}: {self.monitor} {value:.4f} "
+                         f"below the {self.percentile}th percentile of {len(peers)} trials")
+            self.pruned = True
+        return self.pruned
+
+
+def _init_worker(model_config, search_config, X_train, y_train, X_val, y_val, threads,
+                 histories, tracking_uri, experiment_id, parent_run_id):
+    """
+    Initialize a trial worker: bound its TensorFlow threads, keep the data in memory
+    and point MLflow at the search's file store.
+    """
+    import mlflow
+    from sensor.components.train_model import limit_cpu_threads
+    limit_cpu_threads(threads)
+    mlflow.set_tracking_uri(tracking_uri)
+    _worker_state.update(model_config=model_config, config=search_config, X_train=X_train, y_train=y_train,
+                         X_val=X_val, y_val=y_val, histories=histories, experiment_id=experiment_id,
+                         parent_run_id=parent_run_id)
+
+
+def _run_trial(trial: int, params: dict) -> dict:
+    """
+    Train and score one hyperparameter set, logging it as an MLflow run
+    under the search's parent run.
+
+    Defined at module level so it can be shipped to worker processes.
+
+    :param trial: Trial number.
+    :param params: Sampled hyperparameters.
+    :return: Dictionary with the trial's parameters, best validation metric, epochs, state and time.
+    """
+    import mlflow
+    import tensorflow as tf
+    from sensor.components.prepare_base_model import PrepareBaseModel
+    from sensor.components.train_model import make_dataset
+    state = _worker_state
+    config = state['config']
+    pruning = config.get('pruning', {})
+    model_params = {name: value for name, value in params.items() if name in MODEL_KEYS}
+    if 'hidden_units' in model_params:
+        model_params['hidden_units'] = tuple(model_params['hidden_units'])
+    model_config = dataclasses.replace(state['model_config'], **model_params)
+    monitor = f"val_{model_config.classification_metric}"
+
+    start = time.perf_counter()
+    mlflow.start_run(experiment_id=state['experiment_id'], run_name=f"trial_{trial:03d}",
+                     tags={'mlflow.parentRunId': state['parent_run_id']})
+    try:
+        mlflow.log_params(params)
+        tf.keras.utils.set_random_seed(config.get('seed', 42) + trial)
+        # The search scores gas identity only, so trials train the classification head alone
+        model = PrepareBaseModel(model_config).build_gas_classification_model(
+            state['X_train'].shape[1:], concentration_output=False)
+
+        batch_size = int(params.get('batch_size', config.get('batch_size', 32)))
+        pruner = TrialPruner(trial, state['histories'], monitor,
+                             warmup_epochs=pruning.get('warmup_epochs', 3),
+                             min_trials=pruning.get('min_trials', 3),
+                             percentile=pruning.get('percentile', 50))
+
+        def prune(epoch, logs):
+            if pruner.on_epoch_end(epoch, logs):
+                model.stop_training = True
+
+        history = model.fit(
+            make_dataset(state['X_train'], state['y_train'], batch_size, shuffle=True),
+            validation_data=make_dataset(state['X_val'], state['y_val'], 1024),
+            epochs=int(params.get('epochs', config.get('epochs', 30))),
+            callbacks=[tf.keras.callbacks.EarlyStopping(patience=config.get('early_stopping_patience', 5)),
+                       tf.keras.callbacks.LambdaCallback(on_epoch_end=prune)],
+            verbose=0
+        ).history
+
+        for name, values in history.items():
+            for epoch, value in enumerate(values):
+                mlflow.log_metric(name, float(value), step=epoch)
+        result = {
+            'trial': trial,
+            **params,
+            monitor: float(np.max(history[monitor])),
+            'epochs': len(history[monitor]),
+            'state': 'pruned' if pruner.pruned else 'complete',
+            'seconds': time.perf_counter() - start,
+        }
+        mlflow.log_metric(f"best_{monitor}", result[monitor])
+        mlflow.set_tag('state', result['state'])
+        mlflow.end_run()
+        return result
+    except Exception as e:
+        mlflow.end_run(status='FAILED')
+        logging.error(f"Trial {trial} failed: {e}")
+        return {'trial': trial, **params, 'state': 'failed', 'error': str(e), 'seconds': time.perf_counter() - start}
+
+
+class HyperparameterSearch:
+    def __init__(self, model_config: ModelConfig, search_config: dict, training_config: dict,
+                 data: pd.DataFrame, target_column: str = 'target'):
+        """
+        Random search over the base model architecture and training
+        parameters, with trials run in parallel worker processes.
+
+        :param model_config: Base model configuration; searched keys override it per trial.
+        :param search_config: Dictionary of hyperparameter search parameters, including search_space.
+        :param training_config: Dictionary of training parameters, used for the train/test split.
+        :param data: Preprocessed data.
+        :param target_column: Target column for prediction.
+        """
+        self.model_config = dataclasses.replace(model_config, concentration_output=False)
+        self.search_config = search_config
+        self.training_config = training_config
+        self.data = data
+        self.target_column = target_column
+        self.monitor = f"val_{model_config.classification_metric}"
+
+    def sample_trials(self) -> list:
+        """
+        Draw the parameters of every trial.
+
+        :return: List of parameter dicts, one per trial.
+        """
+        search_space = self.search_config.get('search_space', {})
+        if not search_space:
+            raise ValueError("hyperparameter_search.search_space is empty.")
+        rng = np.random.default_rng(self.search_config.get('seed', 42))
+        return [sample_params(search_space, rng) for _ in range(self.search_config.get('n_trials', 16))]
+
+    @instrumented()
+    def run(self) -> pd.DataFrame:
+        """
+        Run all trials and log them to the local MLflow file store.
+
+        :return: Table with one row per trial.
+        """
+        import mlflow
+        from sensor.components.train_model import TrainModel
+        try:
+            # Same train/test split as TrainModel; trials are scored on the tail of the training rows
+            X_train, _, y_train, _ = TrainModel(self.model_config, self.training_config, self.data,
+                                                self.target_column).load_data()
+            split = int(len(X_train) * (1 - self.search_config.get('validation_split', 0.2)))
+            trials = self.sample_trials()
+
+            threads = max(1, self.search_config.get('threads_per_worker') or 1)
+            n_jobs = self.search_config.get('n_jobs') or max(1, (os.cpu_count() or 1) // threads)
+            n_jobs = min(n_jobs, len(trials))
+            logging.info(f"Hyperparameter search: {len(trials)} trials on {n_jobs} workers x {threads} threads.")
+
+            tracking_uri = self.tracking_uri()
+            mlflow.set_tracking_uri(tracking_uri)
+            experiment = mlflow.set_experiment(self.search_config.get('experiment_name', 'gas_sensor_hyperparameter_search'))
+            parent_run = mlflow.start_run(run_name="GasSensor_Hyperparameter_Search")
+            try:
+                mlflow.log_params({key: value for key, value in self.search_config.items()
+                                   if key not in ('search_space', 'pruning')})
+                mlflow.log_dict(self.search_config.get('search_space', {}), 'search_space.yaml')
+
+                context = multiprocessing.get_context('spawn')
+                results = []
+                # Spawn rather than fork: forking a process that has initialized TensorFlow is unsafe
+                with worker_thread_environment(threads), context.Manager() as manager, ProcessPoolExecutor(
+                    max_workers=n_jobs,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.model_config, self.search_config, X_train[:split], y_train[:split],
+                              X_train[split:], y_train[split:], threads, manager.dict(), tracking_uri,
+                              experiment.experiment_id, parent_run.info.run_id)
+                ) as executor:
+                    futures = [executor.submit(_run_trial, trial, params) for trial, params in enumerate(trials)]
+                    for future in as_completed(futures):
+                        result = future.result()
+                        results.append(result)
+                        logging.info(f"Trial {result['trial']} {result['state']}: "
+                                     f"{self.monitor} {result.get(self.monitor, float('nan')):.4f} "
+                                     f"after {result.get('epochs', 0)} epochs ({result['seconds']:.1f}s)")
+
+                table = pd.DataFrame(results).sort_values('trial').reset_index(drop=True)
+                mlflow.log_text(table.to_csv(index=False), 'trials.csv')
+                best = self.best_trial(table)
+                mlflow.log_metric(f"best_{self.monitor}", best[self.monitor])
+                mlflow.log_param('best_trial', best['trial'])
+                mlflow.end_run()
+            except Exception:
+                mlflow.end_run(status='FAILED')
+                raise
+
+            logging.info(f"Hyperparameter search results:\n{table.to_string(index=False)}")
+            return table
+        except Exception as e:
+            logging.error(f"Error during hyperparameter search: {e}")
+            raise
+
+    def tracking_uri(self) -> str:
+        """
+        MLflow tracking URI for the search: tracking_uri if set, otherwise a
+        local file store in tracking_dir.
+
+        Parallel trials write to the store at the same time, which a file
+        store handles without locking. Recent MLflow versions only open a
+        file store with MLFLOW_ALLOW_FILE_STORE set, so it is set here; the
+        spawned workers inherit it.
+
+        :return: Tracking URI.
+        """
+        if self.search_config.get('tracking_uri'):
+            return self.search_config['tracking_uri']
+        os.environ.setdefault('MLFLOW_ALLOW_FILE_STORE', 'true')
+        return 'file:' + os.path.abspath(self.search_config.get('tracking_dir', 'mlruns'))
+
+    def best_trial(self, table: pd.DataFrame) -> pd.Series:
+        """
+        Pick the trial with the best validation metric, preferring trials that ran to completion.
+
+        :param table: Table returned by run().
+        :return: Row of the best trial.
+        """
+        scored = table[table['state'] != 'failed'] if 'state' in table else table
+        if scored.empty:
+            raise ValueError("Every hyperparameter search trial failed.")
+        complete = scored[scored['state'] == 'complete']
+        candidates = complete if not complete.empty else scored
+        return candidates.loc[candidates[self.monitor].idxmax()]
+
+    @instrumented()
+    def save_best(self, table: pd.DataFrame, config_file_path: str = None, param_file_path: str = None) -> dict:
+        """
+        Write the best trial's hyperparameters to output_file.
+
+        The checked-in config files are only rewritten with apply_best, which
+        is off by default: the search is a DVC stage, and a stage editing the
+        config and params files other stages depend on would invalidate them
+        behind DVC's back. Copy the values over by hand, or opt in.
+
+        :param table: Table returned by run().
+        :param config_file_path: config.yaml to update.
+        :param param_file_path: param.yaml to update.
+        :return: Dictionary of the best values per section.
+        """
+        try:
+            best = self.best_trial(table)
+            names = self.search_config.get('search_space', {}).keys()
+            values = {name: _to_yaml_value(best[name]) for name in names}
+            sections = {
+                'prepare_base_model': {name: value for name, value in values.items() if name in MODEL_KEYS},
+                'model_training': {name: value for name, value in values.items() if name not in MODEL_KEYS},
+            }
+
+            output_file = self.search_config.get('output_file', 'artifacts/training/best_hyperparameters.yaml')
+            os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+            with open(output_file, 'w') as f:
+                yaml.safe_dump({'trial': int(best['trial']), self.monitor: float(best[self.monitor]), **sections},
+                               f, default_flow_style=None, sort_keys=False)
+            logging.info(f"Best hyperparameters (trial {best['trial']}) saved at: {output_file}")
+
+            if self.search_config.get('apply_best', False):
+                files = {'prepare_base_model': config_file_path, 'model_training': param_file_path}
+                for section, section_values in sections.items():
+                    if section_values and files[section]:
+                        update_yaml_section(files[section], section, section_values)
+            return sections
+        except Exception as e:
+            logging.error(f"Error saving the best hyperparameters: {e}")
+            raise
+
+
+def hyperparameter_search():
+    """
+    Run the hyperparameter search using the configurations and data, and export the best configuration.
+    """
+    try:
+        config = Configuration()
+        model_config = ModelConfig.from_dict(config.get_model_config())
+        data = load_artifact(config.get_training_data_path(), config.get_artifact_format())
+
+        search = HyperparameterSearch(model_config, config.get_hyperparameter_search_params(),
+                                      config.get_training_params(), data)
+        return search.save_best(search.run(), config.config_file_path, config.param_file_path)
+    except Exception as e:
+        logging.error(f"An error occurred in the hyperparameter_search function: {e}")
+        raise
@@ -0,0 +1,221 @@
+import os
+import re
+import glob
+import json
+import logging
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sensor.config.configuration import Configuration
+from sensor.entity.config_entity import DataPreprocessingConfig, ModelConfig
+from sensor.components.preprocessing import Preprocessing, BATCH_COLUMN, CONCENTRATION_COLUMN, _batch_number
+from sensor.components.prepare_base_model import PrepareBaseModel
+from sensor.utils.model_outputs import CLASSIFICATION_OUTPUT, CONCENTRATION_OUTPUT, has_concentration_output, split_outputs
+from sensor.components.train_model import LABEL_OFFSET, make_dataset
+from sensor.components.transform import PreprocessingTransform
+from sensor.utils.artifact_io import get_artifact_path, load_artifact, save_artifact
+from sensor.utils.instrumentation import instrumented
+
+
+def sample_replay_buffer(data: pd.DataFrame, size: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Sample at most size rows with every batch equally represented.
+
+    Each batch gets an equal share of the buffer; batches smaller than their
+    share keep all their rows and the remainder is spread over the others.
+
+    :param data: Preprocessed rows including the batch id column.
+    :param size: Maximum number of rows in the buffer.
+    :param seed: Sampling seed.
+    :return: Sampled rows.
+    """
+    counts = data[BATCH_COLUMN].value_counts().sort_values()
+    quota, remaining = {}, size
+    for i, (batch, count) in enumerate(counts.items()):
+        quota[batch] = min(count, remaining // (len(counts) - i))
+        remaining -= quota[batch]
+
+    batch_ids = data[BATCH_COLUMN].to_numpy()
+    return pd.concat(
+        [data[batch_ids == batch].sample(n=n, random_state=seed) for batch, n in quota.items()],
+        ignore_index=True
+    )
+
+
+class IncrementalUpdate:
+    def __init__(self, update_config: dict, model_config: ModelConfig, preprocessing_config: DataPreprocessingConfig,
+                 model_path: str, transform_path: str, history_path: str, artifact_format: str):
+        """
+        Fine-tune the trained model on a newly arrived batch file mixed with a
+        bounded replay buffer of earlier batches, so the cost of an update
+        depends on the new data and the buffer size, not on the full history.
+
+        :param update_config: Dictionary of incremental update parameters.
+        :param model_config: Model configuration (optimizer, loss and metric).
+        :param preprocessing_config: Preprocessing configuration (for parsing the new file).
+        :param model_path: Path to the trained model, used as the base of the first version.
+        :param transform_path: Path to the saved preprocessing transform.
+        :param history_path: Preprocessed training artifact, used to seed the replay buffer.
+        :param artifact_format: Artifact format of the training data and replay buffer.
+        """
+        self.config = update_config
+        self.model_config = model_config
+        self.preprocessing_config = preprocessing_config
+        self.model_path = model_path
+        self.transform_path = transform_path
+        self.history_path = history_path
+        self.artifact_format = artifact_format
+        self.versions_dir = update_config.get('versions_dir', 'artifacts/training/versions')
+        self.replay_buffer_path = get_artifact_path(
+            self.versions_dir, update_config.get('replay_buffer_file', 'replay_buffer'), artifact_format
+        )
+
+    @instrumented()
+    def load_new_batch(self, batch_file: str, transform: PreprocessingTransform) -> pd.DataFrame:
+        """
+        Parse only the new batch file and apply the saved transform (no refit).
+
+        :param batch_file: Path to the new batch*.dat file.
+        :param transform: Fitted preprocessing transform.
+        :return: Preprocessed rows of the new batch.
+        """
+        raw = Preprocessing(self.preprocessing_config)._load_single_file(batch_file)
+        return transform.transform_frame(raw)
+
+    @instrumented()
+    def load_replay_buffer(self) -> pd.DataFrame:
+        """
+        Load the replay buffer, seeding it from the training artifact on first use.
+
+        :return: Replay buffer rows.
+        """
+        if os.path.exists(self.replay_buffer_path):
+            return load_artifact(self.replay_buffer_path, self.artifact_format, memory_map=False)
+
+        logging.info(f"No replay buffer at {self.replay_buffer_path}; seeding it from {self.history_path}")
+        history = load_artifact(self.history_path, self.artifact_format, memory_map=False)
+        return sample_replay_buffer(history, self.config.get('replay_buffer_size', 5000))
+
+    def _latest_version(self) -> int:
+        versions = [
+            int(match.group(1))
+            for path in glob.glob(os.path.join(self.versions_dir, 'gas_classification_model_v*.keras'))
+            if (match := re.search(r'_v(\d+)\.keras$', path))
+        ]
+        return max(versions, default=0)
+
+    def _version_path(self, version: int) -> str:
+        return os.path.join(self.versions_dir, f"gas_classification_model_v{version}.keras")
+
+    @staticmethod
+    def _accuracy(model, data: pd.DataFrame, feature_columns: list) -> float:
+        X = data[feature_columns].to_numpy(dtype=np.float32)
+        y = data['target'].to_numpy(dtype=np.int32) - LABEL_OFFSET
+        probabilities, _ = split_outputs(model.predict(make_dataset(X, y, 1024), verbose=0))
+        return float(np.mean(probabilities.argmax(axis=1) == y))
+
+    @instrumented()
+    def update(self, batch_file: str) -> str:
+        """
+        Fine-tune on the new batch plus replay samples and save the result as a new model version.
+
+        :param batch_file: Path to the new batch*.dat file.
+        :return: Path to the new model version.
+        """
+        try:
+            transform = PreprocessingTransform.load(self.transform_path)
+            feature_columns = transform.feature_columns
+            new_rows = self.load_new_batch(batch_file, transform)
+            replay = self.load_replay_buffer()
+
+            # Mix the new batch with replay_ratio replay rows per new row
+            replay_rows = min(len(replay), int(len(new_rows) * self.config.get('replay_ratio', 1.0)))
+            replay_sample = sample_replay_buffer(replay, replay_rows)
+            mixed = pd.concat([new_rows, replay_sample[new_rows.columns]], ignore_index=True)
+            logging.info(f"Fine-tuning on {len(new_rows)} new rows from {batch_file} and {len(replay_sample)} replay rows.")
+
+            # Each update continues from the latest version; the first one from the trained model
+            latest = self._latest_version()
+            base_model_path = self._version_path(latest) if latest else self.model_path
+            model = tf.keras.models.load_model(base_model_path)
+            accuracy_before = self._accuracy(model, new_rows, feature_columns)
+
+            # Fresh optimizer at the fine-tuning learning rate, and the configured
+            # (sparse) loss, which the saved model may predate
+            optimizer = tf.keras.optimizers.get(self.model_config.optimizer)
+            optimizer.learning_rate = self.config.get('learning_rate', 1e-4)
+            PrepareBaseModel(self.model_config).compile_model(model, optimizer)
+
+            X = mixed[feature_columns].to_numpy(dtype=np.float32)
+            y = mixed['target'].to_numpy(dtype=np.int32) - LABEL_OFFSET
+            if has_concentration_output(model):
+                if CONCENTRATION_COLUMN not in mixed.columns:
+                    raise ValueError(f"The model has a concentration head but the data has no '{CONCENTRATION_COLUMN}' column.")
+                y = {CLASSIFICATION_OUTPUT: y, CONCENTRATION_OUTPUT: mixed[CONCENTRATION_COLUMN].to_numpy(dtype=np.float32)}
+            model.fit(
+                make_dataset(X, y, self.config.get('batch_size', 32), shuffle=True),
+                epochs=self.config.get('epochs', 5),
+                verbose=0
+            )
+            accuracy_after = self._accuracy(model, new_rows, feature_columns)
+            replay_accuracy = self._accuracy(model, replay, feature_columns)
+
+            # Save the new version, its metadata and the updated replay buffer
+            os.makedirs(self.versions_dir, exist_ok=True)
+            version = latest + 1
+            version_path = self._version_path(version)
+            model.save(version_path)
+            metadata = {
+                'version': version,
+                'base_model': base_model_path,
+                'batch_file': batch_file,
+                'batch': _batch_number(batch_file),
+                'new_rows': len(new_rows),
+                'replay_rows': len(replay_sample),
+                'new_batch_accuracy_before': accuracy_before,
+                'new_batch_accuracy_after': accuracy_after,
+                'replay_accuracy_after': replay_accuracy,
+            }
+            with open(os.path.splitext(version_path)[0] + '.json', 'w') as f:
+                json.dump(metadata, f, indent=2)
+
+            buffer = sample_replay_buffer(pd.concat([replay, new_rows], ignore_index=True),
+                                          self.config.get('replay_buffer_size', 5000))
+            save_artifact(buffer, self.replay_buffer_path, self.artifact_format)
+
+            logging.info(
+                f"Model v{version} saved at {version_path}: accuracy on the new batch "
+                f"{accuracy_before:.4f} -> {accuracy_after:.4f}, on the replay buffer {replay_accuracy:.4f}"
+            )
+
+            if self.config.get('promote', False):
+                model.save(self.model_path)
+                logging.info(f"Promoted model v{version} to {self.model_path}")
+
+            return version_path
+        except Exception as e:
+            logging.error(f"Error during incremental update: {e}")
+            raise
+
+
+def incremental_update(batch_file: str):
+    """
+    Fine-tune the current model on a new batch file using the configurations.
+
+    :param batch_file: Path to the new batch*.dat file.
+    """
+    try:
+        config = Configuration()
+        updater = IncrementalUpdate(
+            update_config=config.get_incremental_update_params(),
+            model_config=ModelConfig.from_dict(config.get_model_config()),
+            preprocessing_config=DataPreprocessingConfig.from_dict(config.get_data_preprocessing_config()),
+            model_path=os.path.join("artifacts/training", "gas_classification_model_final.keras"),
+            transform_path=config.get_transform_path(),
+            history_path=config.get_training_data_path(),
+            artifact_format=config.get_artifact_format(),
+        )
+        return updater.update(batch_file)
+    except Exception as e:
+        logging.error(f"An error occurred in the incremental_update function: {e}")
+        raise
@@ -5,6 +5,26 @@ from tensorflow.keras import layers, models
 from sensor.utils.common import create_required_directories
 from sensor.config.configuration import Configuration
 from sensor.entity.config_entity import ModelConfig
+from sensor.utils.model_outputs import CLASSIFICATION_OUTPUT, CONCENTRATION_OUTPUT, has_concentration_output
+from sensor.utils.instrumentation import instrumented
+
+# CPU flags (from /proc/cpuinfo) that provide native bfloat16 arithmetic
+BF16_CPU_FLAGS = ('avx512_bf16', 'amx_bf16')
+
+
+def bf16_supported() -> bool:
+    """
+    Check whether the CPU has native bfloat16 instructions. Without them
+    bfloat16 is emulated and slower than float32.
+
+    :return: True if one of BF16_CPU_FLAGS is present.
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return any(flag in flags for flag in BF16_CPU_FLAGS)
 
 
 class PrepareBaseModel:
@@ -18,16 +38,20 @@ class PrepareBaseModel:
         self.model = None
         logging.info("PrepareBaseModel initialized with configuration.")
 
-    def get_base_model(self):
+    def get_base_model(self, save: bool = True):
         """
         Build and return the base model for gas classification.
+
+        :param save: Save the model to save_dir. Training passes False so it
+            does not overwrite the output of the prepare_base_model stage.
         """
         try:
             # Ensure input_shape is a tuple
             input_shape = tuple(self.config.input_shape)  
             self.model = self.build_gas_classification_model(input_shape)
-            self.save_model(path=self.config.save_dir, model=self.model)
-            logging.info("Base model built and saved successfully.")
+            if save:
+                self.save_model(path=self.config.save_dir, model=self.model)
+            logging.info("Base model built successfully.")
             
             return self.model
         
@@ -36,34 +60,49 @@ class PrepareBaseModel:
             raise
 
 
-    def build_gas_classification_model(self, input_shape):
+    @instrumented()
+    def build_gas_classification_model(self, input_shape, concentration_output: bool = None):
         """
         Build the gas classification neural network architecture.
 
+        With concentration_output, a second regression head on the shared
+        hidden layers predicts the gas concentration in ppmv, so one forward
+        pass serves both the gas identity and its concentration.
+
         :param input_shape: Shape of the input data.
+        :param concentration_output: Add the concentration head; None uses the config.
         :return: Compiled Keras model.
         """
         try:
             # Input Layer
             inputs = layers.Input(shape=input_shape)
 
-            # Hidden Layers
-            x = layers.Dense(128, activation='relu')(inputs)
-            x = layers.Dropout(0.3)(x)  # Regularization
-            x = layers.Dense(64, activation='relu')(x)
-            x = layers.Dropout(0.3)(x)
-            x = layers.Dense(32, activation='relu')(x)
+            # Hidden Layers, in bfloat16 when mixed precision is enabled; outputs stay float32
+            policy = self._hidden_layer_policy()
+            x = inputs
+            for i, units in enumerate(self.config.hidden_units):
+                if i > 0:
+                    x = layers.Dropout(self.config.dropout_rate, dtype=policy)(x)  # Regularization
+                x = layers.Dense(units, activation='relu', dtype=policy)(x)
 
             # Output Layer for Gas Classification
-            classification_output = layers.Dense(6, activation='softmax', name='gas_classification')(x)
+            classification_output = layers.Dense(6, activation='softmax', dtype='float32', name=CLASSIFICATION_OUTPUT)(x)
 
             # Create the model
-            model = models.Model(inputs=inputs, outputs=classification_output)
+            if concentration_output is None:
+                concentration_output = self.config.concentration_output
+            if concentration_output:
+                # Regress concentration / scale, then rescale so the model outputs ppmv
+                concentration = layers.Dense(1, dtype='float32')(x)
+                concentration = layers.Rescaling(self.config.concentration_scale, dtype='float32',
+                                                 name=CONCENTRATION_OUTPUT)(concentration)
+                model = models.Model(inputs=inputs, outputs={CLASSIFICATION_OUTPUT: classification_output,
+                                                             CONCENTRATION_OUTPUT: concentration})
+            else:
+                model = models.Model(inputs=inputs, outputs=classification_output)
 
             # Compile the model
-            model.compile(optimizer=self.config.optimizer, 
-                          loss=self.config.classification_loss,
-                          metrics=[self.config.classification_metric])
+            self.compile_model(model)
 
             logging.info("Gas classification model built successfully.")
             return model
@@ -72,6 +111,55 @@ class PrepareBaseModel:
             logging.error(f"Error in build_gas_classification_model: {e}")
             raise
 
+    def _hidden_layer_policy(self) -> str:
+        """
+        Dtype policy of the hidden layers: 'mixed_bfloat16' (float32 weights,
+        bfloat16 compute) if mixed precision is enabled and the CPU supports
+        it, otherwise 'float32'.
+
+        :return: Keras dtype policy name.
+        """
+        if not self.config.mixed_precision:
+            return 'float32'
+        if not bf16_supported():
+            logging.warning("Mixed precision requested but the CPU has no native bfloat16 support; using float32.")
+            return 'float32'
+        logging.info("Building hidden layers with the mixed_bfloat16 policy.")
+        return 'mixed_bfloat16'
+
+    def compile_model(self, model: tf.keras.Model, optimizer=None):
+        """
+        Compile a model with the configured losses and metrics for its outputs.
+
+        The concentration loss is weighted by drift_loss_weight / scale**2.
+        For a squared-error drift_loss that equals the loss on
+        concentration / scale, which keeps it on the same footing as the
+        classification loss while the reported metric stays in ppmv.
+
+        :param model: Keras model, with or without the concentration head.
+        :param optimizer: Optimizer instance or name; None uses the configured
+            optimizer, with the configured learning_rate if one is set.
+        """
+        if optimizer is None:
+            optimizer = self.config.optimizer
+            if self.config.learning_rate is not None:
+                optimizer = tf.keras.optimizers.get({'class_name': optimizer,
+                                                     'config': {'learning_rate': self.config.learning_rate}})
+        if not has_concentration_output(model):
+            model.compile(optimizer=optimizer,
+                          loss=self.config.classification_loss,
+                          metrics=[self.config.classification_metric])
+            return
+
+        model.compile(
+            optimizer=optimizer,
+            loss={CLASSIFICATION_OUTPUT: self.config.classification_loss, CONCENTRATION_OUTPUT: self.config.drift_loss},
+            loss_weights={CLASSIFICATION_OUTPUT: 1.0,
+                          CONCENTRATION_OUTPUT: self.config.drift_loss_weight / self.config.concentration_scale ** 2},
+            metrics={CLASSIFICATION_OUTPUT: [self.config.classification_metric], CONCENTRATION_OUTPUT: [self.config.drift_metric]}
+        )
+
+    @instrumented()
     def save_model(self, path: str, model: tf.keras.Model):
         """
         Save the model to the specified path.
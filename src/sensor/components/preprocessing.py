@@ -1,14 +1,158 @@
 import os
+import re
 import glob
+import zipfile
+import posixpath
+import fnmatch
 import pandas as pd
 import numpy as np
-from sklearn.datasets import load_svmlight_file
-from sklearn.preprocessing import MinMaxScaler, PowerTransformer
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from sensor.config.configuration import Configuration
 from sensor.entity.config_entity import DataPreprocessingConfig
+from sensor.components.transform import PreprocessingTransform, fit_yeo_johnson, yeo_johnson
 from sensor.utils.common import create_directories
+from sensor.utils.artifact_io import get_artifact_path, save_artifact
+from sensor.utils.svmlight import parse_dense_svmlight
+from sensor.utils.instrumentation import instrumented
 import logging
 
+# Upper bound on elements per column chunk during skewness correction (~128 MB of float32)
+SKEW_CHUNK_ELEMENTS = 2 ** 25
+
+# Column holding the number of the batch*.dat file each row came from
+BATCH_COLUMN = 'batch'
+
+# Column holding the gas concentration (ppmv) given after the class label
+CONCENTRATION_COLUMN = 'concentration'
+
+# Batch files inside the data directory or dataset zip
+BATCH_FILE_PATTERN = 'batch*.dat'
+DATASET_DIR = 'Dataset'
+
+
+def _batch_sort_key(file_path: str):
+    """
+    Sort key that orders batch files numerically (batch2.dat before batch10.dat).
+
+    :param file_path: Path to a batch*.dat file.
+    :return: Tuple of (batch number, file name).
+    """
+    name = os.path.basename(file_path)
+    match = re.search(r'(\d+)', name)
+    return (int(match.group(1)) if match else float('inf'), name)
+
+
+def _batch_number(file_path: str) -> int:
+    """
+    Batch number of a batch*.dat file (batch7.dat -> 7), or 0 if it has none.
+
+    :param file_path: Path to a batch*.dat file.
+    :return: Batch number.
+    """
+    number = _batch_sort_key(file_path)[0]
+    return 0 if number == float('inf') else number
+
+
+def _source_name(source) -> str:
+    """
+    Name of a batch source: the file path, or the member name for a (zip path, member) pair.
+    """
+    return source[1] if isinstance(source, tuple) else source
+
+
+@contextmanager
+def _open_source(source):
+    """
+    Open a batch source as a binary stream.
+
+    Zip members are decompressed on the fly, so nothing is written to disk.
+
+    :param source: File path or (zip path, member name) pair.
+    :return: Context manager yielding a binary file object.
+    """
+    if isinstance(source, tuple):
+        zip_path, member = source
+        with zipfile.ZipFile(zip_path) as archive, archive.open(member) as f:
+            yield f
+    else:
+        with open(source, 'rb') as f:
+            yield f
+
+
+def find_batch_files(data_path: str) -> list:
+    """
+    Locate the batch*.dat files of the dataset, in batch order.
+
+    data_path is either the directory the archive was extracted to (files
+    under Dataset/) or the dataset zip itself, in which case the members
+    under Dataset/ are returned as (zip path, member name) pairs and read
+    straight from the archive.
+
+    :param data_path: Extraction directory or dataset zip.
+    :return: Ordered list of file paths or (zip path, member name) pairs.
+    """
+    if os.path.isfile(data_path) and zipfile.is_zipfile(data_path):
+        with zipfile.ZipFile(data_path) as archive:
+            sources = [
+                (data_path, member) for member in archive.namelist()
+                if posixpath.basename(posixpath.dirname(member)) == DATASET_DIR
+                and fnmatch.fnmatch(posixpath.basename(member), BATCH_FILE_PATTERN)
+            ]
+        pattern = f"{data_path}:{DATASET_DIR}/{BATCH_FILE_PATTERN}"
+    else:
+        pattern = os.path.join(data_path, DATASET_DIR, BATCH_FILE_PATTERN)
+        sources = glob.glob(pattern)
+
+    if not sources:
+        raise FileNotFoundError(f"No batch files found matching {pattern}")
+    return sorted(sources, key=lambda source: _batch_sort_key(_source_name(source)))
+
+
+def _read_svmlight_batch(source, num_features: int):
+    """
+    Parse a single svmlight batch file into dense arrays.
+
+    Defined at module level so it can be shipped to worker processes; zip
+    members are decompressed inside the worker, so members are inflated in
+    parallel.
+
+    :param source: File path or (zip path, member name) pair.
+    :param num_features: Number of features in the dataset.
+    :return: Tuple of (float32 feature array, target vector, concentration vector or None).
+    """
+    with _open_source(source) as f:
+        return parse_dense_svmlight(f.read(), num_features)
+
+
+def iter_svmlight_chunks(source, num_features: int, chunk_rows: int):
+    """
+    Parse an svmlight file lazily, chunk_rows lines at a time.
+
+    Only one chunk of raw lines and its parsed matrix are held in memory, so
+    memory use does not grow with the file size.
+
+    :param source: File path or (zip path, member name) pair.
+    :param num_features: Number of features in the dataset.
+    :param chunk_rows: Maximum number of rows per chunk.
+    :return: Generator of (float32 feature array, target vector, concentration vector or None) tuples.
+    """
+    def parse(lines):
+        return parse_dense_svmlight(b''.join(lines), num_features)
+
+    lines = []
+    with _open_source(source) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            lines.append(line)
+            if len(lines) >= chunk_rows:
+                yield parse(lines)
+                lines = []
+    if lines:
+        yield parse(lines)
+
+
 class Preprocessing:
     def __init__(self, config: DataPreprocessingConfig):
         """
@@ -17,6 +161,9 @@ class Preprocessing:
         :param config: DataPreprocessingConfig with paths for preprocessed data.
         """
         self.config = config
+        self.transform = None  # Fitted PreprocessingTransform, set by preprocess_data
+        self._skew_params = {}
+        self._scale_params = {}
         logging.info("Preprocessing initialized with configuration.")
 
     def run(self, data_path: str):
@@ -29,31 +176,101 @@ class Preprocessing:
             raw_data = self.load_data(data_path)
             preprocessed_data = self.preprocess_data(raw_data)
             self.save_preprocessed_data(preprocessed_data)
+            self.save_transform()
             logging.info("Preprocessing completed successfully.")
         except Exception as e:
             logging.error(f"Error during preprocessing: {e}")
             raise
 
+    @instrumented()
     def load_data(self, data_path: str) -> pd.DataFrame:
         """
-        Load and concatenate all .dat files into a single DataFrame.
+        Load all batch*.dat files, in batch order, into a single DataFrame.
+
+        Files are parsed in parallel worker processes straight into dense
+        float32 arrays, which are joined once.
         
-        :param data_path: Path to the raw data.
+        :param data_path: Extraction directory or dataset zip (see find_batch_files).
         :return: Concatenated DataFrame.
         """
         try:
-            dataset_path = os.path.join(data_path, 'Dataset', 'batch*.dat')
-            file_paths = glob.glob(dataset_path)
+            file_paths = find_batch_files(data_path)
             logging.info(f"Found {len(file_paths)} .dat files to process.")
 
-            all_data = [self._load_single_file(file) for file in file_paths]
-            final_df = pd.concat(all_data, ignore_index=True)
-            logging.info("All data loaded successfully.")
+            parsed = self._parse_files(file_paths)
+            features = np.concatenate([data for data, _, _ in parsed])
+            target = np.concatenate([target for _, target, _ in parsed])
+            batch = np.repeat([_batch_number(_source_name(path)) for path in file_paths], [len(t) for _, t, _ in parsed])
+            concentration = None
+            if all(conc is not None for _, _, conc in parsed):
+                concentration = np.concatenate([conc for _, _, conc in parsed])
+            else:
+                logging.info("Batch files carry no concentration for every row; skipping the concentration column.")
+
+            final_df = self._to_dataframe(features, target, batch, concentration)
+            logging.info(f"All data loaded successfully: {final_df.shape[0]} rows.")
             return final_df
         except Exception as e:
             logging.error(f"Error in load_data: {e}")
             raise
 
+    def iter_data(self, data_path: str, chunk_rows: int):
+        """
+        Stream all batch*.dat files, in batch order, as DataFrames of at most chunk_rows rows.
+
+        The batch files are located eagerly, so a missing dataset raises here
+        rather than on the first read from the generator.
+
+        :param data_path: Extraction directory or dataset zip (see find_batch_files).
+        :param chunk_rows: Maximum number of rows per chunk.
+        :return: Generator of DataFrames with features and target.
+        """
+        file_paths = find_batch_files(data_path)
+        logging.info(f"Streaming {len(file_paths)} .dat files in chunks of {chunk_rows} rows.")
+        return self._iter_chunks(file_paths, chunk_rows)
+
+    def _iter_chunks(self, file_paths: list, chunk_rows: int):
+        for file_path in file_paths:
+            for features, target, concentration in iter_svmlight_chunks(file_path, self.config.num_features, chunk_rows):
+                yield self._to_dataframe(features, target, _batch_number(_source_name(file_path)), concentration)
+
+    def _parse_files(self, file_paths: list) -> list:
+        """
+        Parse batch files with a process pool, preserving the input order.
+
+        :param file_paths: Ordered list of batch file paths or (zip path, member name) pairs.
+        :return: List of (feature array, target, concentration) tuples in the same order.
+        """
+        n_jobs = min(self.config.n_jobs or os.cpu_count() or 1, len(file_paths))
+        num_features = [self.config.num_features] * len(file_paths)
+
+        if n_jobs <= 1:
+            return list(map(_read_svmlight_batch, file_paths, num_features))
+
+        logging.info(f"Parsing {len(file_paths)} files with {n_jobs} worker processes.")
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            # executor.map yields results in submission order, not completion order
+            return list(executor.map(_read_svmlight_batch, file_paths, num_features))
+
+    def _to_dataframe(self, features: np.ndarray, target: np.ndarray, batch=None, concentration=None) -> pd.DataFrame:
+        """
+        Wrap a dense float32 feature array in a DataFrame without copying it.
+
+        :param features: float32 array of shape (n_rows, num_features).
+        :param target: Target vector.
+        :param batch: Batch number of every row, or a single number for all rows.
+        :param concentration: Gas concentration of every row, if the file has one.
+        :return: DataFrame with features, target, batch id and concentration.
+        """
+        columns = [f'feature_{i+1}' for i in range(self.config.num_features)]
+        df = pd.DataFrame(features, columns=columns, copy=False)
+        df['target'] = target.astype(int)
+        if batch is not None:
+            df[BATCH_COLUMN] = np.broadcast_to(np.asarray(batch, dtype=int), len(df)).copy()
+        if concentration is not None:
+            df[CONCENTRATION_COLUMN] = np.asarray(concentration, dtype=np.float32)
+        return df
+
     def _load_single_file(self, file_path: str) -> pd.DataFrame:
         """
         Load and format a single .dat file.
@@ -62,95 +279,211 @@ class Preprocessing:
         :return: DataFrame with features and target.
         """
         try:
-            data, target = load_svmlight_file(file_path, n_features=self.config.num_features)
-            df = pd.DataFrame(data.toarray(), columns=[f'feature_{i+1}' for i in range(self.config.num_features)])
-            df['target'] = target.astype(int)
+            data, target, concentration = _read_svmlight_batch(file_path, self.config.num_features)
+            df = self._to_dataframe(data, target, _batch_number(file_path), concentration)
             logging.info(f"Loaded data from {file_path}.")
             return df
         except Exception as e:
             logging.error(f"Error loading file {file_path}: {e}")
             raise
 
+    @instrumented()
     def preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        Apply skewness correction and normalization.
+        Apply skewness correction and normalization, recording the fitted
+        parameters in self.transform for reuse at inference time.
+
+        The features are copied once into a column-major float32 array and
+        every step below works in place on that array.
         
         :param data: Raw data.
         :return: Preprocessed data.
         """
         try:
             feature_columns = [col for col in data.columns if 'feature' in col]
-            data_copy = data.copy()
+            features = np.array(data[feature_columns], dtype=np.float32, order='F')
+            self._skew_params = {}
 
             # Skewness detection
-            skewness = data_copy[feature_columns].skew()
+            skewness = pd.DataFrame(features, columns=feature_columns, copy=False).skew()
             high_skewed = skewness[abs(skewness) > 1]
 
             if not high_skewed.empty:
                 logging.info(f"Applying skewness correction on: {list(high_skewed.index)}")
-                data_copy = self._transform_skewed_features(data_copy, high_skewed)
+                self._transform_skewed_features(features, skewness.to_numpy())
 
             # Normalization
-            data_copy = self._normalize_data(data_copy)
+            self._normalize_data(features)
+
+            preprocessed = pd.DataFrame(features, columns=feature_columns, copy=False)
+            for column in data.columns:
+                if column not in preprocessed.columns:
+                    preprocessed[column] = data[column].values
 
-            return data_copy
+            self.transform = self._build_transform(feature_columns)
+            return preprocessed
         except Exception as e:
             logging.error(f"Error in preprocess_data: {e}")
             raise
 
-    def _transform_skewed_features(self, df: pd.DataFrame, skewed_features: pd.Series) -> pd.DataFrame:
+    def _transform_skewed_features(self, features: np.ndarray, skewness: np.ndarray) -> np.ndarray:
+        """
+        Apply log1p (right-skewed columns) and a standardized Yeo-Johnson
+        transform to every column with |skew| > 1, in place.
+
+        Lambdas for all skewed columns are fitted together by one vectorized
+        search. Columns are processed in chunks so temporaries stay bounded on
+        large datasets. If the batched fit fails, the columns are fitted one at
+        a time so a bad column is skipped instead of aborting the correction.
+
+        :param features: Column-major float32 feature array. Modified in place.
+        :param skewness: Per-column skewness.
+        :return: The corrected feature array.
+        """
+        skewed_columns = np.flatnonzero(np.abs(skewness) > 1)
+        log_columns = np.flatnonzero(skewness > 1)
+
         try:
-            df_copy = df.copy()
-            pt = PowerTransformer(method='yeo-johnson')
-
-            for feature in skewed_features.index:
-                try:
-                    if skewed_features[feature] > 1:
-                        df_copy[feature] = np.log1p(df_copy[feature])
-                    df_copy[[feature]] = pt.fit_transform(df_copy[[feature]])
-                except Exception as e:
-                    logging.warning(f"Skipping transformation for {feature}: {e}")
-
-            return df_copy
+            with np.errstate(invalid='ignore', divide='ignore'):
+                for column in log_columns:
+                    np.log1p(features[:, column], out=features[:, column])
         except Exception as e:
             logging.warning(f"Error transforming skewed features: {e}")
-            return df
+            self._skew_params = {}
+            return features
+
+        try:
+            power_columns = skewed_columns
+            lambdas = np.empty(len(skewed_columns))
+            power_mean = np.empty(len(skewed_columns))
+            power_scale = np.empty(len(skewed_columns))
+
+            chunk_size = max(1, SKEW_CHUNK_ELEMENTS // max(len(features), 1))
+            for start in range(0, len(skewed_columns), chunk_size):
+                chunk = slice(start, start + chunk_size)
+                block = features[:, skewed_columns[chunk]]
+
+                lambdas[chunk] = fit_yeo_johnson(block)
+                yeo_johnson(block, lambdas[chunk])
+
+                # Standardize like PowerTransformer(standardize=True)
+                power_mean[chunk] = np.nanmean(block, axis=0, dtype=np.float64)
+                scale = np.nanstd(block, axis=0, dtype=np.float64)
+                scale[scale == 0.0] = 1.0
+                power_scale[chunk] = scale
+                block -= power_mean[chunk].astype(np.float32)
+                block /= power_scale[chunk].astype(np.float32)
+
+                features[:, skewed_columns[chunk]] = block
+        except Exception as e:
+            logging.warning(f"Batched skewness correction failed ({e}); fitting columns individually.")
+            power_columns, lambdas, power_mean, power_scale = self._fit_power_per_column(features, skewed_columns)
+
+        self._skew_params = {
+            'log_columns': log_columns,
+            'power_columns': np.asarray(power_columns, dtype=int),
+            'lambdas': lambdas,
+            'power_mean': power_mean,
+            'power_scale': power_scale,
+        }
+        return features
+
+    def _fit_power_per_column(self, features: np.ndarray, columns: np.ndarray):
+        """
+        Fallback Yeo-Johnson fit that transforms columns one by one, skipping failures.
 
-    def _normalize_data(self, data: pd.DataFrame) -> pd.DataFrame:
+        :param features: Column-major float32 feature array. Modified in place.
+        :param columns: Column indices to transform.
+        :return: Tuple of (fitted columns, lambdas, means, scales).
         """
-        Apply MinMax scaling.
+        from sklearn.preprocessing import PowerTransformer
+        fitted = []
+        for column in columns:
+            try:
+                pt = PowerTransformer(method='yeo-johnson', copy=False)
+                features[:, [column]] = pt.fit_transform(features[:, [column]])
+                fitted.append((column, pt.lambdas_[0], pt._scaler.mean_[0], pt._scaler.scale_[0]))
+            except Exception as e:
+                logging.warning(f"Skipping transformation for feature_{column + 1}: {e}")
+
+        if not fitted:
+            return [], [], [], []
+        return [list(values) for values in zip(*fitted)]
+
+    def _normalize_data(self, features: np.ndarray) -> np.ndarray:
+        """
+        Apply MinMax scaling in place.
         
-        :param data: Input DataFrame.
-        :return: Scaled DataFrame.
+        :param features: Float32 feature array. Modified in place.
+        :return: Scaled feature array.
         """
+        # Imported here so serving, which only applies a saved transform, never loads scikit-learn
+        from sklearn.preprocessing import MinMaxScaler
         try:
-            feature_columns = [col for col in data.columns if 'feature' in col]
-            scaler = MinMaxScaler(feature_range=self.config.feature_range)
-            scaled_features = scaler.fit_transform(data[feature_columns])
-
-            scaled_df = pd.DataFrame(scaled_features, columns=feature_columns)
-            scaled_df['target'] = data['target'].values
+            scaler = MinMaxScaler(feature_range=self.config.feature_range, copy=False)
+            scaled = scaler.fit_transform(features)
+            if scaled is not features:
+                features[...] = scaled
+            self._scale_params = {'data_min': scaler.data_min_, 'data_max': scaler.data_max_}
 
             logging.info("Feature normalization completed.")
-            return scaled_df
+            return features
         except Exception as e:
             logging.error(f"Error in normalization: {e}")
             raise
 
+    def _build_transform(self, feature_columns: list) -> PreprocessingTransform:
+        """
+        Collect the fitted skewness and scaling parameters into a transform bundle.
+
+        :param feature_columns: Ordered feature column names.
+        :return: PreprocessingTransform instance.
+        """
+        skew = self._skew_params
+
+        return PreprocessingTransform(
+            feature_columns=list(feature_columns),
+            feature_range=tuple(self.config.feature_range),
+            data_min=np.asarray(self._scale_params['data_min'], dtype=np.float64),
+            data_max=np.asarray(self._scale_params['data_max'], dtype=np.float64),
+            log_columns=np.asarray(skew.get('log_columns', []), dtype=int),
+            power_columns=np.asarray(skew.get('power_columns', []), dtype=int),
+            lambdas=np.asarray(skew.get('lambdas', []), dtype=np.float64),
+            power_mean=np.asarray(skew.get('power_mean', []), dtype=np.float64),
+            power_scale=np.asarray(skew.get('power_scale', []), dtype=np.float64),
+        )
+
+    @instrumented()
+    def save_transform(self):
+        """
+        Save the fitted preprocessing transform next to the preprocessed data.
+        """
+        try:
+            if self.transform is None:
+                raise ValueError("No fitted transform available; run preprocess_data first.")
+
+            transform_path = os.path.join(self.config.preprocessed_dir, self.config.transform_file)
+            self.transform.save(transform_path)
+        except Exception as e:
+            logging.error(f"Error saving preprocessing transform: {e}")
+            raise
+
+    @instrumented()
     def save_preprocessed_data(self, data: pd.DataFrame):
         """
-        Save the final preprocessed data to CSV.
+        Save the final preprocessed data in the configured artifact format.
         
         :param data: Preprocessed data.
         """
         try:
             preprocessed_dir = self.config.preprocessed_dir
             preprocessed_file = self.config.preprocessed_file
+            artifact_format = self.config.artifact_format
 
             create_directories([preprocessed_dir])
-            output_file_path = os.path.join(preprocessed_dir, preprocessed_file)
+            output_file_path = get_artifact_path(preprocessed_dir, preprocessed_file, artifact_format)
 
-            data.to_csv(output_file_path, index=False)
+            save_artifact(data, output_file_path, artifact_format)
             logging.info(f"Preprocessed data saved to {output_file_path}")
         except Exception as e:
             logging.error(f"Error saving preprocessed data: {e}")
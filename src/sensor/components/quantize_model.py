@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import numpy as np
+from sensor.config.configuration import Configuration
+from sensor.entity.config_entity import ModelConfig
+from sensor.components.evaluate_model import EvaluateModel
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.numpy_model import INT8_MAX, MAX_EXACT_INT8_INPUTS, NumpyModel
+from sensor.utils.instrumentation import instrumented
+
+
+class QuantizeModel:
+    def __init__(self, quantize_config: dict):
+        """
+        Post-training int8 quantization of the exported NumPy model.
+
+        Dense kernels are quantized symmetrically per output unit. The input
+        of every Dense layer gets one scale, calibrated on a sample of
+        preprocessed rows. Biases stay float32, and the layer output is
+        rescaled to float32 before the activation.
+
+        :param quantize_config: Dictionary with float_model_path, output_path,
+            calibration_rows, calibration_percentile, max_accuracy_drop,
+            latency_batch_size and report_file.
+        """
+        self.config = quantize_config
+        self.float_model_path = quantize_config.get('float_model_path', 'artifacts/training/gas_classification_model_final.npz')
+        self.output_path = quantize_config.get('output_path', 'artifacts/training/gas_classification_model_int8.npz')
+
+    @instrumented()
+    def calibrate(self, model: NumpyModel, features: np.ndarray) -> dict:
+        """
+        Choose the input scale of every Dense layer from the float model's activations.
+
+        :param model: Float NumpyModel.
+        :param features: float32 calibration rows.
+        :return: Dense layer name -> input scale.
+        """
+        percentile = self.config.get('calibration_percentile', 99.99)
+        activations = model.forward(features)
+        scales = {}
+        for layer in model.layers:
+            if layer['type'] == 'Dense':
+                # A high percentile instead of the max keeps rare outliers from wasting the int8 range
+                bound = float(np.percentile(np.abs(activations[layer['input']]), percentile))
+                # Floor at eps, not tiny: 1 / scale must stay finite in float32, or zero inputs quantize to NaN
+                scales[layer['name']] = max(bound, float(np.finfo(np.float32).eps)) / INT8_MAX
+        return scales
+
+    @instrumented()
+    def quantize(self, model: NumpyModel, features: np.ndarray) -> NumpyModel:
+        """
+        Build the int8 model.
+
+        :param model: Float NumpyModel.
+        :param features: float32 calibration rows.
+        :return: Quantized NumpyModel sharing the float model's graph.
+        """
+        scales = self.calibrate(model, features)
+        layers, weights = [], dict(model.weights)
+        for layer in model.layers:
+            layer = dict(layer)
+            if layer['type'] == 'Dense':
+                kernel = weights.pop(layer['kernel'])
+                if kernel.shape[0] > MAX_EXACT_INT8_INPUTS:
+                    raise ValueError(f"Layer {layer['name']} has {kernel.shape[0]} inputs; at most "
+                                     f"{MAX_EXACT_INT8_INPUTS} can be accumulated exactly.")
+                kernel_scale = np.maximum(np.abs(kernel).max(axis=0), np.finfo(np.float32).tiny) / INT8_MAX
+                quantized = np.clip(np.rint(kernel / kernel_scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+
+                layer.update(kernel=f"{layer['name']}/kernel_int8", kernel_scale=f"{layer['name']}/kernel_scale",
+                             input_scale=scales[layer['name']])
+                weights[layer['kernel']] = quantized
+                weights[layer['kernel_scale']] = kernel_scale.astype(np.float32)
+            layers.append(layer)
+        return NumpyModel(layers, model.inputs, model.outputs, model.input_shape, weights)
+
+    @instrumented()
+    def measure_latency(self, model: NumpyModel, features: np.ndarray, repeats: int = 200) -> float:
+        """
+        Median latency of one prediction call.
+
+        :param model: NumpyModel to time.
+        :param features: Rows to predict (one batch).
+        :param repeats: Number of timed calls.
+        :return: Median latency in milliseconds.
+        """
+        model.predict(features)  # Warm-up
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(features)
+            timings.append(time.perf_counter() - start)
+        return float(np.median(timings) * 1000)
+
+    def run(self, evaluator: EvaluateModel) -> dict:
+        """
+        Quantize the float model, compare both variants on the evaluation
+        data and publish the int8 model only if its accuracy drop is within
+        max_accuracy_drop.
+
+        :param evaluator: EvaluateModel holding the evaluation data.
+        :return: Report with size, latency and accuracy of both variants.
+        """
+        features = evaluator.features()
+        rng = np.random.default_rng(42)
+        calibration_rows = min(self.config.get('calibration_rows', 2048), len(features))
+        calibration = features[np.sort(rng.choice(len(features), calibration_rows, replace=False))]
+
+        float_model = NumpyModel.load(self.float_model_path)
+        int8_model = self.quantize(float_model, calibration)
+
+        # Write the candidate next to the destination; it only replaces output_path if it passes the gate
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        fd, candidate_path = tempfile.mkstemp(suffix='.npz', dir=os.path.dirname(self.output_path) or '.')
+        os.close(fd)
+        try:
+            int8_model.save(candidate_path)
+            batch = features[:self.config.get('latency_batch_size', 32)]
+            report = {}
+            for name, model, path in (('float32', float_model, self.float_model_path),
+                                      ('int8', int8_model, candidate_path)):
+                report[name] = {
+                    'size_bytes': os.path.getsize(path),
+                    'latency_ms': self.measure_latency(model, batch),
+                    'accuracy': evaluator.accuracy(model.predict(features)),
+                }
+            report['accuracy_drop'] = report['float32']['accuracy'] - report['int8']['accuracy']
+            report['max_accuracy_drop'] = self.config.get('max_accuracy_drop', 0.01)
+            report['published'] = report['accuracy_drop'] <= report['max_accuracy_drop']
+
+            for name in ('float32', 'int8'):
+                logging.info(f"{name}: {report[name]['size_bytes'] / 1024:.1f} KiB, "
+                             f"{report[name]['latency_ms']:.3f} ms per batch, accuracy {report[name]['accuracy']:.4f}")
+            self._save_report(report)
+
+            if not report['published']:
+                raise ValueError(f"int8 model loses {report['accuracy_drop']:.4f} accuracy, more than the allowed "
+                                 f"{report['max_accuracy_drop']}; not publishing {self.output_path}.")
+            os.replace(candidate_path, self.output_path)
+            logging.info(f"Published int8 model to {self.output_path}")
+            return report
+        finally:
+            if os.path.exists(candidate_path):
+                os.remove(candidate_path)
+
+    def _save_report(self, report: dict):
+        """
+        Write the comparison to report_file and log it to MLflow.
+        """
+        import mlflow
+        report_file = self.config.get('report_file', 'artifacts/training/quantization_report.json')
+        os.makedirs(os.path.dirname(report_file) or '.', exist_ok=True)
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        mlflow.start_run(run_name="GasSensor_Model_Quantization")
+        try:
+            mlflow.log_param("max_accuracy_drop", report['max_accuracy_drop'])
+            for name in ('float32', 'int8'):
+                for metric, value in report[name].items():
+                    mlflow.log_metric(f"{name}_{metric}", value)
+            mlflow.log_metric("accuracy_drop", report['accuracy_drop'])
+            mlflow.log_metric("published", int(report['published']))
+            mlflow.log_artifact(report_file)
+            mlflow.end_run()
+        except Exception:
+            mlflow.end_run(status='FAILED')
+            raise
+
+
+def quantize_model():
+    """
+    Quantize the exported model to int8 and publish it if it passes the accuracy gate.
+    """
+    try:
+        config = Configuration()
+        model_config = ModelConfig.from_dict(config.get_model_config())
+        data = load_artifact(config.get_training_data_path(), config.get_artifact_format())
+
+        quantizer = QuantizeModel(config.get_quantize_model_config())
+        evaluator = EvaluateModel(model_config=model_config, data=data, model_path=quantizer.float_model_path)
+        return quantizer.run(evaluator)
+    except Exception as e:
+        logging.error(f"An error occurred in the quantize_model function: {e}")
+        raise
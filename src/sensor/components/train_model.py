@@ -1,11 +1,81 @@
 import os
+import time
 import logging
+import numpy as np
 import pandas as pd
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback, EarlyStopping, ModelCheckpoint
 from sensor.config.configuration import Configuration
 from sensor.entity.config_entity import ModelConfig
 from sensor.components.prepare_base_model import PrepareBaseModel
+from sensor.utils.model_outputs import CLASSIFICATION_OUTPUT, CONCENTRATION_OUTPUT, LABEL_OFFSET
+from sensor.components.preprocessing import CONCENTRATION_COLUMN
 from sensor.utils.common import create_required_directories
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.instrumentation import instrument_step, instrumented
+
+def limit_cpu_threads(threads: int):
+    """
+    Bound the intra- and inter-op thread pools of TensorFlow in this process.
+
+    Must run before the process executes any TensorFlow op, so worker
+    processes call it from their pool initializer. The OpenMP and BLAS
+    pools are sized when those libraries load, which is earlier; start the
+    workers inside sensor.utils.common.worker_thread_environment to bound them.
+
+    :param threads: Threads for intra- and inter-op parallelism.
+    """
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def make_dataset(X: np.ndarray, y, batch_size: int, shuffle: bool = False,
+                 shuffle_buffer_size: int = None, cache: bool = True, seed: int = 42) -> tf.data.Dataset:
+    """
+    Build a batched, prefetching tf.data pipeline from in-memory arrays.
+
+    The arrays are converted to tensors once. Row indices are shuffled and
+    batched, and each batch is gathered in a single op, which avoids the
+    per-row overhead of slicing and shuffling individual elements.
+
+    :param X: float32 feature matrix.
+    :param y: Integer class indices, or a dict of target arrays keyed by
+        output name for a model with several outputs.
+    :param batch_size: Batch size.
+    :param shuffle: Reshuffle the rows every epoch.
+    :param shuffle_buffer_size: Shuffle buffer size; None shuffles over the whole dataset.
+    :param cache: Cache the gathered batches after the first epoch. Only
+        applies without shuffling, where the batches are the same every epoch.
+    :param seed: Shuffle seed.
+    :return: tf.data.Dataset yielding (features, labels) batches.
+    """
+    if X.dtype != np.float32:
+        raise TypeError(f"make_dataset expects float32 features, got {X.dtype}")
+    features = tf.constant(X, dtype=tf.float32)
+    labels = tf.nest.map_structure(tf.constant, y)
+
+    dataset = tf.data.Dataset.range(len(X))
+    if shuffle:
+        dataset = dataset.shuffle(shuffle_buffer_size or len(X), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(
+        lambda index: (tf.gather(features, index), tf.nest.map_structure(lambda t: tf.gather(t, index), labels)),
+        num_parallel_calls=tf.data.AUTOTUNE
+    )
+    if cache and not shuffle:
+        dataset = dataset.cache()
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class EpochTimer(Callback):
+    """
+    Adds the wall time of each epoch to the training logs as 'epoch_time'.
+    """
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is not None:
+            logs['epoch_time'] = time.perf_counter() - self._start
 
 
 class TrainModel:
@@ -24,25 +94,36 @@ class TrainModel:
         self.target_column = target_column  # Dynamically passed target column
         self.model = None
 
+    @instrumented()
     def load_data(self):
         """
-        Loads training and testing data.
+        Loads training and testing data as a float32 feature matrix and
+        integer class indices (for sparse categorical cross-entropy).
+
+        With the concentration head enabled, the targets are a dict of class
+        indices and concentrations keyed by output name.
 
-        :return: Tuple of training and testing datasets.
+        :return: Tuple of training and testing arrays.
         """
         try:
-            # Separate features and target
-            X = self.data.drop(self.target_column, axis=1)  # Drop the target column dynamically
-            y = self.data[self.target_column]
+            # Separate features and target; the batch id and other bookkeeping columns are not inputs
+            feature_columns = [col for col in self.data.columns if 'feature' in col]
+            X = self.data[feature_columns].to_numpy(dtype=np.float32)
+            y = self.data[self.target_column].to_numpy(dtype=np.int32) - LABEL_OFFSET
 
-            # One-hot encoding for the target variable
-            y_encoded = pd.get_dummies(y)
+            if self.model_config.concentration_output:
+                if CONCENTRATION_COLUMN not in self.data.columns:
+                    raise ValueError(f"The concentration head needs the '{CONCENTRATION_COLUMN}' column; re-run preprocessing.")
+                y = {CLASSIFICATION_OUTPUT: y,
+                     CONCENTRATION_OUTPUT: self.data[CONCENTRATION_COLUMN].to_numpy(dtype=np.float32)}
 
             # Split the dataset into training and testing sets
             from sklearn.model_selection import train_test_split
-            X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42)
+            train_rows, test_rows = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+            y_train = tf.nest.map_structure(lambda a: a[train_rows], y)
+            y_test = tf.nest.map_structure(lambda a: a[test_rows], y)
 
-            return X_train, X_test, y_train, y_test
+            return X[train_rows], X[test_rows], y_train, y_test
         except Exception as e:
             logging.error(f"Error loading data: {e}")
             raise
@@ -56,7 +137,7 @@ class TrainModel:
 
             # Instantiate the model preparation class to load the model
             prepare_model = PrepareBaseModel(config=self.model_config)
-            self.model = prepare_model.get_base_model()  # Prepare the model
+            self.model = prepare_model.get_base_model(save=False)  # Prepare the model
 
             # Define callbacks
             early_stopping = EarlyStopping(
@@ -71,14 +152,33 @@ class TrainModel:
                 verbose=1
             )
 
-            # Train the model
-            history = self.model.fit(
-                X_train, y_train,
-                validation_split=self.training_config.get('validation_split', 0.2),
-                epochs=self.training_config.get('epochs', 10),
-                batch_size=self.training_config.get('batch_size', 32),
-                callbacks=[early_stopping, model_checkpoint]
+            # Hold out the last validation_split of the rows, as Keras' validation_split does
+            validation_split = self.training_config.get('validation_split', 0.2)
+            split = int(len(X_train) * (1 - validation_split))
+            batch_size = self.training_config.get('batch_size', 32)
+            cache = self.training_config.get('cache_dataset', True)
+
+            train_dataset = make_dataset(
+                X_train[:split], tf.nest.map_structure(lambda a: a[:split], y_train), batch_size, shuffle=True,
+                shuffle_buffer_size=self.training_config.get('shuffle_buffer_size'), cache=cache
             )
+            validation_dataset = make_dataset(X_train[split:], tf.nest.map_structure(lambda a: a[split:], y_train),
+                                              batch_size, cache=cache)
+
+            # Train the model
+            epochs = self.training_config.get('epochs', 10)
+            with instrument_step('fit', rows=split * epochs) as step:
+                history = self.model.fit(
+                    train_dataset,
+                    validation_data=validation_dataset,
+                    epochs=epochs,
+                    callbacks=[EpochTimer(), early_stopping, model_checkpoint]
+                )
+                # Early stopping may end before the last epoch
+                step['rows'] = split * len(history.epoch)
+            epoch_times = history.history.get('epoch_time', [])
+            if epoch_times:
+                logging.info(f"Mean epoch time: {np.mean(epoch_times):.3f}s over {len(epoch_times)} epochs")
 
             # Save the final trained model to the specified path
             model_save_path = os.path.join("artifacts/training", "gas_classification_model_final.keras")
@@ -91,6 +191,7 @@ class TrainModel:
             logging.error(f"Error during model training: {e}")
             raise
 
+    @instrumented()
     def save_training_history(self, history):
         """
         Save training history to a file for future reference.
@@ -125,8 +226,8 @@ def train_model():
         training_config = config.get_training_params()
 
         # Load preprocessed data
-        preprocessed_data_path = os.path.join("artifacts/preprocessed", "preprocessed_data.csv")
-        data = pd.read_csv(preprocessed_data_path)
+        preprocessed_data_path = config.get_training_data_path()
+        data = load_artifact(preprocessed_data_path, config.get_artifact_format())
 
         # Create necessary directories for saving the training history and model
         create_required_directories("artifacts/training")  # Ensure directories exist
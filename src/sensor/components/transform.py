@@ -0,0 +1,263 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+
+def yeo_johnson(X: np.ndarray, lambdas: np.ndarray) -> np.ndarray:
+    """
+    Apply the Yeo-Johnson power transform column-wise, in place.
+
+    Equivalent to sklearn's PowerTransformer._yeo_johnson_transform, written
+    as expm1(c * log1p(|x|)) / c so every column is handled in one pass
+    without boolean fancy indexing.
+
+    :param X: 2D float array, one column per lambda. Modified in place.
+    :param lambdas: Per-column Yeo-Johnson lambdas.
+    :return: The transformed array (same object as X).
+    """
+    lambdas = np.asarray(lambdas, dtype=X.dtype)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        negative = X < 0  # NaNs compare False and stay NaN below
+        coef = np.where(negative, X.dtype.type(2) - lambdas, lambdas)
+        log_abs = np.log1p(np.abs(X))
+
+        np.multiply(coef, log_abs, out=X)
+        np.expm1(X, out=X)
+        small = np.abs(coef) < np.spacing(1.0)
+        X /= np.where(small, X.dtype.type(1), coef)
+        if small.any():
+            np.copyto(X, log_abs, where=small)  # Limit as c -> 0: log1p(|x|)
+        np.negative(X, out=X, where=negative)
+
+    return X
+
+
+# Search interval, tolerance and iteration cap for the vectorized lambda fit
+LAMBDA_BOUNDS = (-10.0, 10.0)
+LAMBDA_TOLERANCE = 1e-8
+LAMBDA_MAX_ITER = 100
+# Rows used to estimate lambdas; larger inputs are strided down to this size
+LAMBDA_FIT_MAX_SAMPLES = 50_000
+
+
+def _yeo_johnson_score(log_abs, negative, valid, n_valid, signed_sum, lambdas):
+    """
+    Derivative of the Yeo-Johnson log-likelihood with respect to each column's lambda.
+
+    With y = g(c) = expm1(c * L) / c, where L = log1p(|x|) and c = lambda
+    (x >= 0) or 2 - lambda (x < 0), dy/dlambda = g'(c) for both signs, and
+
+        d loglike / d lambda = sum(sign(x) * L) - n * cov(y, y') / var(y)
+
+    NaNs are encoded as L = 0, which makes y and y' vanish; they are masked
+    out of the centred sums through `valid`.
+    """
+    # Nudge lambdas off the removable singularity at c = 0 (lambda = 0 or 2)
+    small = (np.abs(lambdas) < 1e-8) | (np.abs(2.0 - lambdas) < 1e-8)
+    lambdas = np.where(small, lambdas + 1e-8, lambdas)
+    coef = np.where(negative, 2.0 - lambdas, lambdas)
+    inv_coef = 1.0 / coef
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        y = np.expm1(coef * log_abs)
+        dy = log_abs * (y + 1.0)
+        y *= inv_coef
+        dy -= y
+        dy *= inv_coef
+        np.negative(y, out=y, where=negative)
+
+        y -= y.sum(axis=0) / n_valid
+        if valid is not None:
+            y *= valid
+        var = np.einsum('ij,ij->j', y, y) / n_valid
+        cov = np.einsum('ij,ij->j', y, dy) / n_valid
+        return signed_sum - n_valid * cov / var
+
+
+def fit_yeo_johnson(X: np.ndarray, max_samples: int = LAMBDA_FIT_MAX_SAMPLES) -> np.ndarray:
+    """
+    Estimate Yeo-Johnson lambdas for all columns of X at once.
+
+    Maximizes the same log-likelihood as sklearn's PowerTransformer, but
+    solves for the root of its derivative in every column simultaneously
+    (bracketed Illinois iteration) instead of running a separate Brent
+    optimisation per column. Inputs longer than max_samples are evenly
+    strided down first (rows are batch-ordered, so every batch stays
+    represented), which keeps the fit cost flat as the dataset grows.
+
+    :param X: 2D float array. NaNs are ignored.
+    :param max_samples: Maximum number of rows used for the fit; None uses all rows.
+    :return: Per-column lambdas.
+    """
+    if max_samples is not None and len(X) > max_samples:
+        X = X[::int(np.ceil(len(X) / max_samples))]
+
+    X = np.asarray(X, dtype=np.float64)
+    valid = ~np.isnan(X)
+    negative = X < 0
+    log_abs = np.log1p(np.abs(np.where(valid, X, 0.0)))
+    n_valid = valid.sum(axis=0)
+    signed_sum = np.where(negative, -log_abs, log_abs).sum(axis=0)
+    valid = None if valid.all() else valid.astype(np.float64)
+
+    def score(lambdas):
+        return _yeo_johnson_score(log_abs, negative, valid, n_valid, signed_sum, lambdas)
+
+    # Widen the bracket until the score changes sign, i.e. the maximum lies inside
+    low, high = np.full(X.shape[1], -2.0), np.full(X.shape[1], 2.0)
+    f_low, f_high = score(low), score(high)
+    for bound in (4.0, 8.0, LAMBDA_BOUNDS[1]):
+        below, above = f_low < 0, f_high > 0
+        if not (below | above).any():
+            break
+        high, f_high = np.where(below, low, high), np.where(below, f_low, f_high)
+        low, f_low = np.where(above, high, low), np.where(above, f_high, f_low)
+        low = np.where(below, max(-bound, LAMBDA_BOUNDS[0]), low)
+        high = np.where(above, bound, high)
+        f_low, f_high = score(low), score(high)
+
+    # Maximum at a search bound (or a degenerate column): keep the bound
+    lambdas = np.where(f_low < 0, low, np.where(f_high > 0, high, (low + high) / 2))
+    active = (f_low > 0) & (f_high < 0)
+    last_side = np.zeros(X.shape[1], dtype=int)
+
+    for _ in range(LAMBDA_MAX_ITER):
+        if not active.any():
+            break
+        with np.errstate(invalid='ignore', divide='ignore'):
+            guess = high - f_high * (high - low) / (f_high - f_low)
+        guess = np.where(np.isfinite(guess) & (guess > low) & (guess < high), guess, (low + high) / 2)
+        f_guess = score(np.where(active, guess, lambdas))
+
+        move_low = active & (f_guess > 0)
+        move_high = active & ~(f_guess > 0)
+        # Illinois step: halve the stale endpoint when the same side moves twice
+        f_high = np.where(move_low & (last_side == 1), f_high / 2, f_high)
+        f_low = np.where(move_high & (last_side == -1), f_low / 2, f_low)
+        low, f_low = np.where(move_low, guess, low), np.where(move_low, f_guess, f_low)
+        high, f_high = np.where(move_high, guess, high), np.where(move_high, f_guess, f_high)
+        last_side = np.where(move_low, 1, np.where(move_high, -1, last_side))
+
+        converged = active & ((np.abs(guess - lambdas) < LAMBDA_TOLERANCE) | (f_guess == 0) | (high - low < LAMBDA_TOLERANCE))
+        lambdas = np.where(active, guess, lambdas)
+        active &= ~converged
+
+    # A constant column has no likelihood maximum; scipy (and so sklearn) leaves it as is with lambda 1
+    constant = ~(np.fmax.reduce(X, axis=0) > np.fmin.reduce(X, axis=0))
+    return np.where(constant, 1.0, lambdas)
+
+
+@dataclass
+class PreprocessingTransform:
+    """
+    Fitted preprocessing parameters that can be replayed on new data without refitting.
+
+    Column indices refer to positions within feature_columns. The lambdas
+    are fitted on at most LAMBDA_FIT_MAX_SAMPLES evenly strided rows, so on
+    larger training sets they can differ slightly from those of sklearn's
+    PowerTransformer fitted on every row; power_mean and power_scale are
+    computed from all rows.
+    """
+    feature_columns: List[str]
+    feature_range: Tuple[float, float]
+    data_min: np.ndarray
+    data_max: np.ndarray
+    log_columns: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=int))
+    power_columns: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=int))
+    lambdas: np.ndarray = field(default_factory=lambda: np.empty(0))
+    power_mean: np.ndarray = field(default_factory=lambda: np.empty(0))
+    power_scale: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """
+        Apply skewness correction and MinMax scaling in a single NumPy pass.
+
+        :param X: Raw feature matrix of shape (n_rows, num_features).
+        :return: Transformed float32 feature matrix.
+        """
+        X = np.array(X, dtype=np.float32)  # Work on a private copy
+        if X.ndim != 2 or X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected a 2D array with {len(self.feature_columns)} columns, got shape {X.shape}")
+
+        with np.errstate(invalid='ignore'):
+            if self.log_columns.size:
+                X[:, self.log_columns] = np.log1p(X[:, self.log_columns])
+
+        if self.power_columns.size:
+            skewed = yeo_johnson(X[:, self.power_columns], self.lambdas)
+            skewed -= self.power_mean.astype(np.float32)
+            skewed /= self.power_scale.astype(np.float32)
+            X[:, self.power_columns] = skewed
+
+        low, high = self.feature_range
+        data_range = self.data_max - self.data_min
+        data_range[data_range == 0.0] = 1.0  # Same zero handling as MinMaxScaler
+        scale = ((high - low) / data_range).astype(np.float32)
+        X -= self.data_min.astype(np.float32)
+        X *= scale
+        X += np.float32(low)
+        return X
+
+    def transform_frame(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transform the feature columns of a DataFrame, keeping any other columns.
+
+        :param data: Raw DataFrame containing feature_columns.
+        :return: DataFrame with transformed features.
+        """
+        transformed = pd.DataFrame(self.transform(data[self.feature_columns].to_numpy()),
+                                   columns=self.feature_columns, index=data.index)
+        for column in data.columns:
+            if column not in transformed.columns:
+                transformed[column] = data[column].values
+        return transformed
+
+    def save(self, path: str):
+        """
+        Save the fitted parameters as a NumPy .npz bundle.
+
+        :param path: Output file path.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                feature_columns=np.array(self.feature_columns),
+                feature_range=np.array(self.feature_range, dtype=float),
+                data_min=self.data_min,
+                data_max=self.data_max,
+                log_columns=self.log_columns,
+                power_columns=self.power_columns,
+                lambdas=self.lambdas,
+                power_mean=self.power_mean,
+                power_scale=self.power_scale,
+            )
+        logging.info(f"Preprocessing transform saved to {path}")
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Load a transform bundle written by save().
+
+        :param path: Bundle file path.
+        :return: PreprocessingTransform instance.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Preprocessing transform not found at {path}")
+        with np.load(path, allow_pickle=False) as bundle:
+            transform = cls(
+                feature_columns=[str(c) for c in bundle['feature_columns']],
+                feature_range=tuple(bundle['feature_range'].tolist()),
+                data_min=bundle['data_min'],
+                data_max=bundle['data_max'],
+                log_columns=bundle['log_columns'],
+                power_columns=bundle['power_columns'],
+                lambdas=bundle['lambdas'],
+                power_mean=bundle['power_mean'],
+                power_scale=bundle['power_scale'],
+            )
+        logging.info(f"Preprocessing transform loaded from {path}")
+        return transform
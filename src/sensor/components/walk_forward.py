@@ -0,0 +1,198 @@
+import os
+import time
+import logging
+import multiprocessing
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from concurrent.futures import ProcessPoolExecutor
+from tensorflow.keras.callbacks import EarlyStopping
+from sensor.config.configuration import Configuration
+from sensor.entity.config_entity import ModelConfig, DataPreprocessingConfig
+from sensor.components.prepare_base_model import PrepareBaseModel
+from sensor.components.preprocessing import BATCH_COLUMN, Preprocessing
+from sensor.components.train_model import LABEL_OFFSET, limit_cpu_threads, make_dataset
+from sensor.utils.common import worker_thread_environment
+from sensor.utils.instrumentation import instrumented
+
+# Per-process state set by _init_worker, so each fold only ships its batch number
+_worker_state = {}
+
+
+def _init_worker(model_config, walk_forward_config, preprocessing_config, feature_columns, X, y, batch, threads):
+    """
+    Initialize a fold worker: bound its TensorFlow threads and keep the data in memory.
+
+    Runs before the worker executes any TensorFlow op, which is required for
+    the threading settings to take effect.
+    """
+    limit_cpu_threads(threads)
+    _worker_state.update(model_config=model_config, config=walk_forward_config, preprocessing_config=preprocessing_config,
+                         feature_columns=feature_columns, X=X, y=y, batch=batch)
+
+
+def fold_features(X: np.ndarray, train_rows: np.ndarray, test_rows: np.ndarray, feature_columns: list,
+                  preprocessing_config: DataPreprocessingConfig):
+    """
+    Preprocess one fold without looking ahead.
+
+    The skewness correction and scaling are fitted on the fold's training
+    rows only and then applied to its test rows, as they would be to a
+    batch that arrives after deployment.
+
+    :param X: Raw feature matrix of all batches.
+    :param train_rows: Boolean mask of the training rows.
+    :param test_rows: Boolean mask of the test rows.
+    :param feature_columns: Feature column names.
+    :param preprocessing_config: Preprocessing configuration.
+    :return: Tuple of (training features, test features) as float32 arrays.
+    """
+    preprocessing = Preprocessing(preprocessing_config)
+    train_frame = pd.DataFrame(X[train_rows], columns=feature_columns, copy=False)
+    X_train = preprocessing.preprocess_data(train_frame)[feature_columns].to_numpy(dtype=np.float32)
+    return X_train, preprocessing.transform.transform(X[test_rows])
+
+
+def _train_fold(train_until: int, test_batch: int) -> dict:
+    """
+    Train a fresh model on batches up to train_until and score it on test_batch.
+
+    Defined at module level so it can be shipped to worker processes.
+
+    :param train_until: Last batch number included in training.
+    :param test_batch: Batch number used for validation.
+    :return: Dictionary with the fold's row counts, accuracy and training time.
+    """
+    state = _worker_state
+    config = state['config']
+    X, y, batch = state['X'], state['y'], state['batch']
+    train_rows = batch <= train_until
+    test_rows = batch == test_batch
+
+    start = time.perf_counter()
+    X_train, X_test = fold_features(X, train_rows, test_rows, state['feature_columns'], state['preprocessing_config'])
+    tf.keras.utils.set_random_seed(42 + train_until)
+    # The sweep scores gas identity only, so folds train the classification head alone
+    model = PrepareBaseModel(state['model_config']).build_gas_classification_model(X.shape[1:], concentration_output=False)
+
+    # Early stopping watches the most recent training rows, never the test batch
+    y_train = y[train_rows]
+    split = int(len(X_train) * (1 - config.get('validation_split', 0.1)))
+    batch_size = config.get('batch_size', 32)
+    model.fit(
+        make_dataset(X_train[:split], y_train[:split], batch_size, shuffle=True),
+        validation_data=make_dataset(X_train[split:], y_train[split:], batch_size),
+        epochs=config.get('epochs', 20),
+        callbacks=[EarlyStopping(patience=config.get('early_stopping_patience', 3), restore_best_weights=True)],
+        verbose=0
+    )
+
+    probabilities = model.predict(make_dataset(X_test, y[test_rows], 1024), verbose=0)
+    accuracy = float(np.mean(probabilities.argmax(axis=1) == y[test_rows]))
+    return {
+        'train_batches': f"{int(batch.min())}-{train_until}",
+        'test_batch': test_batch,
+        'train_rows': int(train_rows.sum()),
+        'test_rows': int(test_rows.sum()),
+        'accuracy': accuracy,
+        'train_seconds': time.perf_counter() - start,
+    }
+
+
+class WalkForwardTrainer:
+    def __init__(self, model_config: ModelConfig, walk_forward_config: dict, data: pd.DataFrame,
+                 preprocessing_config: DataPreprocessingConfig, target_column: str = 'target'):
+        """
+        Time-ordered evaluation across the drift batches: for every k, train on
+        the batches up to k and validate on batch k+1.
+
+        Each fold fits its own preprocessing on its training batches, so no
+        statistic of the test batch or later batches leaks into training.
+
+        :param model_config: Model configuration.
+        :param walk_forward_config: Dictionary of walk-forward parameters.
+        :param data: Raw (untransformed) data including the batch id column, as from Preprocessing.load_data.
+        :param preprocessing_config: Preprocessing configuration used to fit each fold's transform.
+        :param target_column: Target column for prediction.
+        """
+        if BATCH_COLUMN not in data.columns:
+            raise ValueError(f"Walk-forward training needs the '{BATCH_COLUMN}' column; re-run preprocessing.")
+
+        self.model_config = model_config
+        self.walk_forward_config = walk_forward_config
+        self.data = data
+        self.preprocessing_config = preprocessing_config
+        self.target_column = target_column
+
+    @instrumented()
+    def run(self) -> pd.DataFrame:
+        """
+        Train all folds in parallel worker processes.
+
+        :return: Per-batch accuracy table, one row per fold.
+        """
+        try:
+            feature_columns = [col for col in self.data.columns if 'feature' in col]
+            X = self.data[feature_columns].to_numpy(dtype=np.float32)
+            y = self.data[self.target_column].to_numpy(dtype=np.int32) - LABEL_OFFSET
+            batch = self.data[BATCH_COLUMN].to_numpy()
+
+            batches = np.unique(batch)
+            folds = [(int(k), int(test)) for k, test in zip(batches[:-1], batches[1:])]
+            if not folds:
+                raise ValueError("Walk-forward training needs at least two batches.")
+
+            threads = max(1, self.walk_forward_config.get('threads_per_worker') or 1)
+            n_jobs = self.walk_forward_config.get('n_jobs') or max(1, (os.cpu_count() or 1) // threads)
+            n_jobs = min(n_jobs, len(folds))
+            logging.info(f"Walk-forward training: {len(folds)} folds on {n_jobs} workers x {threads} threads.")
+
+            # Spawn rather than fork: forking a process that has initialized TensorFlow is unsafe
+            with worker_thread_environment(threads), ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model_config, self.walk_forward_config, self.preprocessing_config, feature_columns,
+                          X, y, batch, threads)
+            ) as executor:
+                results = list(executor.map(_train_fold, *zip(*folds)))
+
+            table = pd.DataFrame(results)
+            logging.info(f"Walk-forward accuracy per batch:\n{table.to_string(index=False)}")
+            return table
+        except Exception as e:
+            logging.error(f"Error during walk-forward training: {e}")
+            raise
+
+    @instrumented()
+    def save_results(self, table: pd.DataFrame):
+        """
+        Save the per-batch accuracy table as CSV.
+
+        :param table: Table returned by run().
+        """
+        try:
+            output_file = self.walk_forward_config.get('output_file', 'artifacts/training/walk_forward_accuracy.csv')
+            os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+            table.to_csv(output_file, index=False)
+            logging.info(f"Walk-forward results saved at: {output_file}")
+        except Exception as e:
+            logging.error(f"Error saving walk-forward results: {e}")
+            raise
+
+
+def walk_forward_train():
+    """
+    Run the walk-forward drift sweep using the configurations and data.
+    """
+    try:
+        config = Configuration()
+        model_config = ModelConfig.from_dict(config.get_model_config())
+        preprocessing_config = config.data_preprocessing_config
+        data = Preprocessing(preprocessing_config).load_data(config.data_ingestion_config.raw_data_path)
+
+        trainer = WalkForwardTrainer(model_config, config.get_walk_forward_params(), data, preprocessing_config)
+        trainer.save_results(trainer.run())
+    except Exception as e:
+        logging.error(f"An error occurred in the walk_forward_train function: {e}")
+        raise
@@ -1,25 +1,161 @@
 import os
 import yaml
 import logging
-from sensor.constants import CONFIG_FILE_PATH
-from sensor.entity.config_entity import ModelConfig
+import threading
+from dataclasses import dataclass
+from sensor.entity.config_entity import DataIngestionConfig, DataPreprocessingConfig, ModelConfig, ModelTrainingConfig
+from sensor.utils.artifact_io import get_artifact_path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Environment variables with these prefixes override values of config.yaml and
+# param.yaml; "__" separates the levels, e.g. SENSOR_CONFIG__SERVING__RUNTIME=numpy
+# or SENSOR_PARAM__MODEL_TRAINING__EPOCHS=5. Values are parsed as YAML.
+CONFIG_ENV_PREFIX = 'SENSOR_CONFIG__'
+PARAM_ENV_PREFIX = 'SENSOR_PARAM__'
+
+
+@dataclass
+class _LoadedConfiguration:
+    """
+    Parsed and validated configuration, shared by every Configuration
+    built from the same files and overrides. Treat it as read-only.
+    """
+    fingerprint: tuple
+    config: dict
+    params: dict
+    data_ingestion_config: DataIngestionConfig
+    data_preprocessing_config: DataPreprocessingConfig
+    model_config: ModelConfig
+    model_training_config: ModelTrainingConfig
+
+
+# (config path, param path) -> _LoadedConfiguration
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def env_overrides() -> tuple:
+    """
+    Collect the environment overrides of both files in one pass over the environment.
+
+    :return: Tuple of (config.yaml overrides, param.yaml overrides), each a
+        sorted tuple of (key path without the prefix, raw value).
+    """
+    # Only matching names are looked up; decoding every value costs more than the rest of a cached load
+    names = [name for name in os.environ.keys() if name.startswith('SENSOR_')]
+    return tuple(
+        tuple(sorted((name[len(prefix):], os.environ[name]) for name in names if name.startswith(prefix)))
+        for prefix in (CONFIG_ENV_PREFIX, PARAM_ENV_PREFIX)
+    )
+
+
+def apply_overrides(data: dict, overrides: tuple, source: str) -> dict:
+    """
+    Set overridden values in a parsed YAML document.
+
+    Key path parts match existing keys case-insensitively, since environment
+    variable names are usually upper case; unknown keys are added in lower case.
+
+    :param data: Parsed YAML document, modified in place.
+    :param overrides: One of the tuples returned by env_overrides().
+    :param source: File name used in error messages.
+    :return: The updated document.
+    """
+    for name, raw_value in overrides:
+        node = data
+        parts = [part for part in name.split('__') if part]
+        for depth, part in enumerate(parts):
+            key = next((existing for existing in node if str(existing).lower() == part.lower()), part.lower())
+            if depth == len(parts) - 1:
+                node[key] = yaml.safe_load(raw_value)
+                logging.info(f"{source}: {'.'.join(parts).lower()} overridden from the environment")
+            else:
+                node = node.setdefault(key, {})
+                if not isinstance(node, dict):
+                    raise ValueError(f"Cannot override {name} in {source}: '{key}' is not a section")
+    return data
+
+
+def _file_fingerprint(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _build_entity(entity_class, section: str, document: dict, source: str):
+    """
+    Build and validate one typed configuration section, naming the section on failure.
+    """
+    try:
+        return entity_class.from_dict(document.get(section) or {})
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid '{section}' section in {source}: {e!r}") from e
+
 
 class Configuration:
     def __init__(self, config_file_path='config/config.yaml', param_file_path='param.yaml'):
         """
-        Initializes the Configuration class by loading the YAML configuration files.
+        Initializes the Configuration class from the YAML configuration files.
+
+        The files are parsed, overridden from the environment and validated
+        once per process; later instances reuse that result as long as the
+        files' mtimes and sizes and the overrides are unchanged, so
+        constructing a Configuration per request is cheap. The config and
+        params dictionaries are shared between instances and must not be
+        modified; the typed configs are frozen, so derive variants with
+        dataclasses.replace.
 
         :param config_file_path: Path to the main configuration file (default: 'config/config.yaml').
         :param param_file_path: Path to the parameters configuration file (default: 'param.yaml').
         """
         self.config_file_path = config_file_path
         self.param_file_path = param_file_path
-        self.config = self.read_yaml_file(self.config_file_path)
-        self.params = self.read_yaml_file(self.param_file_path)
+
+        loaded = self._load()
+        self.config = loaded.config
+        self.params = loaded.params
+        self.data_ingestion_config = loaded.data_ingestion_config
+        self.data_preprocessing_config = loaded.data_preprocessing_config
+        self.model_config = loaded.model_config
+        self.model_training_config = loaded.model_training_config
+
+    def _load(self) -> _LoadedConfiguration:
+        """
+        Return the cached configuration for these files, parsing and validating them if they changed.
+        """
+        try:
+            fingerprint = (_file_fingerprint(self.config_file_path), _file_fingerprint(self.param_file_path),
+                           *env_overrides())
+        except OSError as e:
+            logging.error(f"Error reading config file: {e}")
+            raise
+
+        key = (os.path.abspath(self.config_file_path), os.path.abspath(self.param_file_path))
+        loaded = _cache.get(key)
+        if loaded is not None and loaded.fingerprint == fingerprint:
+            return loaded
+
+        with _cache_lock:
+            loaded = _cache.get(key)
+            if loaded is None or loaded.fingerprint != fingerprint:
+                config = apply_overrides(self.read_yaml_file(self.config_file_path) or {}, fingerprint[2],
+                                         self.config_file_path)
+                params = apply_overrides(self.read_yaml_file(self.param_file_path) or {}, fingerprint[3],
+                                         self.param_file_path)
+                loaded = _LoadedConfiguration(
+                    fingerprint=fingerprint,
+                    config=config,
+                    params=params,
+                    data_ingestion_config=_build_entity(DataIngestionConfig, 'data_ingestion', config, self.config_file_path),
+                    data_preprocessing_config=_build_entity(DataPreprocessingConfig, 'data_preprocessing', config,
+                                                            self.config_file_path),
+                    model_config=_build_entity(ModelConfig, 'prepare_base_model', config, self.config_file_path),
+                    model_training_config=_build_entity(ModelTrainingConfig, 'model_training', params,
+                                                        self.param_file_path),
+                )
+                _cache[key] = loaded
+            return loaded
 
     def read_yaml_file(self, file_path):
         """
@@ -75,17 +211,55 @@ class Configuration:
         :return: Training parameters as a dictionary.
         """
         return self.params.get('model_training', {})
+
+    def get_walk_forward_params(self):
+        """
+        Gets the walk-forward (batch-ordered) training parameters.
+
+        :return: Walk-forward parameters as a dictionary.
+        """
+        return self.params.get('walk_forward', {})
+
+    def get_hyperparameter_search_params(self):
+        """
+        Get the hyperparameter search parameters from the params file.
+
+        :return: Hyperparameter search parameters as a dictionary.
+        """
+        return self.params.get('hyperparameter_search', {})
+
+    def get_incremental_update_params(self):
+        """
+        Gets the parameters for fine-tuning on a newly arrived batch.
+
+        :return: Incremental update parameters as a dictionary.
+        """
+        return self.params.get('incremental_update', {})
     
         
+    def get_artifact_format(self):
+        """
+        Returns the storage format of the preprocessed data artifact.
+        """
+        return self.get_data_preprocessing_config().get('artifact_format', 'csv')
+
     def get_training_data_path(self):
         """
         Returns the path to the preprocessed training data file.
         """
         preprocessed_file = self.get_data_preprocessing_config()['preprocessed_file']
         preprocessed_dir = self.get_data_preprocessing_config()['preprocessed_dir']
-        return os.path.join(preprocessed_dir, preprocessed_file)
+        return get_artifact_path(preprocessed_dir, preprocessed_file, self.get_artifact_format())
 
     
+    def get_transform_path(self):
+        """
+        Returns the path to the fitted preprocessing transform bundle.
+        """
+        preprocessing_config = self.get_data_preprocessing_config()
+        transform_file = preprocessing_config.get('transform_file', 'preprocessing_transform.npz')
+        return os.path.join(preprocessing_config['preprocessed_dir'], transform_file)
+
     def get_prepare_base_model_config(self):
         """
         Retrieves the base model preparation configuration.
@@ -99,6 +273,38 @@ class Configuration:
             raise e
 
 
+    def get_export_model_config(self):
+        """
+        Gets the configuration for exporting the trained model to the NumPy runtime.
+
+        :return: Export configurations as a dictionary.
+        """
+        return self.config.get('export_model', {})
+
+    def get_quantize_model_config(self):
+        """
+        Get the int8 quantization configurations from the config file.
+
+        :return: Quantization configurations as a dictionary.
+        """
+        return self.config.get('quantize_model', {})
+
+    def get_serving_config(self):
+        """
+        Gets model serving configuration from the YAML file.
+
+        :return: Serving configurations as a dictionary.
+        """
+        return self.config.get('serving', {})
+
+    def get_instrumentation_config(self):
+        """
+        Gets the stage timing and profiling configuration from the YAML file.
+
+        :return: Instrumentation configurations as a dictionary.
+        """
+        return self.config.get('instrumentation', {})
+
     def get_mlflow_config(self):
         """
         Retrieves MLflow configuration from environment variables.
@@ -3,3 +3,6 @@ import os
 # Define the path to the configuration file
 CONFIG_FILE_PATH = os.path.join("config", "config.yaml")
 PARAM_FILE_PATH = os.path.join("param.yaml")
+
+# Fingerprints of completed stages, used by main.py to skip unchanged stages
+STAGE_CACHE_FILE = os.path.join("artifacts", "stage_cache.json")
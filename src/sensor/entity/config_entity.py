@@ -1,12 +1,35 @@
 from dataclasses import dataclass
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 
-@dataclass
+@dataclass(frozen=True)
 class DataIngestionConfig:
     root_dir: str
     source_URL: str
     local_data_file: str
     unzip_dir: str
+    sha256: Optional[str] = None  # Expected archive checksum; enables offline cache hits
+    cache_dir: str = 'artifacts/data_ingestion/cache'
+    download_workers: int = 4  # Parallel range requests
+    download_chunk_size: int = 8 * 1024 * 1024
+    download_retries: int = 3
+    extract: bool = False  # Unpack the archive; otherwise batch files are read from the zip
+    cache_max_age: Optional[float] = 86400.0  # Seconds a download without ETag/Last-Modified is reused; None forever
+    cache_max_bytes: Optional[int] = None  # Size limit of the download cache; None for no limit
+
+    def __post_init__(self):
+        if self.download_workers < 1 or self.download_retries < 1:
+            raise ValueError("download_workers and download_retries must be at least 1")
+        if self.download_chunk_size <= 0:
+            raise ValueError(f"download_chunk_size must be positive, got {self.download_chunk_size}")
+        if self.cache_max_age is not None and self.cache_max_age < 0:
+            raise ValueError(f"cache_max_age must not be negative, got {self.cache_max_age}")
+        if self.cache_max_bytes is not None and self.cache_max_bytes <= 0:
+            raise ValueError(f"cache_max_bytes must be positive, got {self.cache_max_bytes}")
+
+    @property
+    def raw_data_path(self) -> str:
+        """Where preprocessing reads the batch files: the extraction directory or the zip itself."""
+        return self.unzip_dir if self.extract else self.local_data_file
 
     @classmethod
     def from_dict(cls, config_dict: Dict[str, Any]):
@@ -15,17 +38,36 @@ class DataIngestionConfig:
             root_dir=config_dict['root_dir'],
             source_URL=config_dict['source_URL'],
             local_data_file=config_dict['local_data_file'],
-            unzip_dir=config_dict['unzip_dir']
+            unzip_dir=config_dict['unzip_dir'],
+            sha256=config_dict.get('sha256'),
+            cache_dir=config_dict.get('cache_dir', 'artifacts/data_ingestion/cache'),
+            download_workers=config_dict.get('download_workers', 4),
+            download_chunk_size=config_dict.get('download_chunk_size', 8 * 1024 * 1024),
+            download_retries=config_dict.get('download_retries', 3),
+            extract=config_dict.get('extract', False),
+            cache_max_age=config_dict.get('cache_max_age', 86400.0),
+            cache_max_bytes=config_dict.get('cache_max_bytes')
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class DataPreprocessingConfig:
     preprocessed_dir: str
     preprocessed_file: str
     num_features: int
     feature_range: Tuple[int, int]
-    
+    n_jobs: Optional[int] = None  # Worker processes for parsing; None uses all CPUs
+    artifact_format: str = 'csv'  # One of: csv, parquet, feather, npy
+    transform_file: str = 'preprocessing_transform.npz'
+
+    def __post_init__(self):
+        if self.num_features <= 0:
+            raise ValueError(f"num_features must be positive, got {self.num_features}")
+        if len(self.feature_range) != 2 or self.feature_range[0] >= self.feature_range[1]:
+            raise ValueError(f"feature_range must be (low, high) with low < high, got {self.feature_range}")
+        if self.n_jobs is not None and self.n_jobs < 1:
+            raise ValueError(f"n_jobs must be at least 1 or null, got {self.n_jobs}")
+
     @classmethod
     def from_dict(cls, config_dict: Dict[str, Any]):
         """Create DataPreprocessingConfig from a dictionary."""
@@ -33,11 +75,14 @@ class DataPreprocessingConfig:
             preprocessed_dir=config_dict['preprocessed_dir'],
             preprocessed_file=config_dict['preprocessed_file'],
             num_features=config_dict['num_features'],
-            feature_range=tuple(config_dict['feature_range'])  # Ensure it's a tuple
+            feature_range=tuple(config_dict['feature_range']),  # Ensure it's a tuple
+            n_jobs=config_dict.get('n_jobs'),
+            artifact_format=config_dict.get('artifact_format', 'csv'),
+            transform_file=config_dict.get('transform_file', 'preprocessing_transform.npz')
         )
     
     
-@dataclass
+@dataclass(frozen=True)
 class ModelConfig:
     input_shape: tuple
     save_dir: str
@@ -46,6 +91,23 @@ class ModelConfig:
     drift_loss: str
     classification_metric: str
     drift_metric: str
+    hidden_units: tuple = (128, 64, 32)  # Width of each hidden Dense layer
+    dropout_rate: float = 0.3  # Dropout after every hidden layer but the last
+    learning_rate: float = None  # None keeps the optimizer's default
+    concentration_output: bool = False  # Add a regression head for the gas concentration
+    concentration_scale: float = 1000.0  # Typical concentration (ppmv); the head predicts in these units
+    drift_loss_weight: float = 1.0
+    mixed_precision: bool = False  # bfloat16 compute in the hidden layers, where the CPU supports it
+
+    def __post_init__(self):
+        if not self.hidden_units or any(int(units) != units or units <= 0 for units in self.hidden_units):
+            raise ValueError(f"hidden_units must be a non-empty list of positive integers, got {self.hidden_units}")
+        if not 0 <= self.dropout_rate < 1:
+            raise ValueError(f"dropout_rate must be in [0, 1), got {self.dropout_rate}")
+        if self.learning_rate is not None and self.learning_rate <= 0:
+            raise ValueError(f"learning_rate must be positive or null, got {self.learning_rate}")
+        if self.concentration_scale <= 0:
+            raise ValueError(f"concentration_scale must be positive, got {self.concentration_scale}")
 
     @classmethod
     def from_dict(cls, config_dict):
@@ -57,19 +119,36 @@ class ModelConfig:
             input_shape=tuple(config_dict.get('input_shape', [128])),  # Fallback to (128,)
             save_dir=config_dict.get('save_dir', 'artifacts/prepared_model/'),
             optimizer=config_dict.get('optimizer', 'adam'),
-            classification_loss=config_dict.get('classification_loss', 'categorical_crossentropy'),
+            classification_loss=config_dict.get('classification_loss', 'sparse_categorical_crossentropy'),
             drift_loss=config_dict.get('drift_loss', 'mean_squared_error'),
             classification_metric=config_dict.get('classification_metric', 'accuracy'),
             drift_metric=config_dict.get('drift_metric', 'mse'),
+            hidden_units=tuple(config_dict.get('hidden_units', [128, 64, 32])),
+            dropout_rate=config_dict.get('dropout_rate', 0.3),
+            learning_rate=config_dict.get('learning_rate'),
+            concentration_output=config_dict.get('concentration_output', False),
+            concentration_scale=config_dict.get('concentration_scale', 1000.0),
+            drift_loss_weight=config_dict.get('drift_loss_weight', 1.0),
+            mixed_precision=config_dict.get('mixed_precision', False),
         )
 
-@dataclass
+@dataclass(frozen=True)
 class ModelTrainingConfig:
     epochs: int
     batch_size: int
     validation_split: float
     early_stopping_patience: int
     restore_best_weights: bool
+    cache_dataset: bool = True
+    shuffle_buffer_size: Optional[int] = None  # None shuffles over the whole training set
+
+    def __post_init__(self):
+        if self.epochs < 1 or self.batch_size < 1:
+            raise ValueError(f"epochs and batch_size must be at least 1, got {self.epochs} and {self.batch_size}")
+        if not 0 <= self.validation_split < 1:
+            raise ValueError(f"validation_split must be in [0, 1), got {self.validation_split}")
+        if self.early_stopping_patience < 0:
+            raise ValueError(f"early_stopping_patience must not be negative, got {self.early_stopping_patience}")
 
     @classmethod
     def from_dict(cls, config_dict: Dict[str, Any]):
@@ -79,9 +158,77 @@ class ModelTrainingConfig:
             batch_size=config_dict['batch_size'],
             validation_split=config_dict['validation_split'],
             early_stopping_patience=config_dict['early_stopping_patience'],
-            restore_best_weights=config_dict['restore_best_weights']
+            restore_best_weights=config_dict['restore_best_weights'],
+            cache_dataset=config_dict.get('cache_dataset', True),
+            shuffle_buffer_size=config_dict.get('shuffle_buffer_size')
         )
         
+@dataclass
+class ServingConfig:
+    model_path: str
+    transform_path: str = 'artifacts/preprocessed/preprocessing_transform.npz'
+    warmup_batch_size: int = 32
+    reload_check_interval: float = 1.0  # Seconds between model file mtime checks
+    predict_batch_size: int = 1024
+    scratch_dir: str = 'artifacts/predictions'  # Parent of per-request workspaces
+    stream_chunk_rows: int = 10000  # Rows per chunk when streaming predictions
+    batching_enabled: bool = True
+    batch_max_wait_ms: float = 5.0  # Longest time a request waits for a batch to fill
+    batch_max_size: int = 256  # Maximum rows per batched forward pass
+    runtime: str = 'keras'  # 'keras', or 'numpy' to serve the exported model without TensorFlow
+    numpy_model_path: str = 'artifacts/training/gas_classification_model_final.npz'
+    download_cache_dir: str = 'artifacts/predictions_cache'  # Uploads are cached apart from the training data
+    download_cache_max_bytes: int = 1 << 30  # Least recently used uploads are evicted past this size
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]):
+        """Create ServingConfig from a dictionary."""
+        return cls(
+            model_path=config_dict.get('model_path', 'artifacts/training/gas_classification_model_final.keras'),
+            transform_path=config_dict.get('transform_path', 'artifacts/preprocessed/preprocessing_transform.npz'),
+            warmup_batch_size=config_dict.get('warmup_batch_size', 32),
+            reload_check_interval=config_dict.get('reload_check_interval', 1.0),
+            predict_batch_size=config_dict.get('predict_batch_size', 1024),
+            scratch_dir=config_dict.get('scratch_dir', 'artifacts/predictions'),
+            stream_chunk_rows=config_dict.get('stream_chunk_rows', 10000),
+            batching_enabled=config_dict.get('batching_enabled', True),
+            batch_max_wait_ms=config_dict.get('batch_max_wait_ms', 5.0),
+            batch_max_size=config_dict.get('batch_max_size', 256),
+            runtime=config_dict.get('runtime', 'keras'),
+            numpy_model_path=config_dict.get('numpy_model_path', 'artifacts/training/gas_classification_model_final.npz'),
+            download_cache_dir=config_dict.get('download_cache_dir', 'artifacts/predictions_cache'),
+            download_cache_max_bytes=config_dict.get('download_cache_max_bytes', 1 << 30)
+        )
+
+
+@dataclass
+class InstrumentationConfig:
+    enabled: bool = True
+    metrics_file: str = 'artifacts/metrics/stage_metrics.jsonl'  # One JSON line per finished stage and step
+    log_to_mlflow: bool = False  # The JSONL metrics_file is always written
+    profile: str = 'none'  # 'none', 'cprofile' or 'sample'
+    profile_dir: str = 'artifacts/profiles'
+    sample_interval: float = 0.005  # Seconds between stack samples in 'sample' mode
+
+    def __post_init__(self):
+        if self.profile not in ('none', 'cprofile', 'sample'):
+            raise ValueError(f"profile must be 'none', 'cprofile' or 'sample', got {self.profile!r}")
+        if self.sample_interval <= 0:
+            raise ValueError(f"sample_interval must be positive, got {self.sample_interval}")
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]):
+        """Create InstrumentationConfig from a dictionary."""
+        return cls(
+            enabled=config_dict.get('enabled', True),
+            metrics_file=config_dict.get('metrics_file', 'artifacts/metrics/stage_metrics.jsonl'),
+            log_to_mlflow=config_dict.get('log_to_mlflow', False),
+            profile=config_dict.get('profile', 'none'),
+            profile_dir=config_dict.get('profile_dir', 'artifacts/profiles'),
+            sample_interval=config_dict.get('sample_interval', 0.005)
+        )
+
+
 @dataclass
 class MLflowConfig:
     tracking_uri: str
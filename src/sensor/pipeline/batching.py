@@ -0,0 +1,199 @@
+import time
+import queue
+import logging
+import threading
+import numpy as np
+from concurrent.futures import Future
+from sensor.utils.metrics import Histogram, LatencyHistogram, DEFAULT_RATIO_BUCKETS
+
+# Bucket upper bounds for the number of requests waiting when a batch is dispatched
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_wait_ms: float = 5.0, max_batch_size: int = 256):
+        """
+        Dynamic batching layer in front of a model.
+
+        Requests are queued and a background thread groups them for up to
+        max_wait_ms milliseconds or max_batch_size rows, runs one batched
+        forward pass through predict_fn and scatters the result rows back to
+        the callers.
+
+        :param predict_fn: Callable taking a float32 matrix and returning one output row per
+            input row, or a dict of such arrays for a multi-output model.
+        :param max_wait_ms: Longest time the first request of a batch waits for company.
+        :param max_batch_size: Maximum number of rows in one forward pass.
+        """
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self.queue_depth = Histogram(QUEUE_DEPTH_BUCKETS)
+        self.fill_ratio = Histogram(DEFAULT_RATIO_BUCKETS)
+        self.batch_latency = LatencyHistogram()
+        self.batch_count = 0
+        self.row_count = 0
+
+        self._queue = queue.Queue()
+        self._carry = None  # Request that did not fit into the previous batch
+        self._stopped = False
+        self._stop_lock = threading.Lock()  # No request may be queued behind the stop sentinel
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, features: np.ndarray) -> Future:
+        """
+        Queue feature rows for the next batch.
+
+        :param features: Feature matrix of shape (n_rows, num_features).
+        :return: Future resolving to the output rows for these features.
+        """
+        future = Future()
+        request = (np.asarray(features, dtype=np.float32), future)
+        with self._stop_lock:
+            if self._stopped:
+                raise RuntimeError("MicroBatcher has been stopped.")
+            self._queue.put(request)
+        return future
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict through the batching queue and wait for the result.
+
+        Inputs larger than max_batch_size bypass the queue and are passed
+        straight to predict_fn, since they fill a batch on their own.
+
+        :param features: Feature matrix of shape (n_rows, num_features).
+        :return: Output rows for these features.
+        """
+        if len(features) >= self.max_batch_size:
+            return self.predict_fn(np.asarray(features, dtype=np.float32))
+        return self.submit(features).result()
+
+    def _next_request(self, timeout=None):
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            return request
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self):
+        """
+        Block for the first request, then gather more until the batch is full
+        or the first request has waited max_wait.
+
+        :return: List of (features, future) pairs, or None once stopped.
+        """
+        first = self._next_request()
+        if first is None:
+            return None
+
+        batch, rows = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._next_request(timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # Finish this batch, stop on the next call
+                break
+            if rows + len(request[0]) > self.max_batch_size:
+                self._carry = request
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            try:
+                self.queue_depth.observe(self._queue.qsize())
+                self._dispatch(batch)
+            except Exception as e:
+                # One bad batch must not end the loop, or every later request waits forever
+                logging.exception(f"Micro-batcher failed to dispatch a batch: {e}")
+
+    def _dispatch(self, batch):
+        """
+        Run one forward pass for the batch and resolve every request's future.
+
+        :param batch: List of (features, future) pairs.
+        """
+        # Drop requests whose caller cancelled them; the others can no longer be cancelled
+        batch = [(features, future) for features, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            features = batch[0][0] if len(batch) == 1 else np.concatenate([f for f, _ in batch])
+            with self.batch_latency.time():
+                outputs = self.predict_fn(features)
+            results = self._scatter(batch, outputs, len(features))
+        except Exception as e:
+            logging.error(f"Error in batched prediction: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batch_count += 1
+        self.row_count += len(features)
+        self.fill_ratio.observe(min(len(features) / self.max_batch_size, 1.0))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    @staticmethod
+    def _scatter(batch, outputs, num_rows: int) -> list:
+        """
+        Split the batch outputs into each request's rows.
+
+        :param batch: List of (features, future) pairs.
+        :param outputs: Output rows for the concatenated features, or a dict of them.
+        :param num_rows: Number of rows in the batch.
+        :return: One result per request, in batch order.
+        """
+        arrays = outputs.values() if isinstance(outputs, dict) else [outputs]
+        if any(len(values) != num_rows for values in arrays):
+            raise ValueError(f"predict_fn returned a different number of rows than the {num_rows} it was given")
+
+        results, offset = [], 0
+        for request_features, _ in batch:
+            rows = slice(offset, offset + len(request_features))
+            if isinstance(outputs, dict):
+                results.append({name: values[rows] for name, values in outputs.items()})
+            else:
+                results.append(outputs[rows])
+            offset += len(request_features)
+        return results
+
+    def stop(self):
+        """
+        Stop the scheduler thread after the queued requests have been served.
+        """
+        with self._stop_lock:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put(None)
+        self._thread.join()
+
+    def snapshot(self) -> dict:
+        """
+        Return scheduler settings and metrics as a JSON-serializable dictionary.
+
+        :return: Dictionary with the current queue depth, batch counts and histograms.
+        """
+        return {
+            'max_wait_ms': self.max_wait * 1000.0,
+            'max_batch_size': self.max_batch_size,
+            'queue_depth': self._queue.qsize(),
+            'batch_count': self.batch_count,
+            'row_count': self.row_count,
+            'queue_depth_at_dispatch': self.queue_depth.snapshot(),
+            'batch_fill_ratio': self.fill_ratio.snapshot(),
+            'batch_latency_seconds': self.batch_latency.snapshot(),
+        }
@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from sensor.entity.config_entity import ServingConfig
+from sensor.components.transform import PreprocessingTransform
+from sensor.utils.model_outputs import CONCENTRATION_OUTPUT
+from sensor.utils.numpy_model import NumpyModel
+
+# Supported serving runtimes
+RUNTIMES = ('keras', 'numpy')
+
+
+def _get_mtime(path: str):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    def __init__(self, config: ServingConfig):
+        """
+        Holds a warm model and its preprocessing transform in memory and
+        reloads both when either file changes.
+
+        With runtime 'numpy' the model exported by the export stage is served
+        by the NumPy runtime and TensorFlow is never imported.
+
+        :param config: ServingConfig with the runtime, model/transform paths and warm-up settings.
+        """
+        if config.runtime not in RUNTIMES:
+            raise ValueError(f"Unsupported serving runtime '{config.runtime}'. Expected one of: {RUNTIMES}")
+        self.config = config
+        self.model_path = config.numpy_model_path if config.runtime == 'numpy' else config.model_path
+        self.model = None
+        self.transform = None
+        self.load_count = 0
+        self._mtimes = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Load the model (and transform, if present) from disk and warm the model up.
+
+        :return: The loaded Keras model or NumpyModel.
+        """
+        try:
+            with self._lock:
+                model_path = self.model_path
+                if not os.path.exists(model_path):
+                    raise FileNotFoundError(f"Model file not found at {model_path}")
+
+                mtimes = self._current_mtimes()
+                if self.model is not None and mtimes == self._mtimes:
+                    return self.model  # Another thread already loaded this version
+
+                start = time.perf_counter()
+                if self.config.runtime == 'numpy':
+                    model = NumpyModel.load(model_path)
+                else:
+                    import tensorflow as tf  # Only the Keras runtime needs TensorFlow
+                    model = tf.keras.models.load_model(model_path)
+                self._warm_up(model)
+
+                transform = None
+                if mtimes[1] is not None:
+                    transform = PreprocessingTransform.load(self.config.transform_path)
+                else:
+                    logging.warning(f"Preprocessing transform not found at {self.config.transform_path}")
+
+                # Swap in the new version only once it is fully loaded and warm
+                self.model = model
+                self.transform = transform
+                self._mtimes = mtimes
+                self._last_check = time.monotonic()
+                self.load_count += 1
+                logging.info(f"Model loaded and warmed from {model_path} in {time.perf_counter() - start:.2f}s")
+                return model
+        except Exception as e:
+            logging.error(f"Error loading model into registry: {e}")
+            raise
+
+    def _current_mtimes(self):
+        return _get_mtime(self.model_path), _get_mtime(self.config.transform_path)
+
+    def _warm_up(self, model):
+        """
+        Run a dummy batch through the model so the first request does not pay for setup.
+
+        :param model: Keras model or NumpyModel to warm up.
+        """
+        dummy = np.zeros((self.config.warmup_batch_size,) + tuple(model.input_shape[1:]), dtype=np.float32)
+        model(dummy, training=False)
+
+    def get_model(self):
+        """
+        Return the warm model, reloading it first if the files on disk have changed.
+
+        :return: The current Keras model or NumpyModel.
+        """
+        if self.model is None:
+            return self.load()
+
+        now = time.monotonic()
+        if now - self._last_check >= self.config.reload_check_interval:
+            self._last_check = now
+            mtimes = self._current_mtimes()
+            if mtimes[0] is None:
+                logging.warning(f"Model file {self.model_path} is missing; serving the loaded model.")
+            elif mtimes != self._mtimes:
+                logging.info("Model or transform file changed; reloading.")
+                return self.load()
+
+        return self.model
+
+    def get_transform(self) -> PreprocessingTransform:
+        """
+        Return the preprocessing transform that belongs to the current model.
+
+        :return: PreprocessingTransform instance.
+        """
+        self.get_model()
+        if self.transform is None:
+            raise FileNotFoundError(f"Preprocessing transform not found at {self.config.transform_path}")
+        return self.transform
+
+    def predict(self, features: np.ndarray):
+        """
+        Predict class probabilities (and concentrations, if the model has that head) with the warm model.
+
+        The model is called directly rather than through model.predict, which
+        skips its per-call setup and avoids tf.function retracing when several
+        request threads predict at once. Large inputs are split into chunks of
+        predict_batch_size rows.
+
+        :param features: Preprocessed feature matrix of shape (n_rows, num_features).
+        :return: Class probability matrix, or for a model with the concentration
+            head a dict of output arrays keyed by output name (see split_outputs).
+        """
+        model = self.get_model()
+        features = np.asarray(features, dtype=np.float32)
+        batch_size = self.config.predict_batch_size
+        chunks = [model(features[start:start + batch_size], training=False)
+                  for start in range(0, len(features), batch_size)]
+        if CONCENTRATION_OUTPUT in model.output_names:
+            return {name: np.concatenate([np.asarray(chunk[name]) for chunk in chunks]) for name in chunks[0]}
+        return np.concatenate([np.asarray(chunk) for chunk in chunks])
@@ -1,59 +1,271 @@
 import os
+import re
+import json
+import shutil
 import logging
-import pandas as pd
-import tensorflow as tf
+import tempfile
+import dataclasses
+import numpy as np
 from src.sensor.components.data_ingestion import DataIngestion
 from src.sensor.components.preprocessing import Preprocessing
 from sensor.config.configuration import Configuration
-from sensor.entity.config_entity import DataIngestionConfig, DataPreprocessingConfig
+from sensor.entity.config_entity import DataIngestionConfig, ServingConfig
+from sensor.components.transform import PreprocessingTransform
+from sensor.utils.model_outputs import split_outputs
+from sensor.utils.svmlight import parse_dense_svmlight
+
+# Leading "label[;concentration]" token of a row, or the empty string where a row has no label
+_LABEL = re.compile(rb'^(?![ \t\r]*(?:#|$))[ \t]*(?:[^\s:]+[ \t]+)?', re.MULTILINE)
+
+
+def _load_keras_model(model_path: str):
+    """
+    Load a Keras model, importing TensorFlow only when it is needed, so a
+    server that predicts through the registry's NumPy runtime never loads it.
+
+    :param model_path: Path to the .keras file.
+    :return: Keras model.
+    """
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+
+def parse_json_features(body: bytes, num_features: int) -> np.ndarray:
+    """
+    Parse feature rows from a JSON body.
+
+    Accepts {"features": [[...], ...]}, a list of rows, or a single row.
+
+    :param body: Raw request body.
+    :param num_features: Expected number of features per row.
+    :return: float32 array of shape (n_rows, num_features).
+    """
+    payload = json.loads(body)
+    if isinstance(payload, dict):
+        if 'features' not in payload:
+            raise ValueError("JSON body must contain a 'features' key.")
+        payload = payload['features']
+
+    try:
+        features = np.asarray(payload, dtype=np.float32)
+    except (TypeError, ValueError) as e:
+        # null, strings and ragged or nested rows
+        raise ValueError(f"Features must be rows of {num_features} numbers: {e}") from e
+    if not np.isfinite(features).all():
+        raise ValueError("Features must be finite numbers; null becomes NaN.")
+    if features.ndim == 1:
+        features = features.reshape(1, -1)
+    if features.ndim != 2 or features.shape[1] != num_features:
+        raise ValueError(f"Expected rows of {num_features} features, got shape {features.shape}")
+    return features
+
+
+def parse_float32_features(body: bytes, num_features: int) -> np.ndarray:
+    """
+    Parse feature rows from raw little-endian float32 bytes, row-major.
+
+    :param body: Raw request body.
+    :param num_features: Expected number of features per row.
+    :return: float32 array of shape (n_rows, num_features).
+    """
+    row_bytes = 4 * num_features
+    if not body or len(body) % row_bytes:
+        raise ValueError(f"Body length {len(body)} is not a multiple of {row_bytes} bytes ({num_features} float32 values).")
+    return np.frombuffer(body, dtype='<f4').reshape(-1, num_features).astype(np.float32)
+
+
+def parse_svmlight_features(body: bytes, num_features: int) -> np.ndarray:
+    """
+    Parse feature rows from svmlight text. A leading label token (e.g. "1" or
+    "1;10.0") is optional and ignored; indices are 1-based.
+
+    Uses the training data's parser, sensor.utils.svmlight.parse_dense_svmlight,
+    so dense rows are read by the pandas C tokenizer rather than token by token.
+
+    :param body: Raw request body.
+    :param num_features: Expected number of features per row.
+    :return: float32 array of shape (n_rows, num_features).
+    """
+    # The shared parser expects every row to have the same kind of label; the labels are unused here
+    features, _, _ = parse_dense_svmlight(_LABEL.sub(b'0 ', body), num_features)
+    if features.ndim != 2 or features.shape[1] != num_features:
+        raise ValueError(f"Expected rows of {num_features} features, got shape {features.shape}")
+    if not len(features):
+        raise ValueError("No svmlight rows found in request body.")
+    return features
+
+
+# Request content type -> parser
+FEATURE_PARSERS = {
+    'application/json': parse_json_features,
+    'application/octet-stream': parse_float32_features,
+    'text/plain': parse_svmlight_features,
+    'text/x-svmlight': parse_svmlight_features,
+}
+
+
+def parse_features(body: bytes, content_type: str, num_features: int) -> np.ndarray:
+    """
+    Parse a prediction request body according to its content type.
+
+    :param body: Raw request body.
+    :param content_type: Request mimetype.
+    :param num_features: Expected number of features per row.
+    :return: float32 array of shape (n_rows, num_features).
+    """
+    parser = FEATURE_PARSERS.get(content_type)
+    if parser is None:
+        raise ValueError(f"Unsupported content type '{content_type}'. Expected one of: {sorted(FEATURE_PARSERS)}")
+    return parser(body, num_features)
+
+
+class PredictionWorkspace:
+    def __init__(self, root_dir: str = "artifacts/predictions"):
+        """
+        Private scratch directory for a single prediction request.
+
+        Every request downloads, extracts and writes its output inside its own
+        directory, so concurrent requests never touch each other's files or the
+        training artifacts.
+
+        :param root_dir: Parent directory under which the workspace is created.
+        """
+        os.makedirs(root_dir, exist_ok=True)
+        self.path = os.path.abspath(tempfile.mkdtemp(prefix="request_", dir=root_dir))
+        self.local_data_file = os.path.join(self.path, "data.zip")
+        self.unzip_dir = os.path.join(self.path, "extracted")
+        self.output_file = os.path.join(self.path, "predicted_output.csv")
+
+    def cleanup(self):
+        """
+        Remove the workspace and everything in it. Safe to call more than once.
+        """
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+            logging.info(f"Removed prediction workspace {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
 
 class PredictionPipeline:
-    def __init__(self, source_url):
+    def __init__(self, source_url=None, model_registry=None, batcher=None):
+        """
+        :param source_url: URL of the zipped dataset to predict on. Not needed
+            for in-memory prediction with predict_features.
+        :param model_registry: Optional ModelRegistry holding a warm model. When
+            omitted, the model is loaded from disk for this run.
+        :param batcher: Optional MicroBatcher in front of the registry's model.
+            predict_features sends its rows through it so that small concurrent
+            requests share one forward pass.
+        """
         self.source_url = source_url
+        self.model_registry = model_registry
+        self.batcher = batcher
+        self.workspace = None
         self.config = Configuration()
 
-    def run_pipeline(self):
+    def _ingestion_config(self, workspace: PredictionWorkspace) -> DataIngestionConfig:
+        """
+        Ingestion config that downloads source_url into the workspace, with the
+        download settings of the training data ingestion.
+
+        Uploads go to the serving download cache, which is size-bounded, so
+        every distinct upload URL does not leave an archive on disk for good.
+
+        :param workspace: Scratch workspace for this request.
+        :return: DataIngestionConfig instance.
+        """
+        serving_config = ServingConfig.from_dict(self.config.get_serving_config())
+        return dataclasses.replace(
+            self.config.data_ingestion_config,
+            root_dir=workspace.path,
+            source_URL=self.source_url,
+            local_data_file=workspace.local_data_file,
+            unzip_dir=workspace.unzip_dir,
+            sha256=None,  # The configured checksum belongs to the training archive
+            cache_dir=serving_config.download_cache_dir,
+            cache_max_bytes=serving_config.download_cache_max_bytes,
+        )
+
+    def predict_features(self, features: np.ndarray):
+        """
+        Predict on raw feature rows in memory, without download, extraction or CSV round-trips.
+
+        :param features: Raw (untransformed) feature matrix of shape (n_rows, num_features).
+        :return: Tuple of (class labels 1-6, class probability matrix, concentration
+            vector or None if the model has no concentration head).
+        """
         try:
+            if self.model_registry is not None:
+                transform = self.model_registry.get_transform()
+                predictor = self.batcher if self.batcher is not None else self.model_registry
+                outputs = predictor.predict(transform.transform(features))
+            else:
+                transform = PreprocessingTransform.load(self.config.get_transform_path())
+                model_path = "artifacts/training/gas_classification_model_final.keras"
+                model = _load_keras_model(model_path)
+                outputs = model.predict(transform.transform(features), verbose=0)
+
+            probabilities, concentration = split_outputs(outputs)
+            labels = probabilities.argmax(axis=1) + 1  # Convert to class labels 1-6
+            return labels, probabilities, concentration
+        except Exception as e:
+            logging.error(f"Error in in-memory prediction: {e}")
+            raise
+
+    def run_pipeline(self, workspace: PredictionWorkspace = None):
+        """
+        Download, preprocess and predict on the dataset at source_url.
+
+        All files are written inside the given workspace. When no workspace is
+        passed, a new one is created and kept in self.workspace; the caller is
+        responsible for calling cleanup() once the output has been consumed.
+
+        :param workspace: Scratch workspace for this request.
+        :return: Path to the predictions CSV inside the workspace.
+        """
+        try:
+            if workspace is None:
+                workspace = PredictionWorkspace(self.config.get_serving_config().get('scratch_dir', 'artifacts/predictions'))
+            self.workspace = workspace
+
             # Step 1: Data Ingestion (Download and Extract)
-            # Generate the DataIngestionConfig dynamically without modifying the class
-            ingestion_config = DataIngestionConfig(
-                root_dir="artifacts/data_ingestion",
-                source_URL=self.source_url,
-                local_data_file="artifacts/data_ingestion/data.zip",
-                unzip_dir="artifacts/data_ingestion/extracted"
-            )
+            ingestion_config = self._ingestion_config(workspace)
             data_ingestion = DataIngestion(ingestion_config)
             data_ingestion.initiate_data_ingestion()
 
             # Step 2: Data Preprocessing
-            # Use the config to control the paths dynamically
-            preprocessing_config = DataPreprocessingConfig(
-                num_features=128,
-                feature_range=(0, 1),
-                preprocessed_dir="artifacts/preprocessed",
-                preprocessed_file="preprocessed_data.csv"
-            )
+            # Apply the transform fitted during training instead of refitting on the request data
+            # Parse in-process: forking worker processes from a threaded server with TF loaded is unsafe
+            preprocessing_config = dataclasses.replace(self.config.data_preprocessing_config, n_jobs=1)
             preprocessing = Preprocessing(preprocessing_config)
-            raw_data_dir = ingestion_config.unzip_dir  # Path to the extracted data
-            preprocessing.run(raw_data_dir)
+            raw_data = preprocessing.load_data(ingestion_config.raw_data_path)
 
-            # Step 3: Prediction
-            preprocessed_file = os.path.join(preprocessing_config.preprocessed_dir, preprocessing_config.preprocessed_file)
-            preprocessed_data = pd.read_csv(preprocessed_file)
+            if self.model_registry is not None:
+                transform = self.model_registry.get_transform()
+            else:
+                transform = PreprocessingTransform.load(self.config.get_transform_path())
+            preprocessed_data = transform.transform_frame(raw_data)
 
-            # Load the trained model
-            model_path = "artifacts/training/gas_classification_model_final.keras"
-            model = tf.keras.models.load_model(model_path)
-
-            # Extract features for prediction
-            feature_columns = [col for col in preprocessed_data.columns if 'feature' in col]
-            predictions = model.predict(preprocessed_data[feature_columns])
+            # Step 3: Prediction
+            features = preprocessed_data[transform.feature_columns].to_numpy()
+            if self.model_registry is not None:
+                outputs = self.model_registry.predict(features)
+            else:
+                # Load the trained model
+                model_path = "artifacts/training/gas_classification_model_final.keras"
+                model = _load_keras_model(model_path)
+                outputs = model.predict(features)
 
             # Add predictions to the DataFrame
-            preprocessed_data['prediction'] = predictions.argmax(axis=1) + 1  # Convert to class labels 1-6
+            self._add_predictions(preprocessed_data, outputs)
 
-            # Step 4: Save the predictions to CSV
-            prediction_output = os.path.join(preprocessing_config.preprocessed_dir, "predicted_output.csv")
+            # Step 4: Save the predictions to CSV inside the request workspace
+            prediction_output = workspace.output_file
             preprocessed_data.to_csv(prediction_output, index=False)
 
             logging.info(f"Predictions saved to {prediction_output}")
@@ -62,3 +274,68 @@ class PredictionPipeline:
         except Exception as e:
             logging.error(f"Error in prediction pipeline: {e}")
             raise
+
+    def stream_pipeline(self, workspace: PredictionWorkspace, chunk_rows: int = 10000):
+        """
+        Download the dataset at source_url and predict on it chunk by chunk.
+
+        Rows are read from the svmlight files chunk_rows at a time,
+        transformed with the saved transform, predicted and formatted as CSV,
+        so peak memory is bounded by the chunk size rather than the upload
+        size. Download, extraction and loading the model happen before this
+        method returns, so those errors are raised here and not mid-stream.
+
+        :param workspace: Scratch workspace for this request. It is removed
+            when the returned generator is exhausted or closed.
+        :param chunk_rows: Number of rows per chunk.
+        :return: Generator of CSV text chunks, starting with the header.
+        """
+        try:
+            self.workspace = workspace
+            ingestion_config = self._ingestion_config(workspace)
+            DataIngestion(ingestion_config).initiate_data_ingestion()
+
+            preprocessing = Preprocessing(self.config.data_preprocessing_config)
+            chunks = preprocessing.iter_data(ingestion_config.raw_data_path, chunk_rows)
+
+            if self.model_registry is not None:
+                transform = self.model_registry.get_transform()
+                predict = self.model_registry.predict
+            else:
+                transform = PreprocessingTransform.load(self.config.get_transform_path())
+                model = _load_keras_model("artifacts/training/gas_classification_model_final.keras")
+                predict = lambda features: model.predict(features, verbose=0)
+        except Exception as e:
+            logging.error(f"Error preparing streaming prediction: {e}")
+            workspace.cleanup()
+            raise
+
+        return self._stream_csv(chunks, transform, predict, workspace)
+
+    @staticmethod
+    def _add_predictions(data, outputs):
+        """
+        Add the predicted class label (1-6) and, if the model has that head, the predicted concentration.
+
+        :param data: DataFrame the prediction columns are added to.
+        :param outputs: Model outputs for its rows.
+        """
+        probabilities, concentration = split_outputs(outputs)
+        data['prediction'] = probabilities.argmax(axis=1) + 1  # Convert to class labels 1-6
+        if concentration is not None:
+            data['predicted_concentration'] = concentration
+
+    def _stream_csv(self, chunks, transform, predict, workspace):
+        try:
+            rows = 0
+            for index, chunk in enumerate(chunks):
+                preprocessed = transform.transform_frame(chunk)
+                self._add_predictions(preprocessed, predict(preprocessed[transform.feature_columns].to_numpy()))
+                rows += len(preprocessed)
+                yield preprocessed.to_csv(index=False, header=index == 0)
+            logging.info(f"Streamed predictions for {rows} rows.")
+        except Exception as e:
+            logging.error(f"Error in streaming prediction: {e}")
+            raise
+        finally:
+            workspace.cleanup()
@@ -2,6 +2,7 @@ import logging
 from sensor.config.configuration import Configuration
 from sensor.components.data_ingestion import DataIngestion
 from sensor.entity.config_entity import DataIngestionConfig
+from sensor.utils.instrumentation import instrument_stage
 
 
 STAGE_NAME = "Data Ingestion Stage"
@@ -12,8 +13,9 @@ class DataIngestionPipeline:
         Initializes the pipeline with configuration and data ingestion components.
         """
         self.config = Configuration()
-        self.data_ingestion_config = DataIngestionConfig(**self.config.get_data_ingestion_config())
+        self.data_ingestion_config = DataIngestionConfig.from_dict(self.config.get_data_ingestion_config())
     
+    @instrument_stage(STAGE_NAME)
     def main(self):
         """
         Main function that runs the entire data ingestion pipeline.
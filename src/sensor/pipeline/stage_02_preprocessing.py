@@ -2,6 +2,7 @@ import logging
 from sensor.config.configuration import Configuration
 from sensor.components.preprocessing import Preprocessing
 from sensor.entity.config_entity import DataPreprocessingConfig
+from sensor.utils.instrumentation import instrument_stage
 
 # Define the stage name for logging
 STAGE_NAME = "Data Preprocessing Stage"
@@ -15,28 +16,25 @@ class PreprocessingPipeline:
         preprocessing_config_dict = self.config.get_data_preprocessing_config()
         
         # Convert the dictionary to DataPreprocessingConfig object
-        self.preprocessing_config = DataPreprocessingConfig(
-            preprocessed_dir=preprocessing_config_dict['preprocessed_dir'],
-            preprocessed_file=preprocessing_config_dict['preprocessed_file'],
-            num_features=preprocessing_config_dict['num_features'],
-            feature_range=tuple(preprocessing_config_dict['feature_range'])
-        )
+        self.preprocessing_config = DataPreprocessingConfig.from_dict(preprocessing_config_dict)
     
+    @instrument_stage(STAGE_NAME)
     def main(self):
         """
         Main function that runs the entire preprocessing pipeline.
         """
         preprocessing = Preprocessing(config=self.preprocessing_config)
 
-        # Get data path from config and add the 'Dataset' subdirectory
-        data_path = self.config.get_data_ingestion_config().get('unzip_dir', '')
+        # The dataset zip, or the extraction directory when ingestion unpacks it
+        data_path = self.config.data_ingestion_config.raw_data_path
         raw_data = preprocessing.load_data(data_path)
 
         # Preprocess the data
         preprocessed_data = preprocessing.preprocess_data(raw_data)
 
-        # Save preprocessed data
+        # Save preprocessed data and the fitted transform used at inference time
         preprocessing.save_preprocessed_data(preprocessed_data)
+        preprocessing.save_transform()
         
         
 if __name__ == '__main__':
@@ -2,6 +2,7 @@ import logging
 from sensor.config.configuration import Configuration
 from sensor.components.prepare_base_model import PrepareBaseModel
 from sensor.entity.config_entity import ModelConfig
+from sensor.utils.instrumentation import instrument_stage
 
 # Define the stage name for logging
 STAGE_NAME = "Base Model Preparation Stage"
@@ -17,6 +18,7 @@ class PrepareBaseModelPipeline:
         # Convert the dictionary to a ModelConfig instance
         self.model_config = ModelConfig.from_dict(model_config_dict)  # Use from_dict method
 
+    @instrument_stage(STAGE_NAME)
     def main(self):
         """
         Main function that runs the entire model preparation pipeline.
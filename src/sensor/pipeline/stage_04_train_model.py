@@ -1,8 +1,9 @@
 import logging
-import pandas as pd
 from sensor.config.configuration import Configuration
 from sensor.components.train_model import TrainModel
 from sensor.entity.config_entity import ModelConfig
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.instrumentation import instrument_stage
 
 # Define the stage name for logging
 STAGE_NAME = "Model Training Stage"
@@ -29,6 +30,7 @@ class TrainModelPipeline:
         # Get training parameters
         self.training_config = self.config.get_training_params()  # Retrieve training parameters
 
+    @instrument_stage(STAGE_NAME)
     def main(self):
         """
         Main method to execute the model training process.
@@ -36,7 +38,7 @@ class TrainModelPipeline:
         try:
             # Load your training data
             data_path = self.config.get_training_data_path()  # Make sure this method exists
-            data = pd.read_csv(data_path)  # Load the data
+            data = load_artifact(data_path, self.config.get_artifact_format())  # Load the data
             
             # Log before starting training
             logging.info(f"Starting model training with config: {self.model_config} and training config: {self.training_config}")
@@ -1,10 +1,14 @@
 import os
 import logging
-import pandas as pd
 from sensor.config.configuration import Configuration
 from sensor.entity.config_entity import ModelConfig
 from sensor.components.evaluate_model import EvaluateModel 
 from sensor.utils.common import create_required_directories 
+from sensor.utils.artifact_io import load_artifact
+from sensor.utils.instrumentation import instrument_stage
+
+# Define the stage name for logging
+STAGE_NAME = "Model Evaluation Stage"
 
 class EvaluateModelPipeline:
     def __init__(self):
@@ -12,6 +16,7 @@ class EvaluateModelPipeline:
         self.model_config = self.config.get_model_config()
         logging.info(f"Model configuration loaded: {self.model_config}")
 
+    @instrument_stage(STAGE_NAME)
     def main(self):
         """
         Main function to execute evaluation.
@@ -24,19 +29,17 @@ class EvaluateModelPipeline:
         """
         try:
             # Load preprocessed data for evaluation
-            preprocessed_data_path = os.path.join("artifacts/preprocessed", "preprocessed_data.csv")
+            preprocessed_data_path = self.config.get_training_data_path()
             
             # Ensure the preprocessed data file exists
             if not os.path.exists(preprocessed_data_path):
-                logging.error(f"Preprocessed data file does not exist at: {preprocessed_data_path}")
-                return
+                raise FileNotFoundError(f"Preprocessed data file does not exist at: {preprocessed_data_path}")
 
-            data = pd.read_csv(preprocessed_data_path)
+            data = load_artifact(preprocessed_data_path, self.config.get_artifact_format())
 
             # Check if the loaded data is empty
             if data.empty:
-                logging.error("Loaded data is empty. Evaluation cannot proceed.")
-                return
+                raise ValueError("Loaded data is empty. Evaluation cannot proceed.")
 
             # Create necessary directories for saving evaluation results if needed
             create_required_directories()
@@ -46,8 +49,7 @@ class EvaluateModelPipeline:
             
             # Ensure the model file exists
             if not os.path.exists(model_path):
-                logging.error(f"Trained model file does not exist at: {model_path}")
-                return
+                raise FileNotFoundError(f"Trained model file does not exist at: {model_path}")
 
             # Instantiate the EvaluateModel class with the model path
             evaluator = EvaluateModel(model_config=self.model_config, data=data, model_path=model_path)
@@ -56,7 +58,9 @@ class EvaluateModelPipeline:
             evaluator.evaluate()
 
         except Exception as e:
+            # Re-raise so a failed evaluation is not recorded as a finished stage
             logging.error(f"An error occurred in the evaluate_model_pipeline function: {e}")
+            raise e
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -0,0 +1,53 @@
+import logging
+from sensor.config.configuration import Configuration
+from sensor.components.preprocessing import Preprocessing
+from sensor.components.walk_forward import WalkForwardTrainer
+from sensor.entity.config_entity import ModelConfig
+from sensor.utils.instrumentation import instrument_stage
+
+# Define the stage name for logging
+STAGE_NAME = "Walk-Forward Training Stage"
+
+class WalkForwardPipeline:
+    def __init__(self):
+        """
+        Initializes the pipeline with the model and walk-forward configuration.
+        """
+        self.config = Configuration()
+        self.model_config = ModelConfig.from_dict(self.config.get_model_config())
+        self.walk_forward_config = self.config.get_walk_forward_params()
+
+    @instrument_stage(STAGE_NAME)
+    def main(self):
+        """
+        Train on the batches up to k and validate on batch k+1 for every k, and
+        save the per-batch accuracy table. Folds start from the raw batches and
+        fit their own preprocessing.
+        """
+        try:
+            preprocessing_config = self.config.data_preprocessing_config
+            data = Preprocessing(preprocessing_config).load_data(self.config.data_ingestion_config.raw_data_path)
+
+            trainer = WalkForwardTrainer(self.model_config, self.walk_forward_config, data, preprocessing_config)
+            results = trainer.run()
+            trainer.save_results(results)
+
+            logging.info("Walk-forward training completed successfully.")
+        except Exception as e:
+            logging.error(f"Error occurred during walk-forward training: {e}")
+            raise e
+
+
+if __name__ == '__main__':
+    try:
+        logging.info(f"*******************")
+        logging.info(f">>>>>> Stage {STAGE_NAME} started <<<<<<")
+
+        walk_forward_pipeline = WalkForwardPipeline()
+        walk_forward_pipeline.main()
+
+        logging.info(f">>>>>> Stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
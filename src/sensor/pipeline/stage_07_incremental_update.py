@@ -0,0 +1,45 @@
+import argparse
+import logging
+from sensor.components.incremental_update import incremental_update
+from sensor.utils.instrumentation import instrument_stage
+
+# Define the stage name for logging
+STAGE_NAME = "Incremental Model Update Stage"
+
+class IncrementalUpdatePipeline:
+    def __init__(self, batch_file: str):
+        """
+        :param batch_file: Path to the newly arrived batch*.dat file.
+        """
+        self.batch_file = batch_file
+
+    @instrument_stage(STAGE_NAME)
+    def main(self):
+        """
+        Fine-tune the current model on the new batch and save it as a new version.
+        """
+        try:
+            version_path = incremental_update(self.batch_file)
+            logging.info(f"Incremental update completed successfully: {version_path}")
+        except Exception as e:
+            logging.error(f"Error occurred during incremental update: {e}")
+            raise e
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fine-tune the trained model on a new sensor batch.")
+    parser.add_argument("batch_file", help="Path to the new batch*.dat file")
+    args = parser.parse_args()
+
+    try:
+        logging.info(f"*******************")
+        logging.info(f">>>>>> Stage {STAGE_NAME} started <<<<<<")
+
+        incremental_update_pipeline = IncrementalUpdatePipeline(args.batch_file)
+        incremental_update_pipeline.main()
+
+        logging.info(f">>>>>> Stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
@@ -0,0 +1,35 @@
+import logging
+from sensor.components.export_model import export_model
+from sensor.utils.instrumentation import instrument_stage
+
+# Define the stage name for logging
+STAGE_NAME = "Model Export Stage"
+
+class ExportModelPipeline:
+    @instrument_stage(STAGE_NAME)
+    def main(self):
+        """
+        Export the trained model to NumPy weights and check that the NumPy
+        runtime reproduces the Keras predictions on preprocessed rows.
+        """
+        try:
+            export_model()
+            logging.info("Model export completed successfully.")
+        except Exception as e:
+            logging.error(f"Error occurred during model export: {e}")
+            raise e
+
+
+if __name__ == '__main__':
+    try:
+        logging.info(f"*******************")
+        logging.info(f">>>>>> Stage {STAGE_NAME} started <<<<<<")
+
+        export_model_pipeline = ExportModelPipeline()
+        export_model_pipeline.main()
+
+        logging.info(f">>>>>> Stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
@@ -0,0 +1,35 @@
+import logging
+from sensor.components.quantize_model import quantize_model
+from sensor.utils.instrumentation import instrument_stage
+
+# Define the stage name for logging
+STAGE_NAME = "Model Quantization Stage"
+
+class QuantizeModelPipeline:
+    @instrument_stage(STAGE_NAME)
+    def main(self):
+        """
+        Quantize the exported model to int8 and publish it only if its
+        accuracy stays within the configured drop of the float model.
+        """
+        try:
+            report = quantize_model()
+            logging.info(f"Model quantization completed successfully: accuracy drop {report['accuracy_drop']:.4f}")
+        except Exception as e:
+            logging.error(f"Error occurred during model quantization: {e}")
+            raise e
+
+
+if __name__ == '__main__':
+    try:
+        logging.info(f"*******************")
+        logging.info(f">>>>>> Stage {STAGE_NAME} started <<<<<<")
+
+        quantize_model_pipeline = QuantizeModelPipeline()
+        quantize_model_pipeline.main()
+
+        logging.info(f">>>>>> Stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
@@ -0,0 +1,35 @@
+import logging
+from sensor.components.hyperparameter_search import hyperparameter_search
+from sensor.utils.instrumentation import instrument_stage
+
+# Define the stage name for logging
+STAGE_NAME = "Hyperparameter Search Stage"
+
+class HyperparameterSearchPipeline:
+    @instrument_stage(STAGE_NAME)
+    def main(self):
+        """
+        Run the parallel hyperparameter search and export the best
+        configuration to best_hyperparameters.yaml.
+        """
+        try:
+            best = hyperparameter_search()
+            logging.info(f"Hyperparameter search completed successfully: {best}")
+        except Exception as e:
+            logging.error(f"Error occurred during hyperparameter search: {e}")
+            raise e
+
+
+if __name__ == '__main__':
+    try:
+        logging.info(f"*******************")
+        logging.info(f">>>>>> Stage {STAGE_NAME} started <<<<<<")
+
+        hyperparameter_search_pipeline = HyperparameterSearchPipeline()
+        hyperparameter_search_pipeline.main()
+
+        logging.info(f">>>>>> Stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+
+    except Exception as e:
+        logging.exception(e)
+        raise e
@@ -0,0 +1,156 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+# Columns that hold integer labels and are restored as integers by backends
+# that store every column as float32 (npy).
+INTEGER_COLUMNS = ('target', 'batch')
+
+# Every other artifact column is stored and loaded as float32
+FLOAT_DTYPE = np.float32
+
+
+def check_float32(data: pd.DataFrame, context: str):
+    """
+    Check that every non-integer column is float32, so no stage silently
+    doubles memory and bandwidth by widening to float64.
+
+    :param data: DataFrame crossing a stage boundary.
+    :param context: Where the check runs, for the error message.
+    """
+    wrong = {column: str(dtype) for column, dtype in data.dtypes.items()
+             if column not in INTEGER_COLUMNS and dtype != FLOAT_DTYPE}
+    if wrong:
+        shown = dict(list(wrong.items())[:5])
+        raise TypeError(f"{context}: expected float32 columns, found {len(wrong)} others: {shown}")
+
+
+def _write_csv(data: pd.DataFrame, path: str):
+    data.to_csv(path, index=False)
+
+
+def _read_csv(path: str, memory_map: bool) -> pd.DataFrame:
+    # Parse straight to float32 instead of pandas' float64 default
+    columns = pd.read_csv(path, nrows=0).columns
+    dtype = {column: FLOAT_DTYPE for column in columns if column not in INTEGER_COLUMNS}
+    return pd.read_csv(path, memory_map=memory_map, dtype=dtype)
+
+
+def _write_parquet(data: pd.DataFrame, path: str):
+    data.to_parquet(path, index=False)
+
+
+def _read_parquet(path: str, memory_map: bool) -> pd.DataFrame:
+    return pd.read_parquet(path, memory_map=memory_map)
+
+
+def _write_feather(data: pd.DataFrame, path: str):
+    # Uncompressed feather files can be memory-mapped without decoding
+    data.reset_index(drop=True).to_feather(path, compression='uncompressed')
+
+
+def _read_feather(path: str, memory_map: bool) -> pd.DataFrame:
+    from pyarrow import feather
+    return feather.read_table(path, memory_map=memory_map).to_pandas()
+
+
+def _write_npy(data: pd.DataFrame, path: str):
+    """
+    Store all columns as one C-contiguous float32 matrix. The column names are
+    kept in the structured dtype, whose fields are packed float32 so the file
+    can be viewed back as a plain 2D array.
+    """
+    values = np.ascontiguousarray(data.to_numpy(dtype=np.float32))
+    dtype = np.dtype([(str(column), '<f4') for column in data.columns])
+    np.save(path, values.view(dtype).reshape(-1))
+
+
+def _read_npy(path: str, memory_map: bool) -> pd.DataFrame:
+    records = np.load(path, mmap_mode='r' if memory_map else None)
+    columns = list(records.dtype.names)
+    values = records.view(np.float32).reshape(len(records), len(columns))
+
+    data = pd.DataFrame(values, columns=columns, copy=False)
+    for column in INTEGER_COLUMNS:
+        if column in data.columns:
+            data[column] = data[column].astype(int)
+    return data
+
+
+# Registered backends: format name -> (file extension, writer, reader)
+ARTIFACT_BACKENDS = {
+    'csv': ('.csv', _write_csv, _read_csv),
+    'parquet': ('.parquet', _write_parquet, _read_parquet),
+    'feather': ('.feather', _write_feather, _read_feather),
+    'npy': ('.npy', _write_npy, _read_npy),
+}
+
+
+def register_artifact_format(name: str, extension: str, writer, reader):
+    """
+    Register an additional artifact backend.
+
+    :param name: Format name used in config.yaml.
+    :param extension: File extension including the leading dot.
+    :param writer: Callable(data, path) that writes a DataFrame.
+    :param reader: Callable(path, memory_map) that returns a DataFrame.
+    """
+    ARTIFACT_BACKENDS[name] = (extension, writer, reader)
+
+
+def _get_backend(artifact_format: str):
+    try:
+        return ARTIFACT_BACKENDS[artifact_format]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported artifact format '{artifact_format}'. "
+            f"Expected one of: {sorted(ARTIFACT_BACKENDS)}"
+        )
+
+
+def get_artifact_path(directory: str, file_name: str, artifact_format: str) -> str:
+    """
+    Build the artifact path, replacing the file extension with the one of the format.
+
+    :param directory: Directory holding the artifact.
+    :param file_name: Artifact file name (its extension is ignored).
+    :param artifact_format: Artifact format name.
+    :return: Full artifact path.
+    """
+    extension = _get_backend(artifact_format)[0]
+    stem = os.path.splitext(file_name)[0]
+    return os.path.join(directory, stem + extension)
+
+
+def save_artifact(data: pd.DataFrame, path: str, artifact_format: str):
+    """
+    Write a DataFrame using the selected backend.
+
+    :param data: DataFrame to save.
+    :param path: Output file path.
+    :param artifact_format: Artifact format name.
+    """
+    writer = _get_backend(artifact_format)[1]
+    check_float32(data, f"Saving {path}")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    writer(data, path)
+    logging.info(f"Saved {artifact_format} artifact to {path}")
+
+
+def load_artifact(path: str, artifact_format: str, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Read a DataFrame using the selected backend.
+
+    :param path: Artifact file path.
+    :param artifact_format: Artifact format name.
+    :param memory_map: Memory-map the file where the backend supports it.
+    :return: Loaded DataFrame.
+    """
+    reader = _get_backend(artifact_format)[2]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Artifact not found at {path}")
+    data = reader(path, memory_map)
+    check_float32(data, f"Loading {path}")
+    logging.info(f"Loaded {artifact_format} artifact from {path}")
+    return data
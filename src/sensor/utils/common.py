@@ -1,5 +1,7 @@
 import os
+import yaml
 import logging
+from contextlib import contextmanager
 from sensor.config.configuration import Configuration
 
 def create_directories(paths: list):
@@ -46,3 +48,75 @@ def create_required_directories():
 
     # Create directories
     create_directories(paths_to_create)
+
+
+# Thread pool sizes of OpenMP and the BLAS libraries, read once when each library loads
+THREAD_ENV_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+@contextmanager
+def worker_thread_environment(threads: int):
+    """
+    Bound the OpenMP and BLAS threads of worker processes started inside the block.
+
+    A spawned worker loads NumPy and TensorFlow while it imports its
+    initializer's module, before the initializer runs, so setting these
+    variables in the worker is too late. Spawned processes inherit the
+    parent's environment, so they are set here and restored on exit.
+
+    :param threads: Threads per worker process.
+    """
+    previous = {variable: os.environ.get(variable) for variable in THREAD_ENV_VARIABLES}
+    os.environ.update({variable: str(threads) for variable in THREAD_ENV_VARIABLES})
+    try:
+        yield
+    finally:
+        for variable, value in previous.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+
+def _yaml_flow(value) -> str:
+    # Dump inside a list so scalars come out without the document end marker
+    return yaml.safe_dump([value], default_flow_style=True).strip()[1:-1]
+
+
+def update_yaml_section(file_path: str, section: str, values: dict):
+    """
+    Set keys of a top-level section in a YAML file, keeping the file's
+    layout and comments.
+
+    Existing "  key: value" lines are rewritten in place (their trailing
+    comment is kept); missing keys are appended to the end of the section.
+
+    :param file_path: YAML file to update.
+    :param section: Top-level section name, e.g. 'prepare_base_model'.
+    :param values: Key -> new value; values are written in YAML flow style.
+    """
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    start = next((i for i, line in enumerate(lines) if line.rstrip() == f"{section}:"), None)
+    if start is None:
+        raise KeyError(f"Section '{section}' not found in {file_path}")
+    end = start + 1
+    while end < len(lines) and (not lines[end].strip() or lines[end][0].isspace()):
+        end += 1
+    # Keep the blank lines that separate this section from the next one
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+
+    remaining = dict(values)
+    for i in range(start + 1, end):
+        line = lines[i]
+        key = line.strip().split(':', 1)[0]
+        if line.startswith('  ') and not line.startswith('   ') and key in remaining:
+            comment = line[line.index(' #') + 1:] if ' #' in line else ''
+            lines[i] = f"  {key}: {_yaml_flow(remaining.pop(key))}" + (f"  {comment}" if comment else '')
+    lines[end:end] = [f"  {key}: {_yaml_flow(value)}" for key, value in remaining.items()]
+
+    with open(file_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    logging.info(f"Updated {', '.join(values)} in section '{section}' of {file_path}")
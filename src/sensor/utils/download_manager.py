@@ -0,0 +1,417 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Read size for streaming and hashing
+STREAM_CHUNK_BYTES = 1 << 20
+
+# One lock per partial download file, so concurrent requests for the same URL
+# in this process wait for each other instead of writing the same file
+_part_locks = {}
+_part_locks_guard = threading.Lock()
+
+
+def _part_lock(part_path: str) -> threading.Lock:
+    with _part_locks_guard:
+        return _part_locks.setdefault(part_path, threading.Lock())
+
+
+class RemoteChangedError(Exception):
+    """
+    The remote file no longer matches the validator the partial download was started with.
+    """
+
+
+def _validator(etag: str, last_modified: str) -> str:
+    """
+    The value to send as If-Range: a strong ETag, else Last-Modified.
+    Weak ETags are not allowed in If-Range.
+    """
+    if etag and not etag.startswith('W/'):
+        return etag
+    return last_modified
+
+
+def _read_part_meta(part_path: str) -> dict:
+    try:
+        with open(part_path + '.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_part_meta(part_path: str, meta: dict):
+    with open(part_path + '.json', 'w') as f:
+        json.dump(meta, f)
+
+
+def _discard_part(part_path: str):
+    for path in (part_path, part_path + '.json'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def sha256_file(path: str) -> str:
+    """
+    SHA-256 of a file, read in chunks.
+
+    :param path: File path.
+    :return: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadManager:
+    def __init__(self, cache_dir: str, num_workers: int = 4, chunk_size: int = 8 << 20,
+                 max_retries: int = 3, timeout: float = 60.0, session: requests.Session = None,
+                 max_age: float = None, max_cache_bytes: int = None):
+        """
+        Download files into a local SHA-256 keyed cache.
+
+        Servers that accept range requests are fetched in parallel chunks,
+        and interrupted downloads resume from the bytes already on disk. Every
+        download is hashed and, if an expected digest is given, verified
+        before it is used. When the cache grows past max_cache_bytes, the
+        least recently used blobs are removed.
+
+        :param cache_dir: Directory for cached blobs, partial downloads and the URL index.
+        :param num_workers: Parallel range requests per download.
+        :param chunk_size: Size of each range request in bytes.
+        :param max_retries: Attempts per request before giving up.
+        :param timeout: Per-request timeout in seconds.
+        :param session: Optional requests.Session (e.g. for tests or proxies).
+        :param max_age: Seconds a cached download stays valid when the server offers
+            no ETag or Last-Modified to check it against; None keeps it indefinitely.
+        :param max_cache_bytes: Size limit of the cached blobs; None for no limit.
+        """
+        self.cache_dir = cache_dir
+        self.num_workers = max(1, num_workers)
+        self.chunk_size = chunk_size
+        self.max_retries = max(1, max_retries)
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.max_age = max_age
+        self.max_cache_bytes = max_cache_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._index_lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, 'sha256'), exist_ok=True)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'sha256', digest)
+
+    def _part_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest()[:16] + '.part')
+
+    def _load_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: dict):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _update_index(self, url: str, entry: dict):
+        with self._index_lock:
+            index = self._load_index()
+            index[url] = entry
+            self._write_index(index)
+
+    def _touch(self, url: str):
+        """
+        Record that url's cached blob was just used, for LRU eviction.
+        """
+        with self._index_lock:
+            index = self._load_index()
+            if url in index:
+                index[url]['used_at'] = time.time()
+                self._write_index(index)
+
+    def _evict(self, keep: str):
+        """
+        Remove least recently used blobs until the cache fits max_cache_bytes.
+
+        :param keep: Digest that must stay, i.e. the blob just downloaded.
+        """
+        if self.max_cache_bytes is None:
+            return
+        with self._index_lock:
+            index = self._load_index()
+            blob_dir = os.path.join(self.cache_dir, 'sha256')
+            sizes = {digest: os.path.getsize(os.path.join(blob_dir, digest)) for digest in os.listdir(blob_dir)}
+            # Blobs no URL points to anymore go first
+            last_used = dict.fromkeys(sizes, 0.0)
+            for entry in index.values():
+                if entry['sha256'] in last_used:
+                    last_used[entry['sha256']] = max(last_used[entry['sha256']], entry.get('used_at', 0.0))
+
+            total = sum(sizes.values())
+            for digest in sorted(last_used, key=last_used.get):
+                if total <= self.max_cache_bytes:
+                    break
+                if digest == keep:
+                    continue
+                os.remove(self._blob_path(digest))
+                total -= sizes[digest]
+                index = {url: entry for url, entry in index.items() if entry['sha256'] != digest}
+                logging.info(f"Evicted cached download {digest[:12]} ({sizes[digest]} bytes)")
+            self._write_index(index)
+
+    def _with_retries(self, description: str, func, *args):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return func(*args)
+            except (requests.RequestException, OSError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** (attempt - 1)
+                logging.warning(f"{description} failed ({e}); retry {attempt}/{self.max_retries - 1} in {delay}s")
+                time.sleep(delay)
+
+    def _probe(self, url: str) -> dict:
+        """
+        Ask the server for the size, validators and range support of url.
+        """
+        response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        response.raise_for_status()
+        headers = response.headers
+        length = headers.get('Content-Length')
+        return {
+            'url': response.url,
+            'size': int(length) if length and length.isdigit() else None,
+            'ranges': headers.get('Accept-Ranges', '').lower() == 'bytes',
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+
+    def _cached(self, url: str, expected_sha256: str, probe: dict):
+        """
+        Return the digest of a valid cached copy of url, or None.
+
+        A known digest is used directly. Otherwise the cache entry must have
+        the same ETag or Last-Modified and size as the server reports now,
+        so changed remote content is never served from the cache.
+
+        Without validators to compare (Google Drive, or a server that sends
+        none), the last download of url is used for up to max_age seconds.
+        A failed probe is never a hit for a URL that had validators before.
+        """
+        if expected_sha256:
+            return expected_sha256 if os.path.exists(self._blob_path(expected_sha256)) else None
+
+        entry = self._load_index().get(url)
+        if not entry or not os.path.exists(self._blob_path(entry['sha256'])):
+            return None
+        had_validators = bool(entry.get('etag') or entry.get('last_modified'))
+        if probe is None and had_validators:
+            return None
+        if probe is not None:
+            if probe.get('size') is not None and probe['size'] != entry.get('size'):
+                return None
+            validators = [key for key in ('etag', 'last_modified') if probe.get(key)]
+            if validators:
+                return None if any(entry.get(key) != probe[key] for key in validators) else entry['sha256']
+        if self.max_age is not None and time.time() - entry.get('fetched_at', 0.0) > self.max_age:
+            logging.info(f"Cached download of {url} is older than {self.max_age:g}s and cannot be revalidated; downloading again.")
+            return None
+        return entry['sha256']
+
+    def _fetch_range(self, url: str, part_path: str, start: int, end: int, validator: str):
+        headers = {'Range': f"bytes={start}-{end}"}
+        if validator:
+            headers['If-Range'] = validator
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if validator and response.status_code == 200:
+                raise RemoteChangedError(f"{url} changed while downloading range {start}-{end}")
+            if response.status_code != 206:
+                raise requests.HTTPError(f"Expected 206 for range {start}-{end}, got {response.status_code}")
+            offset = start
+            with open(part_path, 'r+b') as f:
+                for block in response.iter_content(STREAM_CHUNK_BYTES):
+                    f.seek(offset)
+                    f.write(block)
+                    offset += len(block)
+            if offset != end + 1:
+                raise requests.HTTPError(f"Range {start}-{end} ended early at byte {offset}")
+
+    def _download_ranges(self, url: str, part_path: str, size: int, validator: str):
+        """
+        Fetch url in parallel range requests into a preallocated part file.
+
+        Finished chunks and the server's validator are kept in a sidecar file,
+        so a rerun only fetches the rest. Chunks are only reused while the
+        validator is unchanged, and every request carries it as If-Range, so
+        chunks of two versions of the file are never mixed.
+        """
+        done = set()
+        progress = _read_part_meta(part_path)
+        if (validator and progress.get('validator') == validator and progress.get('size') == size
+                and progress.get('chunk_size') == self.chunk_size
+                and os.path.exists(part_path) and os.path.getsize(part_path) == size):
+            done = set(progress['done'])
+        else:
+            _discard_part(part_path)
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+
+        chunks = [start for start in range(0, size, self.chunk_size) if start not in done]
+        if done:
+            logging.info(f"Resuming download: {len(done)} chunks already on disk, {len(chunks)} remaining.")
+        lock = threading.Lock()
+
+        def fetch(start):
+            end = min(start + self.chunk_size, size) - 1
+            self._with_retries(f"Range {start}-{end}", self._fetch_range, url, part_path, start, end, validator)
+            with lock:
+                done.add(start)
+                _write_part_meta(part_path, {'validator': validator, 'size': size,
+                                             'chunk_size': self.chunk_size, 'done': sorted(done)})
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            list(executor.map(fetch, chunks))
+        os.remove(part_path + '.json')
+
+    def _download_stream(self, url: str, part_path: str):
+        """
+        Fetch url as a single stream.
+
+        An existing part file is resumed only if the validator it was started
+        with is known; it is sent as If-Range, so a server with a changed file
+        answers 200 and the download restarts from zero.
+        """
+        meta = _read_part_meta(part_path)
+        validator = meta.get('validator')
+        if 'done' in meta or not validator or not os.path.exists(part_path):
+            # A preallocated ranged part says nothing by its size, and without a validator nothing can be resumed safely
+            _discard_part(part_path)
+
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f"bytes={offset}-", 'If-Range': validator} if offset else {}
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and response.headers.get('Content-Range') == f"bytes */{offset}":
+                return  # Part file already holds the whole body
+            if response.status_code == 416:
+                _discard_part(part_path)
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                logging.info("Remote file changed or range ignored; restarting the download.")
+                offset = 0
+            elif offset:
+                logging.info(f"Resuming download at byte {offset}.")
+            if not offset:
+                _write_part_meta(part_path, {'validator': _validator(response.headers.get('ETag'),
+                                                                     response.headers.get('Last-Modified'))})
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for block in response.iter_content(STREAM_CHUNK_BYTES):
+                    f.write(block)
+
+    def _download_google_drive(self, url: str, part_path: str):
+        # Google Drive needs gdown for its confirmation page; gdown resumes from the part file
+        import gdown
+        gdown.download(url, part_path, quiet=False, resume=True, retries=self.max_retries - 1)
+
+    def download(self, url: str, output_path: str, expected_sha256: str = None) -> str:
+        """
+        Download url to output_path, reusing the cache when the content is known.
+
+        :param url: Source URL.
+        :param output_path: Destination file path.
+        :param expected_sha256: Optional SHA-256 the download must match.
+        :return: SHA-256 of the downloaded file.
+        """
+        expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        is_drive = 'drive.google.com' in (urlparse(url).hostname or '')
+
+        probe = None
+        if not is_drive:
+            try:
+                probe = self._with_retries(f"HEAD {url}", self._probe, url)
+            except requests.RequestException as e:
+                logging.warning(f"Could not probe {url} ({e}); downloading without range support.")
+
+        part_path = self._part_path(url)
+        with _part_lock(part_path):
+            digest = self._fetch(url, part_path, expected_sha256, probe, is_drive)
+
+        self._materialize(self._blob_path(digest), output_path)
+        return digest
+
+    def _fetch(self, url: str, part_path: str, expected_sha256: str, probe: dict, is_drive: bool) -> str:
+        """
+        Return the digest of url's content, downloading it into the cache unless a valid copy is there.
+        """
+        digest = self._cached(url, expected_sha256, probe)
+        if digest:
+            logging.info(f"Using cached download of {url} (sha256 {digest[:12]})")
+            self._touch(url)
+        else:
+            start = time.perf_counter()
+            try:
+                self._download(url, part_path, probe, is_drive)
+            except RemoteChangedError as e:
+                logging.info(f"{e}; starting over.")
+                _discard_part(part_path)
+                probe = self._with_retries(f"HEAD {url}", self._probe, url)
+                self._download(url, part_path, probe, is_drive)
+
+            digest = sha256_file(part_path)
+            if expected_sha256 and digest != expected_sha256:
+                _discard_part(part_path)
+                raise ValueError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {digest}")
+
+            os.replace(part_path, self._blob_path(digest))
+            _discard_part(part_path)
+            now = time.time()
+            self._update_index(url, {
+                'sha256': digest,
+                'size': os.path.getsize(self._blob_path(digest)),
+                'etag': probe.get('etag') if probe else None,
+                'last_modified': probe.get('last_modified') if probe else None,
+                'fetched_at': now,
+                'used_at': now,
+            })
+            self._evict(keep=digest)
+            logging.info(f"Downloaded {url} in {time.perf_counter() - start:.2f}s (sha256 {digest[:12]})")
+        return digest
+
+    def _download(self, url: str, part_path: str, probe: dict, is_drive: bool):
+        """
+        Download url into part_path with the best method the server supports.
+        """
+        if is_drive:
+            self._download_google_drive(url, part_path)
+        elif probe and probe['ranges'] and probe['size'] and probe['size'] > self.chunk_size:
+            validator = _validator(probe['etag'], probe['last_modified'])
+            self._download_ranges(probe['url'], part_path, probe['size'], validator)
+        else:
+            self._with_retries(f"GET {url}", self._download_stream, url, part_path)
+
+    @staticmethod
+    def _materialize(blob_path: str, output_path: str):
+        """
+        Place a cached blob at output_path, hard-linking when possible.
+        """
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(blob_path, output_path)
+        except OSError:
+            shutil.copyfile(blob_path, output_path)
@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+from sensor.entity.config_entity import InstrumentationConfig
+
+# Linux exposes the peak RSS in /proc and lets a process reset it, which
+# gives per-step peaks; elsewhere only the process-wide peak is available
+_STATUS_FILE = '/proc/self/status'
+_CLEAR_REFS_FILE = '/proc/self/clear_refs'
+
+
+def _read_peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MiB, since start or the last reset.
+    """
+    try:
+        with open(_STATUS_FILE) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024.0
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Reset the peak RSS to the current RSS, where the kernel supports it.
+
+    :return: True if the peak was reset.
+    """
+    try:
+        with open(_CLEAR_REFS_FILE, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _cpu_seconds() -> float:
+    """
+    CPU time of this process plus its finished child processes (parser and trial workers).
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _count_rows(value):
+    """
+    Row count of a DataFrame or array, or None for anything else.
+    """
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float, thread_id: int = None):
+        """
+        Statistical profiler that periodically records the call stack of one
+        thread, in the spirit of py-spy but running in-process.
+
+        Stacks are aggregated into the collapsed format ("outer;inner count"
+        per line) read by flamegraph.pl and speedscope.
+
+        :param interval: Seconds between samples.
+        :param thread_id: Thread to sample; defaults to the calling thread.
+        """
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def save(self, path: str):
+        """
+        Write the collapsed stacks, most frequent first.
+
+        :param path: Output file path.
+        """
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+
+class Instrumentation:
+    def __init__(self, config: InstrumentationConfig):
+        """
+        Records wall time, CPU time, peak RSS and throughput of pipeline
+        stages and of the steps they run.
+
+        Every finished stage and step is appended as one JSON line to
+        metrics_file. When a stage finishes, the stage profile, if profiling
+        is enabled, is written to profile_dir, and with log_to_mlflow its
+        own metrics and those of its steps are logged to MLflow as one run.
+
+        Steps are only recorded on the thread running a stage. Outside a
+        stage, for example in the web app, they cost one attribute check.
+
+        :param config: Instrumentation configuration.
+        """
+        self.config = config
+        self._stage = None
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def _begin(self, stage: str, step: str = None) -> dict:
+        if self._stack:
+            parent = self._stack[-1]
+            parent['_peak_rss_mb'] = max(parent['_peak_rss_mb'], _read_peak_rss_mb())
+        reset = _reset_peak_rss()
+        record = {
+            'stage': stage,
+            'step': step,
+            '_start': time.perf_counter(),
+            '_cpu': _cpu_seconds(),
+            '_peak_rss_mb': _read_peak_rss_mb(),
+            '_peak_reset': reset,
+            'rows': None,
+        }
+        self._stack.append(record)
+        return record
+
+    def _end(self, record: dict, status: str) -> dict:
+        self._stack.pop()
+        wall = time.perf_counter() - record.pop('_start')
+        peak = max(record.pop('_peak_rss_mb'), _read_peak_rss_mb())
+        if self._stack:
+            self._stack[-1]['_peak_rss_mb'] = max(self._stack[-1]['_peak_rss_mb'], peak)
+        rows = record['rows']
+        record.update(
+            timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            status=status,
+            wall_seconds=wall,
+            cpu_seconds=_cpu_seconds() - record.pop('_cpu'),
+            peak_rss_mb=peak,
+            # Without a peak reset the figure is the process peak so far, not the step's own
+            peak_rss_scope='step' if record.pop('_peak_reset') else 'process',
+            rows_per_second=rows / wall if rows and wall > 0 else None,
+        )
+        self._write(record)
+        return record
+
+    def _write(self, record: dict):
+        metrics_file = self.config.metrics_file
+        with self._lock:
+            os.makedirs(os.path.dirname(metrics_file) or '.', exist_ok=True)
+            with open(metrics_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def active(self) -> bool:
+        """
+        True when a stage is being recorded on the calling thread.
+        """
+        return self._stage is not None and self._stage['thread'] == threading.get_ident()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Record a pipeline stage. Nested stages are recorded as steps of the outer one.
+
+        :param name: Stage name.
+        """
+        if not self.config.enabled:
+            yield None
+            return
+        if self.active():
+            with self.step(name) as record:
+                yield record
+            return
+
+        profiler = self._start_profiler()
+        self._stage = {'name': name, 'thread': threading.get_ident(), 'steps': []}
+        record = self._begin(name)
+        status = 'failed'
+        try:
+            yield record
+            status = 'ok'
+        finally:
+            profile_path = self._stop_profiler(profiler, name)
+            record = self._end(record, status)
+            steps, self._stage = self._stage['steps'], None
+            logging.info(f"{name}: {record['wall_seconds']:.2f}s wall, {record['cpu_seconds']:.2f}s CPU, "
+                         f"peak RSS {record['peak_rss_mb']:.0f} MiB")
+            if self.config.log_to_mlflow:
+                self._log_to_mlflow(record, steps, profile_path)
+
+    @contextmanager
+    def step(self, name: str, rows: int = None):
+        """
+        Record a step of the running stage. The yielded record's 'rows' can
+        be set inside the block when the row count is only known later.
+
+        :param name: Step name, e.g. 'preprocess_data'.
+        :param rows: Number of rows processed, for rows_per_second.
+        """
+        if not self.config.enabled or not self.active():
+            yield {}
+            return
+        record = self._begin(self._stage['name'], name)
+        record['rows'] = rows
+        status = 'failed'
+        try:
+            yield record
+            status = 'ok'
+        finally:
+            self._stage['steps'].append(self._end(record, status))
+
+    def _start_profiler(self):
+        if self.config.profile == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.config.profile == 'sample':
+            profiler = SamplingProfiler(self.config.sample_interval)
+            profiler.start()
+            return profiler
+        return None
+
+    def _stop_profiler(self, profiler, stage: str) -> str:
+        """
+        Stop the profiler and write its output.
+
+        :return: Path of the profile, or None when profiling is off.
+        """
+        if profiler is None:
+            return None
+        slug = ''.join(c if c.isalnum() else '_' for c in stage.lower()).strip('_')
+        os.makedirs(self.config.profile_dir, exist_ok=True)
+        if isinstance(profiler, SamplingProfiler):
+            profiler.stop()
+            path = os.path.join(self.config.profile_dir, f"{slug}.folded")
+            profiler.save(path)
+        else:
+            profiler.disable()
+            path = os.path.join(self.config.profile_dir, f"{slug}.prof")
+            profiler.dump_stats(path)  # Read with pstats or snakeviz
+        logging.info(f"Wrote {self.config.profile} profile of {stage} to {path}")
+        return path
+
+    def _log_to_mlflow(self, record: dict, steps: list, profile_path: str):
+        """
+        Log a finished stage and its steps as one MLflow run. A failure here
+        is logged and ignored, so tracking problems never fail a stage.
+        """
+        metrics = ('wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'rows_per_second')
+        try:
+            import mlflow
+            with mlflow.start_run(run_name=f"{record['stage']} metrics"):
+                mlflow.set_tag('status', record['status'])
+                for metric in metrics:
+                    if record[metric] is not None:
+                        mlflow.log_metric(metric, record[metric])
+                # A step that runs several times is logged as a series
+                occurrences = {}
+                for step in steps:
+                    index = occurrences[step['step']] = occurrences.get(step['step'], -1) + 1
+                    for metric in metrics:
+                        if step[metric] is not None:
+                            mlflow.log_metric(f"{step['step']}.{metric}", step[metric], step=index)
+                if profile_path:
+                    mlflow.log_artifact(profile_path)
+        except Exception as e:
+            logging.warning(f"Could not log stage metrics of {record['stage']} to MLflow: {e}")
+
+
+_instrumentation = None
+
+
+def get_instrumentation() -> Instrumentation:
+    """
+    The process-wide Instrumentation, configured from the 'instrumentation'
+    section of config.yaml on first use.
+
+    Only stages (instrument_stage) create it. Steps run before that, for
+    example components used by the web app or in tests, are not recorded,
+    so importing and calling a component never reads config.yaml.
+    """
+    global _instrumentation
+    if _instrumentation is None:
+        from sensor.config.configuration import Configuration
+        _instrumentation = Instrumentation(InstrumentationConfig.from_dict(Configuration().get_instrumentation_config()))
+    return _instrumentation
+
+
+def instrument_stage(name: str):
+    """
+    Decorator recording every call of a pipeline's main() as a stage.
+
+    :param name: Stage name.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_instrumentation().stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_step(name: str, rows: int = None):
+    """
+    Record a step of the running stage as a context manager.
+
+    :param name: Step name.
+    :param rows: Number of rows processed, if known up front.
+    """
+    if _instrumentation is None:
+        return nullcontext({})
+    return _instrumentation.step(name, rows)
+
+
+def instrumented(name: str = None):
+    """
+    Decorator recording every call of a component method as a step.
+
+    The row count is taken from the result when it is a DataFrame or an
+    array, and otherwise from the first argument.
+
+    :param name: Step name; defaults to the function name.
+    """
+    def decorator(func):
+        step_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            instrumentation = _instrumentation
+            if instrumentation is None or not instrumentation.active():
+                return func(*args, **kwargs)
+            with instrumentation.step(step_name) as record:
+                result = func(*args, **kwargs)
+                rows = _count_rows(result)
+                if rows is None:
+                    rows = next((_count_rows(arg) for arg in args if _count_rows(arg) is not None), None)
+                record['rows'] = rows
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,85 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+# Default latency bucket upper bounds in seconds
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# Default bucket upper bounds for ratios in [0, 1], e.g. batch fill ratio
+DEFAULT_RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        """
+        Thread-safe fixed-bucket histogram.
+
+        :param buckets: Sorted bucket upper bounds. An overflow bucket is added.
+        """
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """
+        Record a single sample.
+
+        :param value: Observed value.
+        """
+        with self._lock:
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    self._counts[i] += 1
+                    break
+            self._count += 1
+            self._sum += value
+            self._min = min(self._min, value)
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict:
+        """
+        Return the current histogram state as a JSON-serializable dictionary.
+
+        :return: Dictionary with count, sum, mean, min, max and cumulative bucket counts.
+        """
+        with self._lock:
+            cumulative, running = {}, 0
+            for upper, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative['+Inf' if math.isinf(upper) else str(upper)] = running
+
+            return {
+                'count': self._count,
+                'sum': self._sum,
+                'mean': self._sum / self._count if self._count else None,
+                'min': self._min if self._count else None,
+                'max': self._max if self._count else None,
+                'buckets': cumulative,
+            }
+
+
+class LatencyHistogram(Histogram):
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        """
+        Histogram of durations in seconds.
+
+        :param buckets: Sorted bucket upper bounds in seconds. An overflow bucket is added.
+        """
+        super().__init__(buckets)
+
+    @contextmanager
+    def time(self):
+        """
+        Context manager that records the wall time of its block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
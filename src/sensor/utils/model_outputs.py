@@ -0,0 +1,37 @@
+import numpy as np
+
+# Output layer names; models with a concentration head return a dict keyed by these
+CLASSIFICATION_OUTPUT = 'gas_classification'
+CONCENTRATION_OUTPUT = 'concentration'
+
+# Class labels in the dataset are 1-6; the model's output units are 0-5
+LABEL_OFFSET = 1
+
+
+def has_concentration_output(model) -> bool:
+    """
+    Check whether a model has the concentration regression head.
+
+    :param model: Keras model or NumpyModel.
+    :return: True for a two-output model.
+    """
+    return CONCENTRATION_OUTPUT in model.output_names
+
+
+def split_outputs(outputs):
+    """
+    Separate model outputs into class probabilities and concentrations.
+
+    Accepts the output of a single-output model (an array) or of a model
+    with the concentration head (a dict keyed by output name), as NumPy
+    arrays or tensors.
+
+    :param outputs: Model outputs.
+    :return: Tuple of (class probability matrix, concentration vector or None).
+    """
+    if isinstance(outputs, dict):
+        concentration = outputs.get(CONCENTRATION_OUTPUT)
+        if concentration is not None:
+            concentration = np.asarray(concentration).reshape(-1)
+        return np.asarray(outputs[CLASSIFICATION_OUTPUT]), concentration
+    return np.asarray(outputs), None
@@ -0,0 +1,162 @@
+import os
+import json
+import numpy as np
+
+# Format version written by the exporter; bumped on incompatible changes
+NUMPY_MODEL_FORMAT = 1
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def _linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+# Keras activation name -> in-place NumPy implementation
+ACTIVATIONS = {'relu': _relu, 'softmax': _softmax, 'linear': _linear}
+
+# Layer types the runtime can evaluate
+LAYER_TYPES = ('Dense', 'Dropout', 'Rescaling')
+
+# Symmetric int8 range used for quantized weights and activations
+INT8_MAX = 127
+
+# Integer-valued float32 sums are exact below 2**24, so an int8 x int8 dot
+# product over up to this many inputs is computed exactly by a float32 GEMM
+MAX_EXACT_INT8_INPUTS = 2 ** 24 // (INT8_MAX * INT8_MAX)
+
+
+def quantize_int8(x: np.ndarray, scale) -> np.ndarray:
+    """
+    Symmetric int8 quantization: round(x / scale) clipped to [-127, 127].
+
+    :param x: float array.
+    :param scale: Scalar or array broadcastable to x.
+    :return: Quantized values, as float32 so they can feed a float32 GEMM.
+    """
+    q = np.multiply(x, np.float32(1.0 / scale), dtype=np.float32)
+    np.rint(q, out=q)
+    return np.clip(q, -INT8_MAX, INT8_MAX, out=q)
+
+
+class NumpyModel:
+    def __init__(self, layers: list, inputs: str, outputs: dict, input_shape: tuple, weights: dict):
+        """
+        Inference-only runtime for an exported Keras MLP, using nothing but NumPy.
+
+        The layer graph is evaluated in the exported (topological) order, so
+        the shared trunk runs once and feeds every output head. Calls mirror
+        a Keras model: one output gives an array, several give a dict keyed
+        by output name.
+
+        A Dense layer with an input_scale is int8-quantized: its kernel is
+        stored as int8 with one scale per output unit, and its input is
+        quantized with the calibrated input_scale before the product.
+
+        :param layers: Layer specs in evaluation order (name, type, input and type-specific fields).
+        :param inputs: Name of the input layer.
+        :param outputs: Output name -> name of the layer producing it.
+        :param input_shape: Model input shape, with None for the batch dimension.
+        :param weights: Array name -> array as stored (float32, or int8 for quantized kernels).
+        """
+        for layer in layers:
+            if layer['type'] not in LAYER_TYPES:
+                raise ValueError(f"Layer {layer['name']} of type {layer['type']} is not supported by the NumPy runtime.")
+        self.layers = layers
+        self.inputs = inputs
+        self.outputs = outputs
+        self.output_names = list(outputs)
+        self.input_shape = tuple(input_shape)
+        self.weights = weights
+        # int8 kernels hold exact integers in float32, so the products run on BLAS
+        self._arrays = {name: array.astype(np.float32, copy=False) for name, array in weights.items()}
+        # Per-unit factor turning the integer product of a quantized layer back into float32
+        self._rescale = {layer['name']: (np.float32(layer['input_scale']) * self._arrays[layer['kernel_scale']])
+                         for layer in layers if 'input_scale' in layer}
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyModel':
+        """
+        Load a model written by sensor.components.export_model.
+
+        :param path: Path to the .npz file.
+        :return: NumpyModel instance.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Exported model not found at {path}")
+        with np.load(path, allow_pickle=False) as bundle:
+            spec = json.loads(str(bundle['spec']))
+            weights = {name: bundle[name] for name in bundle.files if name != 'spec'}
+        if spec.get('format') != NUMPY_MODEL_FORMAT:
+            raise ValueError(f"Unsupported exported model format {spec.get('format')} in {path}")
+        input_shape = tuple(None if dim is None else int(dim) for dim in spec['input_shape'])
+        return cls(spec['layers'], spec['inputs'], spec['outputs'], input_shape, weights)
+
+    def save(self, path: str) -> str:
+        """
+        Write the layer graph and weights to a single .npz file.
+
+        :param path: Destination path.
+        :return: The path written.
+        """
+        spec = {
+            'format': NUMPY_MODEL_FORMAT,
+            'input_shape': list(self.input_shape),
+            'inputs': self.inputs,
+            'outputs': self.outputs,
+            'layers': self.layers,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, spec=np.array(json.dumps(spec)), **self.weights)
+        return path
+
+    def forward(self, features: np.ndarray) -> dict:
+        """
+        Run a forward pass and keep every layer's output.
+
+        :param features: float32 feature matrix of shape (n_rows, num_features).
+        :return: Layer name -> output array, including the input under its layer name.
+        """
+        activations = {self.inputs: np.asarray(features, dtype=np.float32)}
+        for layer in self.layers:
+            x = activations[layer['input']]
+            if layer['type'] == 'Dense':
+                kernel = self._arrays[layer['kernel']]
+                if 'input_scale' in layer:
+                    x = quantize_int8(x, layer['input_scale']) @ kernel
+                    x *= self._rescale[layer['name']]
+                else:
+                    x = x @ kernel
+                x += self._arrays[layer['bias']]
+                x = ACTIVATIONS[layer['activation']](x)
+            elif layer['type'] == 'Rescaling':
+                x = x * np.float32(layer['scale']) + np.float32(layer['offset'])
+            # Dropout is the identity at inference time
+            activations[layer['name']] = x
+        return activations
+
+    def predict(self, features: np.ndarray):
+        """
+        Run a forward pass.
+
+        :param features: float32 feature matrix of shape (n_rows, num_features).
+        :return: Output array, or a dict of output arrays for a multi-output model.
+        """
+        activations = self.forward(features)
+        results = {name: activations[layer] for name, layer in self.outputs.items()}
+        if len(results) == 1:
+            return next(iter(results.values()))
+        return results
+
+    def __call__(self, features: np.ndarray, training: bool = False):
+        return self.predict(features)
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+
+# Read size for hashing files
+HASH_CHUNK_BYTES = 1 << 20
+
+
+@dataclass
+class Stage:
+    """
+    A pipeline stage and everything its result depends on.
+
+    config_sections are (file, section) pairs, where file is 'config' for
+    config.yaml or 'params' for param.yaml.
+    """
+    name: str
+    run: Callable[[], None]
+    sources: List[str] = field(default_factory=list)
+    config_sections: List[Tuple[str, str]] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    outs: List[str] = field(default_factory=list)
+
+
+class StageCache:
+    def __init__(self, cache_file: str, config: dict, params: dict):
+        """
+        Content-addressed record of completed stages, so unchanged stages can be skipped.
+
+        A stage's fingerprint is the SHA-256 of its config sections, source
+        files and input files. A stage is skipped when its last recorded run
+        has the same fingerprint and its outputs still hash to the recorded
+        values.
+
+        :param cache_file: JSON file holding the stage records and file hashes.
+        :param config: Parsed config.yaml.
+        :param params: Parsed param.yaml.
+        """
+        self.cache_file = cache_file
+        self.sections = {'config': config or {}, 'params': params or {}}
+        self.state = {'stages': {}, 'files': {}}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file) as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable stage cache {cache_file}: {e}")
+
+    def _file_digest(self, path: str) -> str:
+        """
+        SHA-256 of a file. Hashes are memoized by (size, mtime), so unchanged
+        files are not re-read on every run.
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.state['files'].get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+        self.state['files'][key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def digest(self, path: str):
+        """
+        SHA-256 of a file or directory tree (relative paths and file contents), or None if missing.
+
+        :param path: File or directory path.
+        :return: Hex digest or None.
+        """
+        if os.path.isfile(path):
+            return self._file_digest(path)
+        if not os.path.isdir(path):
+            return None
+
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(self._file_digest(file_path).encode())
+        return digest.hexdigest()
+
+    def fingerprint(self, stage: Stage) -> str:
+        """
+        Hash everything the stage's result depends on.
+
+        :param stage: Stage definition.
+        :return: Hex digest.
+        """
+        inputs = {
+            'config': {f"{file}:{section}": self.sections[file].get(section) for file, section in stage.config_sections},
+            'sources': {path: self.digest(path) for path in stage.sources},
+            'deps': {path: self.digest(path) for path in stage.deps},
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_fresh(self, stage: Stage, fingerprint: str) -> bool:
+        """
+        Check whether the stage already ran with this fingerprint and its outputs are intact.
+
+        :param stage: Stage definition.
+        :param fingerprint: Current fingerprint of the stage.
+        :return: True if the stage can be skipped.
+        """
+        record = self.state['stages'].get(stage.name)
+        if not record or record['fingerprint'] != fingerprint:
+            return False
+        for path in stage.outs:
+            digest = self.digest(path)
+            if digest is None or digest != record['outs'].get(path):
+                return False
+        return True
+
+    def record(self, stage: Stage, fingerprint: str):
+        """
+        Store the fingerprint and output hashes of a completed stage.
+
+        :param stage: Stage definition.
+        :param fingerprint: Fingerprint the stage ran with.
+        """
+        self.state['stages'][stage.name] = {
+            'fingerprint': fingerprint,
+            'outs': {path: self.digest(path) for path in stage.outs},
+        }
+        self.save()
+
+    def save(self):
+        """
+        Write the cache file atomically.
+        """
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+
+def run_stages(stages: List[Stage], cache: StageCache, force: bool = False):
+    """
+    Run stages in order, skipping those whose inputs and outputs are unchanged.
+
+    The fingerprint is taken right before each stage runs, so a stage that
+    rewrites an upstream output also invalidates the stages after it.
+
+    :param stages: Ordered stage definitions.
+    :param cache: Stage cache.
+    :param force: Run every stage regardless of the cache.
+    """
+    for stage in stages:
+        fingerprint = cache.fingerprint(stage)
+        if not force and cache.is_fresh(stage, fingerprint):
+            logging.info(f"Skipping {stage.name}: inputs and outputs unchanged.")
+            continue
+
+        stage.run()
+        cache.record(stage, fingerprint)
+    cache.save()  # Keep file hashes computed for skipped stages
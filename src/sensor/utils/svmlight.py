@@ -0,0 +1,75 @@
+import io
+import re
+import logging
+import numpy as np
+import pandas as pd
+
+# Leading "label;concentration" token of a gas sensor row
+_CONCENTRATION = re.compile(rb'^(\s*[^\s;:]+);(\S+)', re.MULTILINE)
+
+# Separators of the svmlight layout, replaced by spaces for the tokenizer
+_SEPARATORS = bytes.maketrans(b':;', b'  ')
+
+
+def parse_dense_svmlight(raw: bytes, num_features: int):
+    """
+    Parse svmlight rows that list every feature, in order, into dense arrays.
+
+    Each line has the form "label[;concentration] 1:v 2:v ... N:v", as in
+    the gas sensor drift batch files. The separators are turned into spaces
+    and the text goes through the pandas C tokenizer in one pass, which
+    converts the values to float32 directly. Input that does not
+    fit this layout (missing indices, comments, qid fields) is parsed with
+    sklearn's generic svmlight reader instead.
+
+    :param raw: Contents of an svmlight file.
+    :param num_features: Number of features in the dataset.
+    :return: Tuple of (float32 array of shape (n_rows, num_features), label vector,
+        concentration vector or None if the rows carry none).
+    """
+    try:
+        return _parse_dense(raw, num_features)
+    except ValueError as e:
+        logging.warning(f"Input is not dense svmlight ({e}); falling back to the sklearn parser.")
+        return _parse_sklearn(raw, num_features)
+
+
+def _parse_dense(raw: bytes, num_features: int):
+    first_token = raw.split(None, 1)[0] if raw.strip() else b''
+    has_concentration = b';' in first_token
+    offset = 2 if has_concentration else 1
+
+    # Index:value pairs are read straight into float32; only label and concentration need float64
+    columns = offset + 2 * num_features
+    dtype = {column: np.float64 if column < offset else np.float32 for column in range(columns)}
+    table = pd.read_csv(
+        io.BytesIO(raw.translate(_SEPARATORS)), sep=r'\s+', header=None,
+        dtype=dtype, engine='c'
+    )
+    if table.shape[1] != columns:
+        raise ValueError(f"expected {num_features} index:value pairs per row, found {(table.shape[1] - offset) / 2:g}")
+
+    # Every row must list indices 1..num_features in order; a short row shows up as NaN here
+    indices = table.iloc[:, offset::2].to_numpy()
+    if not np.array_equal(indices, np.broadcast_to(np.arange(1, num_features + 1), indices.shape)):
+        raise ValueError("feature indices are missing or out of order")
+
+    features = table.iloc[:, offset + 1::2].to_numpy(dtype=np.float32)
+    concentration = table[1].to_numpy(dtype=np.float64) if has_concentration else None
+    return features, table[0].to_numpy(dtype=np.float64), concentration
+
+
+def _parse_sklearn(raw: bytes, num_features: int):
+    from sklearn.datasets import load_svmlight_file
+    concentration = None
+    if _CONCENTRATION.search(raw):
+        concentration = np.array([float(value) for _, value in _CONCENTRATION.findall(raw)])
+        raw = _CONCENTRATION.sub(rb'\1', raw)
+
+    # Indices are 1-based; 'auto' would silently shift every column of a file that uses index 0
+    data, target = load_svmlight_file(io.BytesIO(raw), n_features=num_features, dtype=np.float32, zero_based=False)
+    features = np.empty(data.shape, dtype=np.float32)
+    data.toarray(out=features)
+    if concentration is not None and len(concentration) != len(target):
+        raise ValueError("Some rows have a concentration and others do not.")
+    return features, target, concentration
@@ -0,0 +1,52 @@
+import os
+import dataclasses
+import pytest
+from werkzeug.test import EnvironBuilder
+
+
+@pytest.fixture
+def app_module(monkeypatch, tmp_path):
+    import app
+    monkeypatch.setattr(app, 'serving_config', dataclasses.replace(app.serving_config, scratch_dir=str(tmp_path)))
+    return app
+
+
+class FakePipeline:
+    """
+    Mirrors PredictionPipeline.stream_pipeline: the workspace is removed when the generator finishes.
+    """
+    def __init__(self, source_url, model_registry=None):
+        pass
+
+    def stream_pipeline(self, workspace, chunk_rows):
+        def chunks():
+            try:
+                yield 'prediction\n'
+                yield '1\n'
+            finally:
+                workspace.cleanup()
+        return chunks()
+
+
+def test_stream_closed_before_the_first_chunk_removes_the_workspace(app_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'PredictionPipeline', FakePipeline)
+    observed = lambda: sum(hist.snapshot()['count'] for hist in app_module.request_latency['/'].values())
+    before = observed()
+
+    # Call the WSGI app directly: the test client would already pull the first chunk
+    environ = EnvironBuilder(method='POST', data={'url': 'http://example.invalid/data.zip', 'stream': '1'}).get_environ()
+    body = app_module.app(environ, lambda status, headers, exc_info=None: None)
+    assert len(os.listdir(tmp_path)) == 1  # The request's workspace
+    body.close()  # Client went away before anything was sent
+
+    assert os.listdir(tmp_path) == []
+    assert observed() == before + 1
+
+
+def test_stream_read_to_the_end_removes_the_workspace(app_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'PredictionPipeline', FakePipeline)
+
+    response = app_module.app.test_client().post('/', data={'url': 'http://example.invalid/data.zip', 'stream': '1'})
+
+    assert response.get_data(as_text=True) == 'prediction\n1\n'
+    assert os.listdir(tmp_path) == []
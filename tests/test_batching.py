@@ -0,0 +1,125 @@
+import threading
+import numpy as np
+import pytest
+from sensor.pipeline.batching import MicroBatcher
+
+
+class RecordingModel:
+    """
+    Doubles its input, remembers the size of every batch and can hold a batch until released.
+    """
+    def __init__(self, dict_outputs=False):
+        self.batch_sizes = []
+        self.dict_outputs = dict_outputs
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, features):
+        self.batch_sizes.append(len(features))
+        self.entered.set()
+        self.release.wait(5)
+        if self.dict_outputs:
+            return {'gas_classification': features * 2, 'concentration': features[:, 0] + 1}
+        return features * 2
+
+
+def rows(value, count):
+    return np.full((count, 3), value, dtype=np.float32)
+
+
+@pytest.mark.parametrize('dict_outputs', [False, True])
+def test_concurrent_callers_get_their_own_rows(dict_outputs):
+    model = RecordingModel(dict_outputs)
+    batcher = MicroBatcher(model, max_wait_ms=200, max_batch_size=16)
+    callers = 8
+    start = threading.Barrier(callers)
+    results = {}
+
+    def call(caller):
+        start.wait()
+        results[caller] = batcher.predict(rows(caller, caller + 1))
+
+    threads = [threading.Thread(target=call, args=(caller,)) for caller in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    for caller in range(callers):
+        expected = rows(caller, caller + 1)
+        if dict_outputs:
+            np.testing.assert_array_equal(results[caller]['gas_classification'], expected * 2)
+            np.testing.assert_array_equal(results[caller]['concentration'], expected[:, 0] + 1)
+        else:
+            np.testing.assert_array_equal(results[caller], expected * 2)
+    assert sum(model.batch_sizes) == sum(range(1, callers + 1))
+    assert max(model.batch_sizes) <= 16
+    assert len(model.batch_sizes) < callers  # Requests were actually grouped
+
+
+def test_failed_batch_reaches_every_waiter():
+    def fail(features):
+        raise RuntimeError('model failed')
+
+    batcher = MicroBatcher(fail, max_wait_ms=200, max_batch_size=64)
+    futures = [batcher.submit(rows(value, 2)) for value in range(4)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match='model failed'):
+            future.result(timeout=5)
+    batcher.stop()
+
+
+def test_malformed_outputs_fail_the_batch_and_keep_the_scheduler_running():
+    def drop_a_row_from_batches(features):
+        outputs = features * 2
+        return outputs[:-1] if len(features) > 1 else outputs
+
+    batcher = MicroBatcher(drop_a_row_from_batches, max_wait_ms=200, max_batch_size=64)
+    futures = [batcher.submit(rows(value, 1)) for value in range(3)]
+
+    for future in futures:
+        with pytest.raises(ValueError, match='different number of rows'):
+            future.result(timeout=5)
+    np.testing.assert_array_equal(batcher.predict(rows(7, 1)), rows(7, 1) * 2)
+    batcher.stop()
+
+
+def test_stop_serves_queued_requests_first():
+    model = RecordingModel()
+    model.release.clear()
+    batcher = MicroBatcher(model, max_wait_ms=1, max_batch_size=4)
+
+    first = batcher.submit(rows(0, 1))
+    assert model.entered.wait(5)  # The scheduler is busy with the first request
+    queued = [batcher.submit(rows(value, 3)) for value in range(1, 5)]
+    stopper = threading.Thread(target=batcher.stop)
+    stopper.start()
+    model.release.set()
+    stopper.join(5)
+
+    assert not stopper.is_alive()
+    np.testing.assert_array_equal(first.result(timeout=0), rows(0, 1) * 2)
+    for value, future in enumerate(queued, start=1):
+        np.testing.assert_array_equal(future.result(timeout=0), rows(value, 3) * 2)
+    with pytest.raises(RuntimeError, match='stopped'):
+        batcher.submit(rows(9, 1))
+
+
+def test_cancelled_request_does_not_stop_the_scheduler():
+    model = RecordingModel()
+    model.release.clear()
+    batcher = MicroBatcher(model, max_wait_ms=1, max_batch_size=4)
+
+    first = batcher.submit(rows(0, 1))
+    assert model.entered.wait(5)  # The scheduler is busy, so the next request stays queued
+    cancelled = batcher.submit(rows(1, 1))
+    assert cancelled.cancel()
+    model.release.set()
+
+    np.testing.assert_array_equal(first.result(timeout=5), rows(0, 1) * 2)
+    np.testing.assert_array_equal(batcher.submit(rows(2, 1)).result(timeout=5), rows(2, 1) * 2)
+    assert model.batch_sizes == [1, 1]  # The cancelled request never reached the model
+    batcher.stop()
@@ -0,0 +1,26 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from sensor.utils.common import THREAD_ENV_VARIABLES, worker_thread_environment
+
+# Captured when a spawned worker imports this module, which is when it loads NumPy and its BLAS
+_ENV_AT_IMPORT = {variable: os.environ.get(variable) for variable in THREAD_ENV_VARIABLES}
+
+
+def _env_at_import():
+    return _ENV_AT_IMPORT
+
+
+def test_spawned_workers_import_with_bounded_threads(monkeypatch):
+    monkeypatch.setenv('OMP_NUM_THREADS', '7')
+    monkeypatch.delenv('OPENBLAS_NUM_THREADS', raising=False)
+
+    with worker_thread_environment(3), ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        worker_env = executor.submit(_env_at_import).result(timeout=60)
+
+    assert worker_env == {variable: '3' for variable in THREAD_ENV_VARIABLES}
+    # The parent's own settings are restored
+    assert os.environ['OMP_NUM_THREADS'] == '7'
+    assert 'OPENBLAS_NUM_THREADS' not in os.environ
@@ -0,0 +1,36 @@
+import os
+import shutil
+import dataclasses
+import pytest
+from sensor.config.configuration import Configuration
+from tests.conftest import ROOT
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    shutil.copytree(os.path.join(ROOT, 'config'), tmp_path / 'config')
+    shutil.copy(os.path.join(ROOT, 'param.yaml'), tmp_path / 'param.yaml')
+    return str(tmp_path / 'config' / 'config.yaml'), str(tmp_path / 'param.yaml')
+
+
+def test_cached_typed_configs_cannot_be_modified(config_files):
+    config = Configuration(*config_files)
+    n_jobs = config.data_preprocessing_config.n_jobs
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.data_preprocessing_config.n_jobs = 1
+
+    # Per-caller variants are derived copies and leave the shared instance alone
+    assert dataclasses.replace(config.data_preprocessing_config, n_jobs=1).n_jobs == 1
+    assert Configuration(*config_files).data_preprocessing_config.n_jobs == n_jobs
+
+
+def test_environment_override_reloads(config_files, monkeypatch):
+    epochs = Configuration(*config_files).model_training_config.epochs
+    monkeypatch.setenv('SENSOR_PARAM__MODEL_TRAINING__EPOCHS', str(epochs + 3))
+    assert Configuration(*config_files).model_training_config.epochs == epochs + 3
+
+
+def test_invalid_section_is_rejected(config_files, monkeypatch):
+    monkeypatch.setenv('SENSOR_PARAM__MODEL_TRAINING__EPOCHS', '0')
+    with pytest.raises(ValueError, match='model_training'):
+        Configuration(*config_files)
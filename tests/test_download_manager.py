@@ -0,0 +1,238 @@
+import os
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sensor.utils.download_manager import DownloadManager
+
+
+class Remote:
+    """
+    A file served over HTTP with ETag, Range and If-Range support.
+    """
+    def __init__(self, body: bytes):
+        self.requests = []
+        self.head_status = 200
+        self.stale_head_etag = None  # Reported by the next HEAD, as if the file changed right after it
+        self.send_validators = True
+        self.set(body)
+
+    def set(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+    def gets(self):
+        return [headers for method, headers in self.requests if method == 'GET']
+
+
+@pytest.fixture
+def remote():
+    remote = Remote(os.urandom(10_000))
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            remote.requests.append(('HEAD', dict(self.headers)))
+            self.send_response(remote.head_status)
+            self.send_header('Content-Length', str(len(remote.body)))
+            self.send_header('Accept-Ranges', 'bytes')
+            if remote.send_validators:
+                self.send_header('ETag', remote.stale_head_etag or remote.etag)
+            self.end_headers()
+            remote.stale_head_etag = None
+
+        def do_GET(self):
+            remote.requests.append(('GET', dict(self.headers)))
+            body, size = remote.body, len(remote.body)
+            byte_range = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if byte_range and (if_range is None or if_range == remote.etag):
+                start, _, end = byte_range[len('bytes='):].partition('-')
+                start, end = int(start), min(int(end) if end else size - 1, size - 1)
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f"bytes */{size}")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+                body = body[start:end + 1]
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            if remote.send_validators:
+                self.send_header('ETag', remote.etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    remote.url = f"http://127.0.0.1:{server.server_address[1]}/data.zip"
+    yield remote
+    server.shutdown()
+    server.server_close()
+
+
+def make_manager(tmp_path, chunk_size=1 << 20, **kwargs):
+    return DownloadManager(str(tmp_path / 'cache'), num_workers=2, chunk_size=chunk_size, max_retries=1, timeout=5,
+                           **kwargs)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_second_download_is_served_from_cache(remote, tmp_path):
+    manager = make_manager(tmp_path)
+    first = manager.download(remote.url, str(tmp_path / 'a.zip'))
+    second = manager.download(remote.url, str(tmp_path / 'b.zip'))
+
+    assert first == second == hashlib.sha256(remote.body).hexdigest()
+    assert read(tmp_path / 'b.zip') == remote.body
+    assert len(remote.gets()) == 1
+
+
+def test_failed_probe_is_not_a_hit_for_a_url_that_had_validators(remote, tmp_path):
+    manager = make_manager(tmp_path)
+    manager.download(remote.url, str(tmp_path / 'a.zip'))
+    remote.head_status = 405
+
+    manager.download(remote.url, str(tmp_path / 'b.zip'))
+
+    assert read(tmp_path / 'b.zip') == remote.body
+    assert len(remote.gets()) == 2
+
+
+def test_download_without_validators_is_reused_until_max_age(remote, tmp_path):
+    remote.send_validators = False
+    manager = make_manager(tmp_path, max_age=3600)
+    manager.download(remote.url, str(tmp_path / 'a.zip'))
+    remote.head_status = 405  # Like Google Drive, which is never probed
+
+    manager.download(remote.url, str(tmp_path / 'b.zip'))
+    assert len(remote.gets()) == 1
+
+    index_path = tmp_path / 'cache' / 'index.json'
+    index = json.loads(index_path.read_text())
+    index[remote.url]['fetched_at'] -= 7200
+    index_path.write_text(json.dumps(index))
+
+    manager.download(remote.url, str(tmp_path / 'c.zip'))
+    assert len(remote.gets()) == 2
+
+
+def test_least_recently_used_downloads_are_evicted(remote, tmp_path):
+    remote.send_validators = False  # Cache hits regardless of the changing remote body
+    manager = make_manager(tmp_path, max_cache_bytes=25_000)
+    digests = {}
+    for name in 'ab':
+        remote.set(os.urandom(10_000))
+        digests[name] = manager.download(f"{remote.url}?{name}", str(tmp_path / f"{name}.zip"))
+    manager.download(f"{remote.url}?a", str(tmp_path / 'a2.zip'))  # a is now more recent than b
+
+    remote.set(os.urandom(10_000))
+    digests['c'] = manager.download(f"{remote.url}?c", str(tmp_path / 'c.zip'))
+
+    blobs = set(os.listdir(tmp_path / 'cache' / 'sha256'))
+    assert blobs == {digests['a'], digests['c']}
+    assert f"{remote.url}?b" not in json.loads((tmp_path / 'cache' / 'index.json').read_text())
+    assert read(tmp_path / 'b.zip')  # Files already handed out stay intact
+
+
+def test_changed_remote_is_downloaded_again(remote, tmp_path):
+    manager = make_manager(tmp_path)
+    manager.download(remote.url, str(tmp_path / 'data.zip'))
+    remote.set(os.urandom(10_000))
+
+    digest = manager.download(remote.url, str(tmp_path / 'data.zip'))
+
+    assert digest == hashlib.sha256(remote.body).hexdigest()
+    assert read(tmp_path / 'data.zip') == remote.body
+
+
+def test_stream_resumes_a_truncated_part_file(remote, tmp_path):
+    manager = make_manager(tmp_path)
+    part_path = manager._part_path(remote.url)
+    with open(part_path, 'wb') as f:
+        f.write(remote.body[:4000])
+    with open(part_path + '.json', 'w') as f:
+        json.dump({'validator': remote.etag}, f)
+
+    manager.download(remote.url, str(tmp_path / 'data.zip'))
+
+    assert read(tmp_path / 'data.zip') == remote.body
+    assert remote.gets()[0]['Range'] == 'bytes=4000-'
+    assert remote.gets()[0]['If-Range'] == remote.etag
+    assert not os.path.exists(part_path) and not os.path.exists(part_path + '.json')
+
+
+def test_stream_restarts_when_the_remote_changed_since_the_part_was_written(remote, tmp_path):
+    manager = make_manager(tmp_path)
+    part_path = manager._part_path(remote.url)
+    with open(part_path, 'wb') as f:
+        f.write(remote.body[:4000])
+    with open(part_path + '.json', 'w') as f:
+        json.dump({'validator': remote.etag}, f)
+    remote.set(os.urandom(10_000))
+
+    manager.download(remote.url, str(tmp_path / 'data.zip'))
+
+    assert read(tmp_path / 'data.zip') == remote.body
+
+
+def test_ranged_download_resumes_only_missing_chunks(remote, tmp_path):
+    manager = make_manager(tmp_path, chunk_size=1000)
+    part_path = manager._part_path(remote.url)
+    with open(part_path, 'wb') as f:
+        f.write(remote.body[:5000] + bytes(5000))
+    with open(part_path + '.json', 'w') as f:
+        json.dump({'validator': remote.etag, 'size': 10_000, 'chunk_size': 1000, 'done': list(range(0, 5000, 1000))}, f)
+
+    manager.download(remote.url, str(tmp_path / 'data.zip'))
+
+    assert read(tmp_path / 'data.zip') == remote.body
+    assert sorted(headers['Range'] for headers in remote.gets()) == [
+        f"bytes={start}-{start + 999}" for start in range(5000, 10_000, 1000)
+    ]
+
+
+def test_ranged_download_discards_chunks_of_a_changed_remote(remote, tmp_path):
+    manager = make_manager(tmp_path, chunk_size=1000)
+    part_path = manager._part_path(remote.url)
+    with open(part_path, 'wb') as f:
+        f.write(remote.body[:5000] + bytes(5000))
+    with open(part_path + '.json', 'w') as f:
+        json.dump({'validator': remote.etag, 'size': 10_000, 'chunk_size': 1000, 'done': list(range(0, 5000, 1000))}, f)
+    remote.set(os.urandom(10_000))
+
+    manager.download(remote.url, str(tmp_path / 'data.zip'))
+
+    assert read(tmp_path / 'data.zip') == remote.body
+    assert len(remote.gets()) == 10
+
+
+def test_ranged_download_restarts_when_the_remote_changes_during_the_download(remote, tmp_path):
+    manager = make_manager(tmp_path, chunk_size=1000)
+    remote.stale_head_etag = '"previous"'
+
+    manager.download(remote.url, str(tmp_path / 'data.zip'))
+
+    assert read(tmp_path / 'data.zip') == remote.body
+    assert {headers['If-Range'] for headers in remote.gets()} == {'"previous"', remote.etag}
+
+
+def test_checksum_mismatch_is_rejected(remote, tmp_path):
+    manager = make_manager(tmp_path)
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        manager.download(remote.url, str(tmp_path / 'data.zip'), expected_sha256='0' * 64)
+
+    assert not os.path.exists(tmp_path / 'data.zip')
+    assert not os.path.exists(manager._part_path(remote.url))
+    assert os.listdir(tmp_path / 'cache' / 'sha256') == []
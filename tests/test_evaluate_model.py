@@ -0,0 +1,35 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from tests.conftest import ROOT
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    shutil.copytree(os.path.join(ROOT, 'config'), tmp_path / 'config')
+    shutil.copy(os.path.join(ROOT, 'param.yaml'), tmp_path / 'param.yaml')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_missing_inputs_fail_the_evaluation_stage(workdir):
+    from sensor.pipeline.stage_05_evaluate_model import EvaluateModelPipeline
+
+    # A failure must reach the stage runner, or the stage cache records it as done
+    with pytest.raises(FileNotFoundError, match='Preprocessed data'):
+        EvaluateModelPipeline().evaluate()
+
+
+def test_accuracy_with_classes_missing_from_the_data():
+    from sensor.components.evaluate_model import EvaluateModel
+
+    # Classes 2, 5 and 6 are absent, so a one-hot encoding of the target would renumber 3 and 4
+    target = np.array([1, 3, 4, 4, 1])
+    data = pd.DataFrame({'feature_1': np.zeros(len(target)), 'target': target})
+    outputs = np.eye(6, dtype=np.float32)[target - 1]
+
+    evaluator = EvaluateModel(model_config=None, data=data, model_path='unused.keras')
+    assert evaluator.accuracy(outputs) == 1.0
+    assert evaluator.accuracy({'gas_classification': outputs, 'concentration': np.zeros(len(target))}) == 1.0
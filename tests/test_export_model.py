@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from sensor.entity.config_entity import ModelConfig
+from sensor.utils.model_outputs import CLASSIFICATION_OUTPUT, CONCENTRATION_OUTPUT
+from sensor.utils.numpy_model import NumpyModel
+
+MODEL_CONFIG = ModelConfig(input_shape=(16,), save_dir='unused', optimizer='adam',
+                           classification_loss='sparse_categorical_crossentropy', drift_loss='mean_squared_error',
+                           classification_metric='accuracy', drift_metric='mse', hidden_units=(32, 16))
+
+
+def build_model(concentration_output: bool):
+    import tensorflow as tf
+    from sensor.components.prepare_base_model import PrepareBaseModel
+
+    tf.keras.utils.set_random_seed(0)
+    return PrepareBaseModel(MODEL_CONFIG).build_gas_classification_model((16,), concentration_output)
+
+
+@pytest.mark.parametrize('concentration_output', [False, True], ids=['classification', 'concentration_head'])
+def test_exported_model_matches_keras(concentration_output, tmp_path):
+    from sensor.components.export_model import ExportModel
+
+    model = build_model(concentration_output)
+    features = np.random.default_rng(1).uniform(-1, 1, size=(64, 16)).astype(np.float32)
+    exporter = ExportModel({'output_path': str(tmp_path / 'model.npz')})
+
+    exporter.export(model)
+    actual = NumpyModel.load(exporter.output_path).predict(features)
+    expected = model.predict(features, verbose=0)
+
+    if concentration_output:
+        assert set(actual) == {CLASSIFICATION_OUTPUT, CONCENTRATION_OUTPUT}
+        for name in actual:
+            np.testing.assert_allclose(actual[name], expected[name], rtol=1e-5, atol=1e-5)
+    else:
+        assert actual.shape == (64, 6)
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
+    assert exporter.verify(model, features) < 1e-4
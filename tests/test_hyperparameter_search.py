@@ -0,0 +1,70 @@
+import sys
+import subprocess
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from sensor.entity.config_entity import ModelConfig
+from sensor.components import hyperparameter_search
+from sensor.components.hyperparameter_search import HyperparameterSearch, TrialPruner
+from tests.conftest import ROOT
+
+MODEL_CONFIG = ModelConfig(input_shape=(4,), save_dir='unused', optimizer='adam',
+                           classification_loss='sparse_categorical_crossentropy', drift_loss='mean_squared_error',
+                           classification_metric='accuracy', drift_metric='mse', hidden_units=(8,))
+
+
+def test_import_does_not_load_tensorflow_or_mlflow():
+    code = ("import sys, sensor.components.hyperparameter_search; "
+            "print(sorted({'tensorflow', 'mlflow'} & set(sys.modules)))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env={'PYTHONPATH': f"{ROOT}/src"},
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == '[]'
+
+
+def test_save_best_writes_the_artifact_and_leaves_the_config_alone(tmp_path):
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text('prepare_base_model:\n  dropout_rate: 0.3\n')
+    search_config = {'search_space': {'dropout_rate': {'low': 0.1, 'high': 0.5}, 'batch_size': [32, 64]},
+                     'output_file': str(tmp_path / 'best_hyperparameters.yaml')}
+    table = pd.DataFrame({'trial': [0, 1, 2], 'dropout_rate': [0.2, 0.4, 0.1], 'batch_size': [32, 64, 32],
+                          'val_accuracy': [0.8, 0.9, 0.95], 'state': ['complete', 'complete', 'pruned']})
+
+    sections = HyperparameterSearch(MODEL_CONFIG, search_config, {}, None).save_best(table, str(config_file))
+
+    assert sections == {'prepare_base_model': {'dropout_rate': 0.4}, 'model_training': {'batch_size': 64}}
+    assert yaml.safe_load((tmp_path / 'best_hyperparameters.yaml').read_text())['trial'] == 1
+    assert config_file.read_text() == 'prepare_base_model:\n  dropout_rate: 0.3\n'
+
+
+def test_pruner_stops_a_trial_below_its_peers():
+    histories = {0: [0.9, 0.9], 1: [0.8, 0.85], 2: [0.7, 0.8]}
+    pruner = TrialPruner(3, histories, 'val_accuracy', warmup_epochs=2, min_trials=3)
+
+    assert not pruner.on_epoch_end(0, {'val_accuracy': 0.1})
+    assert pruner.on_epoch_end(1, {'val_accuracy': 0.2})
+    assert histories[3] == [0.1, 0.2]
+
+
+def test_trial_trains_and_logs_to_the_file_store(tmp_path, monkeypatch):
+    import mlflow
+
+    monkeypatch.setenv('MLFLOW_ALLOW_FILE_STORE', 'true')
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    experiment_id = mlflow.create_experiment('test')
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(64, 4)).astype(np.float32)
+    y = (X[:, 0] > 0).astype(np.int64)
+    monkeypatch.setattr(hyperparameter_search, '_worker_state', dict(
+        model_config=MODEL_CONFIG, config={'epochs': 2, 'pruning': {'warmup_epochs': 1, 'min_trials': 1}},
+        X_train=X[:48], y_train=y[:48], X_val=X[48:], y_val=y[48:], histories={0: [1.0, 1.0]},
+        experiment_id=experiment_id, parent_run_id='',
+    ))
+
+    result = hyperparameter_search._run_trial(1, {'batch_size': 16})
+
+    # Trial 0 scored perfectly, so trial 1 is pruned after its first epoch
+    assert (result['state'], result['epochs']) == ('pruned', 1)
+    assert 0 <= result['val_accuracy'] <= 1
@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+
+from sensor.entity.config_entity import InstrumentationConfig
+from sensor.utils import instrumentation
+from sensor.utils.instrumentation import Instrumentation, instrument_stage, instrument_step, instrumented
+
+
+@instrumented()
+def scale(values):
+    return values * 2
+
+
+def test_steps_without_instrumentation_do_not_read_the_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, '_instrumentation', None)
+    monkeypatch.chdir(tmp_path)  # No config/config.yaml here
+
+    assert scale(np.ones(3)).tolist() == [2.0, 2.0, 2.0]
+    with instrument_step('fit', rows=3) as step:
+        step['rows'] = 3
+
+    assert instrumentation._instrumentation is None
+
+
+def test_stage_records_its_steps_to_the_metrics_file(tmp_path, monkeypatch):
+    metrics_file = tmp_path / 'stage_metrics.jsonl'
+    config = InstrumentationConfig(metrics_file=str(metrics_file))
+    monkeypatch.setattr(instrumentation, '_instrumentation', Instrumentation(config))
+
+    @instrument_stage('Test stage')
+    def main():
+        scale(np.ones(5))
+
+    main()
+
+    records = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    assert [(record['stage'], record['step'], record['rows']) for record in records] == [
+        ('Test stage', 'scale', 5),
+        ('Test stage', None, None),
+    ]
+    assert not config.log_to_mlflow
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from sensor.pipeline.prediction import parse_features, parse_json_features, parse_svmlight_features
+
+
+def test_svmlight_rows_with_and_without_labels():
+    body = b"1;10.0 1:0.5 2:-1.5 3:2 4:1e3\n3 1:1 2:2 3:3 4:4\n1:-1 2:-2 3:-3 4:-4\n"
+
+    features = parse_svmlight_features(body, 4)
+
+    assert features.dtype == np.float32
+    np.testing.assert_array_equal(features, [[0.5, -1.5, 2, 1000], [1, 2, 3, 4], [-1, -2, -3, -4]])
+
+
+def test_sparse_svmlight_rows_are_filled_with_zeros():
+    features = parse_features(b"# header\r\n1:0.5 4:2.5\r\n\r\n", 'text/x-svmlight', 4)
+
+    np.testing.assert_array_equal(features, [[0.5, 0, 0, 2.5]])
+
+
+@pytest.mark.parametrize('body', [
+    b"1 1:0.5 5:1.0\n",  # Index past num_features
+    b"1 0:0.5 1:1.0\n",  # Indices are 1-based
+    b"",
+])
+def test_invalid_svmlight_rows_are_rejected(body):
+    with pytest.raises(ValueError):
+        parse_svmlight_features(body, 4)
+
+
+@pytest.mark.parametrize('payload', [
+    {'features': None},
+    {'features': [[1, 2, None, 4]]},
+    {'features': [[1, 2, 3, 4], [1, 2]]},
+    {'features': [[[1, 2], [3, 4]]]},
+    {'features': [['a', 'b', 'c', 'd']]},
+])
+def test_malformed_json_features_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        parse_json_features(json.dumps(payload).encode(), 4)
+
+
+def test_predict_returns_400_for_null_features(monkeypatch):
+    import app
+
+    class Registry:
+        load_count = 0
+
+        def get_transform(self):
+            return type('Transform', (), {'feature_columns': ['a', 'b', 'c', 'd']})()
+
+    monkeypatch.setattr(app, 'model_registry', Registry())
+
+    response = app.app.test_client().post('/predict', json={'features': [[1, None, 3, 4]]})
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
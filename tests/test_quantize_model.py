@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor.components.evaluate_model import EvaluateModel
+from sensor.components.quantize_model import QuantizeModel
+from sensor.utils.model_outputs import LABEL_OFFSET
+from sensor.utils.numpy_model import INT8_MAX, NumpyModel, quantize_int8
+
+NUM_FEATURES = 16
+
+
+def random_model(path, seed=0) -> NumpyModel:
+    """
+    Float MLP shaped like PrepareBaseModel's, with He-initialized random weights.
+    """
+    rng = np.random.default_rng(seed)
+    layers, weights, previous, inputs = [], {}, 'input', NUM_FEATURES
+    for name, units, activation in (('dense', 32, 'relu'), ('dense_1', 16, 'relu'), ('classification', 6, 'softmax')):
+        layers.append({'name': name, 'type': 'Dense', 'input': previous, 'activation': activation,
+                       'kernel': f"{name}/kernel", 'bias': f"{name}/bias"})
+        weights[f"{name}/kernel"] = (rng.normal(size=(inputs, units)) * np.sqrt(2 / inputs)).astype(np.float32)
+        weights[f"{name}/bias"] = rng.normal(scale=0.1, size=units).astype(np.float32)
+        previous, inputs = name, units
+    model = NumpyModel(layers, 'input', {'classification': 'classification'}, (None, NUM_FEATURES), weights)
+    model.save(str(path))
+    return model
+
+
+def features(rows=2000, seed=1) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-1, 1, size=(rows, NUM_FEATURES)).astype(np.float32)
+
+
+def test_quantize_int8_rounds_and_clips():
+    x = np.array([-2.0, -0.26, 0.0, 0.24, 0.26, 1.27, 5.0], dtype=np.float32)
+
+    q = quantize_int8(x, 0.01)
+
+    assert q.dtype == np.float32
+    np.testing.assert_array_equal(q, [-INT8_MAX, -26, 0, 24, 26, 127, INT8_MAX])
+
+
+def test_int8_outputs_stay_close_to_the_float_model(tmp_path):
+    float_model = random_model(tmp_path / 'float.npz')
+    X = features()
+
+    int8_model = QuantizeModel({}).quantize(float_model, X[:500])
+    int8_model.save(str(tmp_path / 'int8.npz'))
+    reloaded = NumpyModel.load(str(tmp_path / 'int8.npz'))
+
+    expected, actual = float_model.predict(X), reloaded.predict(X)
+    assert reloaded.weights['dense/kernel_int8'].dtype == np.int8
+    assert np.max(np.abs(actual - expected)) < 0.05  # Probabilities
+    assert np.mean(actual.argmax(axis=1) == expected.argmax(axis=1)) > 0.95
+
+
+@pytest.mark.parametrize('calibration_percentile, published', [(99.99, True), (1.0, False)])
+def test_accuracy_gate(calibration_percentile, published, tmp_path, monkeypatch):
+    import mlflow
+
+    monkeypatch.setenv('MLFLOW_ALLOW_FILE_STORE', 'true')
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    float_model = random_model(tmp_path / 'float.npz')
+    X = features()
+    # Labelled with the float model's own predictions, so it scores 1.0
+    data = pd.DataFrame(X, columns=[f"feature_{i + 1}" for i in range(NUM_FEATURES)])
+    data['target'] = float_model.predict(X).argmax(axis=1) + LABEL_OFFSET
+    quantizer = QuantizeModel({
+        'float_model_path': str(tmp_path / 'float.npz'),
+        'output_path': str(tmp_path / 'int8.npz'),
+        'report_file': str(tmp_path / 'report.json'),
+        # A 1st-percentile activation range clips almost every input, which wrecks the int8 model
+        'calibration_percentile': calibration_percentile,
+        'max_accuracy_drop': 0.02,
+    })
+    evaluator = EvaluateModel(model_config=None, data=data, model_path=quantizer.float_model_path)
+
+    if published:
+        report = quantizer.run(evaluator)
+        assert report['accuracy_drop'] <= 0.02
+        assert (tmp_path / 'int8.npz').exists()
+    else:
+        with pytest.raises(ValueError, match='not publishing'):
+            quantizer.run(evaluator)
+        assert not (tmp_path / 'int8.npz').exists()
+    report = json.loads((tmp_path / 'report.json').read_text())
+    assert report['published'] is published
+    assert report['float32']['accuracy'] == 1.0
+    assert sorted(path.name for path in tmp_path.glob('*.npz')) == ['float.npz'] + ['int8.npz'] * published
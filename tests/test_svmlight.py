@@ -0,0 +1,46 @@
+import logging
+import numpy as np
+import pytest
+from sensor.utils.svmlight import _parse_dense, _parse_sklearn, parse_dense_svmlight
+from benchmarks.synthetic import make_svmlight_bytes
+
+ROWS_WITH_CONCENTRATION = (
+    b"1;10.00 1:15596.162100 2:1.868245 3:-2.371604e+00 4:0.5\n"
+    b"2;50.000000 1:26402.0704 2:2.532401 3:4.0 4:-0.000012\n"
+    b"6;1000.5 1:0 2:3.4e-05 3:7 4:1e3\n"
+)
+ROWS_WITHOUT_CONCENTRATION = b"3 1:1.5 2:-2.25 3:0.0 4:12345.678\n5 1:0.1 2:0.2 3:0.3 4:0.4\n"
+
+
+def assert_same(parsed, expected):
+    features, target, concentration = parsed
+    np.testing.assert_array_equal(features, expected[0])
+    assert features.dtype == np.float32
+    np.testing.assert_array_equal(target, expected[1])
+    if expected[2] is None:
+        assert concentration is None
+    else:
+        np.testing.assert_array_equal(concentration, expected[2])
+
+
+@pytest.mark.parametrize('raw', [ROWS_WITH_CONCENTRATION, ROWS_WITHOUT_CONCENTRATION])
+def test_dense_parser_matches_sklearn(raw):
+    assert_same(_parse_dense(raw, 4), _parse_sklearn(raw, 4))
+
+
+def test_dense_parser_matches_sklearn_on_generated_batches():
+    raw = make_svmlight_bytes(200, num_features=16)
+    assert_same(_parse_dense(raw, 16), _parse_sklearn(raw, 16))
+
+
+@pytest.mark.parametrize('raw', [
+    b"1;10 1:0.5 2:1.5 4:2.5\n",          # Sparse row: index 3 omitted
+    b"1;10 1:0.5 2:1.5 3:2.5 4:3.5 # comment\n",
+    b"1 qid:3 1:0.5 2:1.5 3:2.5 4:3.5\n",  # qid field
+])
+def test_input_that_is_not_dense_falls_back_to_sklearn(raw, caplog):
+    with caplog.at_level(logging.WARNING):
+        parsed = parse_dense_svmlight(raw, 4)
+
+    assert 'falling back to the sklearn parser' in caplog.text
+    assert_same(parsed, _parse_sklearn(raw, 4))
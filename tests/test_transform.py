@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import PowerTransformer
+
+from sensor.components.transform import fit_yeo_johnson, yeo_johnson
+
+N = 2000
+_rng = np.random.default_rng(0)
+COLUMNS = {
+    'positive': _rng.lognormal(0, 1, N),
+    'negative': -_rng.lognormal(0, 1, N),
+    'mixed_sign': _rng.normal(0, 3, N) ** 3 / 10,
+    'mixed_sign_symmetric': _rng.normal(1, 2, N),
+    'constant': np.full(N, 3.0),
+}
+
+
+@pytest.mark.parametrize('name', COLUMNS)
+def test_yeo_johnson_matches_sklearn(name):
+    X = COLUMNS[name].reshape(-1, 1)
+    expected = PowerTransformer(standardize=False).fit(X)
+
+    lambdas = fit_yeo_johnson(X)
+
+    np.testing.assert_allclose(lambdas, expected.lambdas_, atol=1e-6)
+    np.testing.assert_allclose(yeo_johnson(X.copy(), lambdas), expected.transform(X), rtol=1e-6, atol=1e-6)
+
+
+def test_all_columns_are_fitted_together_like_one_at_a_time():
+    X = np.column_stack(list(COLUMNS.values()))
+
+    np.testing.assert_allclose(fit_yeo_johnson(X), PowerTransformer(standardize=False).fit(X).lambdas_, atol=1e-6)
+
+
+def test_lambdas_are_fitted_on_a_strided_subsample():
+    X = COLUMNS['positive'].reshape(-1, 1)
+
+    np.testing.assert_array_equal(fit_yeo_johnson(X, max_samples=500), fit_yeo_johnson(X[::4]))
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from tests.conftest import ROOT
+
+
+def test_fold_preprocessing_is_fitted_on_training_batches_only(monkeypatch):
+    from sensor.config.configuration import Configuration
+    from sensor.components.walk_forward import fold_features
+
+    monkeypatch.chdir(ROOT)
+    config = Configuration().data_preprocessing_config
+    rng = np.random.default_rng(0)
+    feature_columns = [f'feature_{i + 1}' for i in range(4)]
+    X = rng.uniform(0, 10, size=(300, 4)).astype(np.float32)
+    batch = np.repeat([3, 4, 5], 100)
+    X[batch == 5] *= 100  # A later batch far outside the training range
+
+    X_train, X_test = fold_features(X, batch <= 4, batch == 5, feature_columns, config)
+
+    low, high = config.feature_range
+    # Scaling bounds come from the training batches alone, so they span exactly the feature range...
+    assert X_train.min(axis=0) == pytest.approx(low) and X_train.max(axis=0) == pytest.approx(high)
+    # ...and the drifted test batch falls outside it instead of shaping it
+    assert (X_test.max(axis=0) > high).all()